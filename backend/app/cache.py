@@ -0,0 +1,286 @@
+# app/cache.py
+"""
+Read-through cache for reference data (players, clubs, gameweeks, fixtures).
+Each namespace is an LRU with a TTL; admin write paths call `invalidate(...)`
+for the namespaces they touch, so the TTL is only a safety net.
+
+Every namespace is also a data-version domain: invalidating it bumps its version.
+STATS, SCORES and LEADERBOARD are version-only domains bumped by the stat / score
+/ standings write paths. The response cache keys entries by the versions of the
+domains they depend on, so stale entries are never read again and simply age out.
+
+Storage is pluggable (see cache_backends). With REDIS_URL set, every worker also
+joins an invalidation channel: invalidate()/bump() publish the new versions and
+each worker drops its local copies, so all workers go stale together. Versions
+only ever move forward (receivers keep the max), so out-of-order delivery is safe.
+The same channel carries publish_event() payloads (e.g. rank index updates) to
+on_remote_event() listeners on the other workers.
+Set CACHE_BACKEND=redis to share the entries themselves between workers.
+
+Cached values are shared between requests: treat them as read-only.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from app.cache_backends import MISSING, MemoryBackend, RedisBackend
+
+logger = logging.getLogger(__name__)
+
+PLAYERS = "players"
+CLUBS = "clubs"
+GAMEWEEKS = "gameweeks"
+FIXTURES = "fixtures"
+RESPONSES = "responses"
+STATS = "stats"
+SCORES = "scores"
+LEADERBOARD = "leaderboard"
+
+# namespace -> (maxsize, ttl seconds)
+_NAMESPACES: Dict[str, Tuple[int, float]] = {
+    PLAYERS: (2048, 300.0),
+    CLUBS: (256, 300.0),
+    GAMEWEEKS: (256, 300.0),
+    FIXTURES: (1024, 300.0),
+    RESPONSES: (512, 3600.0),
+}
+
+CHANNEL = "aces:cache:invalidate"
+_VERSIONS_KEY = "aces:cache:versions"
+_WORKER_ID = uuid.uuid4().hex
+
+_versions: Dict[str, int] = {}
+_backend: Any = MemoryBackend(_NAMESPACES)
+_redis: Any = None
+_listener: Optional[asyncio.Task] = None
+_remote_listeners: List[Callable[[List[str]], None]] = []
+_event_listeners: Dict[str, List[Callable[[Any], None]]] = {}
+_sending: set = set()
+_published = 0
+_received = 0
+
+
+async def cached(namespace: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Returns the cached value for (namespace, key), loading and storing it on a miss.
+    If the namespace is invalidated while the loader runs, the loaded value may
+    predate that write: it is returned but not stored.
+    """
+    value = await _backend.get(namespace, key)
+    if value is MISSING:
+        version = versions(namespace)
+        value = await loader()
+        if versions(namespace) == version:
+            await _backend.set(namespace, key, value)
+    return value
+
+
+async def set_cached(namespace: str, key: Hashable, value: Any) -> None:
+    await _backend.set(namespace, key, value)
+
+
+def invalidate(*namespaces: str) -> None:
+    bump(*namespaces)
+    logger.info(f"Cache invalidated: {', '.join(namespaces)}")
+
+
+def bump(*domains: str) -> None:
+    """
+    Marks data in these domains as changed, here and (through the channel) on every
+    other worker. Cache namespaces among them are cleared.
+    """
+    now = time.time_ns()
+    changed = {}
+    for d in domains:
+        _versions[d] = max(_versions.get(d, 0) + 1, now)
+        changed[d] = _versions[d]
+        if d in _NAMESPACES:
+            _backend.clear(d)
+    _publish(changed)
+
+
+def versions(*domains: str) -> Tuple[int, ...]:
+    return tuple(_versions.get(d, 0) for d in domains)
+
+
+def version_scope() -> str:
+    """
+    What the version counters are relative to. With the channel they are shared by
+    every worker; without it each process counts on its own, so its versions only
+    mean something together with this worker's id.
+    """
+    return "shared" if _redis is not None else _WORKER_ID
+
+
+def on_remote_invalidate(callback: Callable[[List[str]], None]) -> None:
+    """Registers a callback for domains changed by another worker (e.g. to rebuild in-memory indexes)."""
+    _remote_listeners.append(callback)
+
+
+async def cached_json(
+    key: Hashable,
+    depends_on: Tuple[str, ...],
+    loader: Callable[[], Awaitable[Any]],
+    model: Type[BaseModel],
+) -> bytes:
+    """
+    Response cache: the loader's result validated through `model` and stored as
+    serialized JSON bytes, keyed by `key` plus the current versions of `depends_on`.
+    A None result is cached as `null`.
+    """
+    async def render() -> bytes:
+        data = await loader()
+        if data is None:
+            return b"null"
+        return model.model_validate(data, from_attributes=True).model_dump_json().encode()
+
+    return await cached(RESPONSES, (key, versions(*depends_on)), render)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "backend": _backend.name,
+        "channel": _redis is not None,
+        "published": _published,
+        "received": _received,
+        "caches": _backend.stats(),
+        "versions": dict(_versions),
+    }
+
+
+# --- Cross-worker channel ---
+
+def _publish(changed: Dict[str, int]) -> None:
+    if _redis is None or not changed:
+        return
+
+    async def send():
+        await _redis.hset(_VERSIONS_KEY, mapping=changed)
+        await _redis.publish(CHANNEL, json.dumps({"origin": _WORKER_ID, "versions": changed}))
+
+    _send(send)
+
+
+def publish_event(topic: str, payload: Any) -> None:
+    """
+    Sends a JSON payload to the on_remote_event(topic) callbacks of every other
+    worker (e.g. index updates too fine-grained for a version bump). A no-op
+    without the channel.
+    """
+    if _redis is None:
+        return
+    message = json.dumps({"origin": _WORKER_ID, "topic": topic, "payload": payload})
+    _send(lambda: _redis.publish(CHANNEL, message))
+
+
+def on_remote_event(topic: str, callback: Callable[[Any], None]) -> None:
+    """Registers a callback for payloads another worker sent with publish_event(topic)."""
+    _event_listeners.setdefault(topic, []).append(callback)
+
+
+def _send(send: Callable[[], Awaitable[Any]]) -> None:
+    global _published
+
+    async def run():
+        try:
+            await send()
+        except Exception:
+            logger.error("Cache channel publish failed", exc_info=True)
+
+    # Called from sync and async code alike; publishing never blocks the caller
+    try:
+        task = asyncio.get_running_loop().create_task(run())
+        _sending.add(task)
+        task.add_done_callback(_sending.discard)
+        _published += 1
+    except RuntimeError:
+        logger.warning("No running event loop; cache channel message not published")
+
+
+def apply_remote(message: Dict[str, Any]) -> List[str]:
+    """
+    Merges versions from another worker (or hands an event to its listeners).
+    Returns the domains that moved forward.
+    """
+    global _received
+    if message.get("origin") == _WORKER_ID:
+        return []
+    _received += 1
+    if "topic" in message:
+        for callback in _event_listeners.get(message["topic"], []):
+            try:
+                callback(message.get("payload"))
+            except Exception:
+                logger.error(f"Remote event handler for {message['topic']} failed", exc_info=True)
+        return []
+    moved = []
+    for domain, version in (message.get("versions") or {}).items():
+        if int(version) > _versions.get(domain, 0):
+            _versions[domain] = int(version)
+            if domain in _NAMESPACES:
+                _backend.clear(domain)
+            moved.append(domain)
+    if moved:
+        for callback in _remote_listeners:
+            callback(moved)
+    return moved
+
+
+async def _listen(pubsub: Any) -> None:
+    while True:
+        try:
+            msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if msg and msg.get("type") == "message":
+                data = msg["data"]
+                apply_remote(json.loads(data.decode() if isinstance(data, bytes) else data))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error("Cache invalidation listener error", exc_info=True)
+            await asyncio.sleep(1.0)
+
+
+async def start_cache(redis_client: Any = None) -> None:
+    """
+    Connects the shared backend / invalidation channel when REDIS_URL is set (or a
+    client is passed in, e.g. fakeredis in tests). Without either, caching stays
+    per-process.
+    """
+    global _backend, _redis, _listener
+    url = os.getenv("REDIS_URL")
+    if redis_client is None and not url:
+        return
+    if redis_client is None:
+        import redis.asyncio as redis_asyncio  # optional dependency, only needed with REDIS_URL
+        redis_client = redis_asyncio.from_url(url)
+
+    _redis = redis_client
+    # Start from the newest versions any worker has published
+    for domain, version in (await _redis.hgetall(_VERSIONS_KEY)).items():
+        domain = domain.decode() if isinstance(domain, bytes) else domain
+        _versions[domain] = max(_versions.get(domain, 0), int(version))
+
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "redis":
+        _backend = RedisBackend(_redis, _NAMESPACES, lambda ns: _versions.get(ns, 0))
+
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    _listener = asyncio.create_task(_listen(pubsub))
+    logger.info(f"Cache started: backend={_backend.name}, invalidation channel={CHANNEL}")
+
+
+async def stop_cache() -> None:
+    """Sends the channel messages still in flight, then disconnects."""
+    global _listener, _redis
+    if _sending:
+        await asyncio.gather(*_sending)
+    if _listener:
+        _listener.cancel()
+        _listener = None
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,233 @@
+# app/cache_backends.py
+"""
+Storage backends for app.cache. Both expose the same async get/set and a sync
+clear, so the cache API does not care where entries live:
+
+- MemoryBackend: per-process LRU + TTL dicts (the default).
+- RedisBackend: entries shared by every worker, stored as JSON under
+  "<prefix>:<namespace>:<namespace version>:<key>". Clearing a namespace needs no
+  Redis round trip: bumping the namespace version moves readers to fresh keys and
+  the old ones expire on their TTL.
+
+Redis is shared, so entries are never unpickled: encode_value/decode_value write
+plain JSON with tagged containers, and only rebuild pydantic models / enums
+defined in the app or the Prisma client, plus classes marked @cacheable.
+"""
+import base64
+import json
+import sys
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Tuple, Type
+
+from pydantic import BaseModel
+
+MISSING = object()
+
+_TAG = "__t"
+_TRUSTED_MODULES = ("app.", "prisma.")
+_cacheable: Dict[str, type] = {}
+
+
+def cacheable(cls: Type) -> Type:
+    """Allows plain objects of `cls` (rebuilt from their __dict__) in shared cache entries."""
+    _cacheable[_type_name(cls)] = cls
+    return cls
+
+
+def _type_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _trusted_type(name: str, base: type) -> type:
+    """A `base` subclass from an already imported app / Prisma module; nothing is imported."""
+    module, _, qualname = name.partition(":")
+    cls: Any = None
+    if module.startswith(_TRUSTED_MODULES) and module in sys.modules:
+        cls = sys.modules[module]
+        for part in qualname.split("."):
+            cls = getattr(cls, part, None)
+    if not (isinstance(cls, type) and issubclass(cls, base)):
+        raise ValueError(f"Refusing to decode cached type {name}")
+    return cls
+
+
+def encode_value(value: Any) -> Any:
+    """Turns a cached value into JSON-safe data that decode_value turns back."""
+    if value is None or (isinstance(value, (bool, int, float, str)) and not isinstance(value, Enum)):
+        return value
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and _TAG not in value:
+            return {k: encode_value(v) for k, v in value.items()}
+        return {_TAG: "dict", "v": [[encode_value(k), encode_value(v)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {_TAG: "tuple", "v": [encode_value(v) for v in value]}
+    if isinstance(value, Enum):
+        return {_TAG: "enum", "cls": _type_name(type(value)), "v": value.value}
+    if isinstance(value, datetime):
+        return {_TAG: "datetime", "v": value.isoformat()}
+    if isinstance(value, date):
+        return {_TAG: "date", "v": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {_TAG: "decimal", "v": str(value)}
+    if isinstance(value, bytes):
+        return {_TAG: "bytes", "v": base64.b64encode(value).decode()}
+    if isinstance(value, BaseModel):
+        fields = {f: encode_value(getattr(value, f)) for f in type(value).model_fields}
+        return {_TAG: "model", "cls": _type_name(type(value)), "v": fields}
+    if _type_name(type(value)) in _cacheable:
+        return {_TAG: "object", "cls": _type_name(type(value)), "v": encode_value(vars(value))}
+    raise TypeError(f"Cannot store {type(value).__name__} in the shared cache")
+
+
+def decode_value(data: Any) -> Any:
+    if isinstance(data, list):
+        return [decode_value(v) for v in data]
+    if not isinstance(data, dict):
+        return data
+    tag = data.get(_TAG)
+    if tag is None:
+        return {k: decode_value(v) for k, v in data.items()}
+    raw = data["v"]
+    if tag == "dict":
+        return {decode_value(k): decode_value(v) for k, v in raw}
+    if tag == "tuple":
+        return tuple(decode_value(v) for v in raw)
+    if tag == "enum":
+        return _trusted_type(data["cls"], Enum)(raw)
+    if tag == "datetime":
+        return datetime.fromisoformat(raw)
+    if tag == "date":
+        return date.fromisoformat(raw)
+    if tag == "decimal":
+        return Decimal(raw)
+    if tag == "bytes":
+        return base64.b64decode(raw)
+    if tag == "model":
+        # Fields were valid when stored; construct skips validating them again
+        return _trusted_type(data["cls"], BaseModel).model_construct(**decode_value(raw))
+    if tag == "object":
+        cls = _cacheable.get(data["cls"])
+        if cls is None:
+            raise ValueError(f"Refusing to decode cached type {data['cls']}")
+        obj = cls.__new__(cls)
+        obj.__dict__.update(decode_value(raw))
+        return obj
+    raise ValueError(f"Unknown cached value tag {tag!r}")
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, namespaces: Dict[str, Tuple[int, float]]):
+        self._caches = {ns: TTLCache(ns, maxsize, ttl) for ns, (maxsize, ttl) in namespaces.items()}
+
+    async def get(self, namespace: str, key: Hashable) -> Any:
+        return self._caches[namespace].get(key)
+
+    async def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        self._caches[namespace].set(key, value)
+
+    def clear(self, namespace: str) -> None:
+        self._caches[namespace].clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: c.stats() for name, c in self._caches.items()}
+
+
+class RedisBackend:
+    name = "redis"
+
+    def __init__(
+        self,
+        client: Any,
+        namespaces: Dict[str, Tuple[int, float]],
+        version_of: Callable[[str], int],
+        prefix: str = "aces:cache",
+    ):
+        self._client = client
+        self._ttl = {ns: ttl for ns, (_, ttl) in namespaces.items()}
+        self._version_of = version_of
+        self._prefix = prefix
+        self._hits = {ns: 0 for ns in namespaces}
+        self._misses = {ns: 0 for ns in namespaces}
+
+    def _key(self, namespace: str, key: Hashable) -> str:
+        return f"{self._prefix}:{namespace}:{self._version_of(namespace)}:{key!r}"
+
+    async def get(self, namespace: str, key: Hashable) -> Any:
+        raw = await self._client.get(self._key(namespace, key))
+        if raw is None:
+            self._misses[namespace] += 1
+            return MISSING
+        self._hits[namespace] += 1
+        return decode_value(json.loads(raw))
+
+    async def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        await self._client.set(
+            self._key(namespace, key),
+            json.dumps(encode_value(value)),
+            ex=max(1, int(self._ttl[namespace])),
+        )
+
+    def clear(self, namespace: str) -> None:
+        # Keys embed the namespace version, which the caller has just bumped
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        out = {}
+        for ns in self._ttl:
+            total = self._hits[ns] + self._misses[ns]
+            out[ns] = {
+                "ttl": self._ttl[ns],
+                "hits": self._hits[ns],
+                "misses": self._misses[ns],
+                "hit_rate": round(self._hits[ns] / total, 3) if total else 0.0,
+            }
+        return out
@@ -1,9 +1,10 @@
+import io
 import logging
 import asyncio
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from prisma import Prisma
 
 from app import schemas, auth
@@ -19,13 +20,14 @@ from app.services.admin_task_service import (
 )
 from app.services.stats_service import (
     get_dashboard_stats, 
-    compute_user_score_for_gw
+    compute_scores_for_gw
 )
 from app.services.fixture_service import (
     submit_fixture_stats_service, 
     get_fixture_stats_service
 )
 from app.services.autosub_service import process_autosubs_for_gameweek
+from app.services.stats_import_service import import_gameweek_stats, detect_format
 
 # Repositories
 from app.repositories.user_repo import (
@@ -59,6 +61,10 @@ from app.repositories.player_repo import (
 from app.repositories.fixture_repo import (
     get_fixture_by_id
 )
+from app.services.rank_service import refresh_standings
+from app.repositories.standings_repo import snapshot_gameweek_ranks
+from app.cache import invalidate, cache_stats, GAMEWEEKS, FIXTURES
+from app.utils.singleflight import singleflight_stats
 
 # Setup Logger
 logger = logging.getLogger("aces.admin")
@@ -99,6 +105,7 @@ async def pre_rollover_teams(db: Prisma, current_gw_id: int):
             'status': 'UPCOMING',
             'deadline': current_gw.deadline + timedelta(days=7) 
         })
+        invalidate(GAMEWEEKS)
         logger.info(f"Created Next Gameweek {next_gw_num}")
 
     # 3. Idempotency Check (Don't run twice)
@@ -177,21 +184,18 @@ async def pre_rollover_teams(db: Prisma, current_gw_id: int):
 @router.post("/gameweeks/start-season")
 async def start_season(db: Prisma = Depends(get_db)):
     first_gw = await start_season_logic(db)
+    await refresh_standings(db)
     return {"message": f"Season started! Gameweek {first_gw.gw_number} is now LIVE."}
 
 @router.post("/gameweeks/{gameweek_id}/calculate-points")
 async def calculate_gameweek_points(gameweek_id: int, db: Prisma = Depends(get_db)):
     try:
-        # We can move this user-fetching logic to a service later if we want total purity,
-        # but for now, the iteration happens here to keep the service function simple.
-        users = await db.user.find_many(where={'is_active': True, 'fantasy_team': {'is_not': None}})
-        if not users:
+        scores = await compute_scores_for_gw(db, gameweek_id)
+        if not scores:
             return {"message": "No active users with teams to process."}
-        
-        for user in users:
-            await compute_user_score_for_gw(db, str(user.id), gameweek_id)
-            
-        return {"message": f"Successfully calculated points for {len(users)} users."}
+        await refresh_standings(db)
+
+        return {"message": f"Successfully calculated points for {len(scores)} users."}
     except Exception as e:
         logger.error(f"Error calculating points for GW {gameweek_id}: {e}")
         raise HTTPException(status_code=500, detail="Point calculation failed.")
@@ -232,11 +236,11 @@ async def finalize_gameweek(gameweek_id: int, db: Prisma = Depends(get_db)):
         # STEP 3: RE-CALCULATE POINTS
         # Calculate points based on the new lineup (with subs in)
         logger.info("Step 3: Re-calculating points for all users...")
-        users = await db.user.find_many(where={'is_active': True, 'fantasy_team': {'is_not': None}})
-        if users:
-            for user in users:
-                await compute_user_score_for_gw(db, str(user.id), gameweek_id)
-        logger.info("Points re-calculation complete.")
+        scores = await compute_scores_for_gw(db, gameweek_id)
+        logger.info(f"Points re-calculation complete for {len(scores)} users.")
+
+        # Freeze this gameweek's final ranks for the rank-history chart
+        await snapshot_gameweek_ranks(db, gameweek_id)
 
         logger.info("Step 4: Updating Gameweek Status...")
         upcoming_gw = await db.gameweek.find_first(where={'status': 'UPCOMING'}, order={'gw_number': 'asc'})
@@ -245,6 +249,7 @@ async def finalize_gameweek(gameweek_id: int, db: Prisma = Depends(get_db)):
             await transaction.gameweek.update(where={'id': gameweek_id}, data={'status': 'FINISHED'})
             if upcoming_gw:
                 await transaction.gameweek.update(where={'id': upcoming_gw.id}, data={'status': 'LIVE'})
+        invalidate(GAMEWEEKS, FIXTURES)
 
         # --- STEP 5 (NEW): PROCESS PLAYER REINSTATEMENTS ---
         if upcoming_gw:
@@ -262,7 +267,11 @@ async def finalize_gameweek(gameweek_id: int, db: Prisma = Depends(get_db)):
             await transaction.gameweek.update(where={'id': gameweek_id}, data={'status': 'FINISHED'})
             if upcoming_gw:
                 await transaction.gameweek.update(where={'id': upcoming_gw.id}, data={'status': 'LIVE'})
+        invalidate(GAMEWEEKS, FIXTURES)
         
+        # Standings depend on which gameweek is current, so refresh after the status flip
+        await refresh_standings(db)
+
         message = f"Gameweek {live_gw.gw_number} finalized. Teams rolled over. Autosubs run: {subs_count}."
         if upcoming_gw:
             message += f" Gameweek {upcoming_gw.gw_number} is now live."
@@ -333,6 +342,7 @@ async def approve_user_endpoint(user_id: str, db: Prisma = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     
     updated = await approve_user(db, user_id)
+    await refresh_standings(db)
     has_team = await user_has_team(db, user_id)
     
     return {
@@ -345,6 +355,7 @@ async def approve_user_endpoint(user_id: str, db: Prisma = Depends(get_db)):
 @router.post("/users/bulk-approve", response_model=dict)
 async def bulk_approve_users_endpoint(request: schemas.BulkApproveRequest, db: Prisma = Depends(get_db)):
     result = await bulk_approve_users(db, request.user_ids)
+    await refresh_standings(db)
     return {"message": f"Successfully approved {result} users."}
 
 @router.post("/users/{user_id}/role", response_model=schemas.UserOut)
@@ -354,6 +365,7 @@ async def update_user_role_endpoint(user_id: str, request: schemas.UserUpdateRol
         raise HTTPException(status_code=404, detail="User not found")
     
     updated_user = await update_user_role(db, user_id, request.role)
+    await refresh_standings(db)
     has_team = await user_has_team(db, str(updated_user.id))
     
     return {
@@ -450,8 +462,35 @@ async def admin_get_gameweek_by_id(gameweek_id: int, db: Prisma = Depends(get_db
     return response_data
 
 @router.post("/gameweeks/{gameweek_id}/stats")
-async def admin_submit_fixture_stats(gameweek_id: int, payload: schemas.SubmitFixtureStats, db: Prisma = Depends(get_db)):
-    return await submit_fixture_stats_service(db, gameweek_id, payload)
+async def admin_submit_fixture_stats(
+    gameweek_id: int, 
+    payload: schemas.SubmitFixtureStats, 
+    provisional: bool = Query(True), 
+    db: Prisma = Depends(get_db)
+):
+    return await submit_fixture_stats_service(db, gameweek_id, payload, provisional=provisional)
+
+@router.post("/gameweeks/{gameweek_id}/stats/import")
+async def admin_import_gameweek_stats(
+    gameweek_id: int,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson; inferred from the file name if omitted"),
+    dry_run: bool = Query(False),
+    provisional: bool = Query(True),
+    db: Prisma = Depends(get_db)
+):
+    """
+    Imports a whole gameweek of player stat lines from a CSV (header row) or NDJSON
+    file. Rows identify the player by player_id, or by player + club. Invalid rows
+    are reported by line number and skipped; dry_run only validates.
+    """
+    fmt = detect_format(file.filename, format)
+    # The upload is spooled to disk by Starlette; read it as a lazy line stream
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await import_gameweek_stats(db, gameweek_id, stream, fmt, dry_run=dry_run, provisional=provisional)
+    finally:
+        stream.detach()
 
 @router.get("/fixtures/{fixture_id}/players", response_model=List[schemas.PlayerOut])
 async def admin_fixture_players(fixture_id: int, db: Prisma = Depends(get_db)):
@@ -490,7 +529,37 @@ async def trigger_autosubs(gameweek_id: int, db: Prisma = Depends(get_db)):
 @router.patch("/edit-stats")
 async def edit_historical_stats(
     req: schemas.UpdatePlayerStatsRequest, 
+    incremental: bool = Query(True),
     db: Prisma = Depends(get_db),
     admin=Depends(auth.get_current_admin_user) # Ensure only admin can access
 ):
-    return await stats_service.update_historical_stats(db, req)
\ No newline at end of file
+    return await stats_service.update_historical_stats(db, req, incremental=incremental)
+
+@router.post("/stats/rescore")
+async def rescore_season(db: Prisma = Depends(get_db)):
+    """
+    Re-applies the scoring rules to every stat line (e.g. after a rules change)
+    and recalculates manager scores for the affected gameweeks.
+    """
+    return await stats_service.rescore_season_stats(db)
+
+@router.post("/gameweeks/{gameweek_id}/rank-snapshot")
+async def snapshot_gameweek(gameweek_id: int, db: Prisma = Depends(get_db)):
+    """
+    Writes the rank snapshot for a gameweek (finalize does this automatically).
+    Used to backfill gameweeks finished before snapshots existed; existing rows are kept.
+    """
+    written = await snapshot_gameweek_ranks(db, gameweek_id)
+    return {"message": f"Snapshot written for {written} managers."}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit / miss counters and sizes for each reference-data cache namespace."""
+    return cache_stats()
+
+
+@router.get("/singleflight/stats")
+async def get_singleflight_stats():
+    """Per-endpoint call / execution counts; `coalesced` calls shared another caller's result."""
+    return singleflight_stats()
@@ -0,0 +1,25 @@
+import gzip
+from fastapi import APIRouter, Depends, Request, Response
+from prisma import Prisma
+from app.database import get_db
+from app import schemas
+
+# --- IMPORT SERVICES & REPOS ---
+from app.services.bootstrap_service import get_bootstrap_gzip
+
+router = APIRouter(prefix="/bootstrap", tags=["Bootstrap"])
+
+@router.get("/", response_model=schemas.BootstrapOut)
+async def get_bootstrap(request: Request, db: Prisma = Depends(get_db)):
+    """
+    Players (with season points), clubs, gameweeks, the current gameweek and the
+    next-fixture map in one cached response. Replaces the separate start-up calls.
+    """
+    body = await get_bootstrap_gzip(db)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(content=gzip.decompress(body), media_type="application/json", headers={"Vary": "Accept-Encoding"})
@@ -6,7 +6,7 @@ from app.database import get_db
 from app import auth, schemas
 
 # --- IMPORT NEW MODULES ---
-from app.repositories.gameweek_repo import get_current_gameweek
+from app.repositories.gameweek_repo import get_current_gameweek, get_gameweek_by_number
 from app.services.chip_service import get_chip_status, play_chip, cancel_chip
 
 router = APIRouter(prefix="/chips", tags=["Chips"], dependencies=[Depends(auth.get_current_user)])
@@ -24,7 +24,7 @@ async def chip_status(
     gw = None
     if gameweek_number:
         # We keep this direct query here for now as it's a specific lookup
-        gw = await db.gameweek.find_unique(where={'gw_number': gameweek_number})
+        gw = await get_gameweek_by_number(db, gameweek_number)
         if not gw:
             raise HTTPException(status_code=404, detail="Gameweek not found")
     else:
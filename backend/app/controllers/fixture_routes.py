@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from prisma import Prisma
 from app.database import get_db
+from app import schemas
+from app.cache import FIXTURES, CLUBS, PLAYERS, STATS
+from app.etag import depends_on
 
 # --- IMPORT SERVICES & REPOS ---
 from app.repositories.fixture_repo import get_all_fixtures
 from app.services.fixture_service import get_next_fixture_map_service
+from app.services.sync_service import get_fixture_changes
 
 router = APIRouter(prefix="/fixtures", tags=["fixtures"])
 
@@ -13,13 +17,20 @@ async def next_fixture_map(db: Prisma = Depends(get_db)):
     return await get_next_fixture_map_service(db)
 
 @router.get("/")
+@depends_on(FIXTURES, CLUBS)
 async def list_fixtures(
     db: Prisma = Depends(get_db),
     gameweek_id: int | None = None
 ):
     return await get_all_fixtures(db, gameweek_id)
 
+@router.get("/changes", response_model=schemas.FixtureChanges)
+async def get_changed_fixtures(since: int = Query(0, ge=0), db: Prisma = Depends(get_db)):
+    """Delta sync: fixtures changed after `since`, plus ids deleted since then."""
+    return await get_fixture_changes(db, since)
+
 @router.get("/{fixture_id}/details")
+@depends_on(FIXTURES, CLUBS, PLAYERS, STATS)
 async def get_public_fixture_details(fixture_id: int, db: Prisma = Depends(get_db)):
     fx = await db.fixture.find_unique(
         where={"id": fixture_id},
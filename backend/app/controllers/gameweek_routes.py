@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from prisma import Prisma
 from prisma import models as PrismaModels
 from app.services.stats_service import calculate_dream_team
@@ -8,6 +8,8 @@ from app.services.stats_service import calculate_team_of_the_season # Add import
 
 from app.database import get_db
 from app import schemas, auth
+from app.cache import cached_json, STATS, SCORES, PLAYERS, CLUBS, GAMEWEEKS, FIXTURES
+from app.etag import depends_on
 
 # --- IMPORT SERVICES & REPOS ---
 from app.repositories.gameweek_repo import (
@@ -16,6 +18,7 @@ from app.repositories.gameweek_repo import (
     get_current_gameweek
 )
 from app.services.gameweek_service import get_current_gameweek_with_stats
+from app.services.sync_service import get_gameweek_changes
 from app.services.stats_service import (
     get_gameweek_stats_for_user,
     get_team_of_the_week
@@ -23,13 +26,31 @@ from app.services.stats_service import (
 
 router = APIRouter()
 
+# Team views are cached as JSON bytes per (view, gameweek) and data version:
+# dream team / team of the season only read stats, team of the week also reads
+# scores and (for the latest one) the gameweek statuses
+_STATS_VIEW = (STATS, PLAYERS, CLUBS)
+_SCORES_VIEW = (STATS, SCORES, PLAYERS, CLUBS, GAMEWEEKS)
+# The dream team also shows each player's opponent (fixture_str)
+_DREAM_TEAM_VIEW = (*_STATS_VIEW, FIXTURES)
+
+
+def _json(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
 @router.get("/")
+@depends_on(GAMEWEEKS)
 async def get_all_gameweeks(db: Prisma = Depends(get_db)):
     """
     Returns a list of all gameweeks, sorted by their number.
     """
     return await get_all_gameweeks_list(db)
 
+@router.get("/changes", response_model=schemas.GameweekChanges)
+async def get_changed_gameweeks(since: int = Query(0, ge=0), db: Prisma = Depends(get_db)):
+    """Delta sync: gameweeks changed (deadline, status) after `since`, plus ids deleted since then."""
+    return await get_gameweek_changes(db, since)
+
 @router.get("/gameweek/current")
 async def get_current_gameweek_endpoint(db: Prisma = Depends(get_db)):
     """
@@ -62,29 +83,38 @@ async def get_gameweek_stats(
     )
 
 @router.get("/team-of-the-week", response_model=Optional[schemas.TeamOfTheWeekOut])
+@depends_on(*_SCORES_VIEW)
 async def get_latest_team_of_the_week(db: Prisma = Depends(get_db)):
     """
     Gets the Team of the Week for the last completed gameweek.
     """
-    team_data = await get_team_of_the_week(db)
-    if not team_data:
+    body = await cached_json(
+        ("team-of-the-week", None), _SCORES_VIEW,
+        lambda: get_team_of_the_week(db), schemas.TeamOfTheWeekOut
+    )
+    if body == b"null":
         raise HTTPException(status_code=404, detail="Team of the Week not available.")
-    return team_data
+    return _json(body)
 
 @router.get("/team-of-the-week/{gameweek_number}", response_model=Optional[schemas.TeamOfTheWeekOut])
+@depends_on(*_SCORES_VIEW)
 async def get_team_of_the_week_for_gameweek(gameweek_number: int, db: Prisma = Depends(get_db)):
     """
     Gets the Team of the Week for a specific gameweek number.
     """
-    team_data = await get_team_of_the_week(db, gameweek_number=gameweek_number)
-    if not team_data:
+    body = await cached_json(
+        ("team-of-the-week", gameweek_number), _SCORES_VIEW,
+        lambda: get_team_of_the_week(db, gameweek_number=gameweek_number), schemas.TeamOfTheWeekOut
+    )
+    if body == b"null":
         raise HTTPException(
             status_code=404,
             detail=f"Team of the Week for gameweek {gameweek_number} not found or not yet calculated."
         )
-    return team_data
+    return _json(body)
 
 @router.get("/dream-team/{gameweek_number}", response_model=Optional[schemas.TeamOfTheWeekOut])
+@depends_on(*_DREAM_TEAM_VIEW, GAMEWEEKS)
 async def get_dream_team_endpoint(gameweek_number: int, db: Prisma = Depends(get_db)):
     """
     Calculates and returns the hypothetical best team for a specific gameweek.
@@ -93,15 +123,23 @@ async def get_dream_team_endpoint(gameweek_number: int, db: Prisma = Depends(get
     if not gw:
         raise HTTPException(status_code=404, detail="Gameweek not found")
     
-    dt = await calculate_dream_team(db, gw.id)
-    if not dt:
+    body = await cached_json(
+        ("dream-team", gw.id), _DREAM_TEAM_VIEW,
+        lambda: calculate_dream_team(db, gw.id), schemas.TeamOfTheWeekOut
+    )
+    if body == b"null":
         raise HTTPException(status_code=404, detail="Stats not available to generate Dream Team")
         
-    return dt
+    return _json(body)
 
 @router.get("/team-of-the-season", response_model=Optional[schemas.TeamOfTheWeekOut])
+@depends_on(*_STATS_VIEW)
 async def get_tots_endpoint(db: Prisma = Depends(get_db)):
     """
     Calculates the best possible team based on total season points.
     """
-    return await calculate_team_of_the_season(db)
\ No newline at end of file
+    body = await cached_json(
+        ("team-of-the-season",), _STATS_VIEW,
+        lambda: calculate_team_of_the_season(db), schemas.TeamOfTheWeekOut
+    )
+    return _json(body)
\ No newline at end of file
@@ -1,13 +1,51 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from prisma import Prisma
 from app.database import get_db
 from app import schemas
+from app.cache import LEADERBOARD
+from app.etag import depends_on
 
 # --- IMPORT SERVICE ---
-from app.services.stats_service import get_leaderboard
+from app.services.stats_service import (
+    get_leaderboard,
+    get_leaderboard_page,
+    get_leaderboard_around,
+    get_leaderboard_rank
+)
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
 @router.get("/", response_model=list[schemas.LeaderboardEntry])
+@depends_on(LEADERBOARD)
 async def get_leaderboard_data(db: Prisma = Depends(get_db)):
-    return await get_leaderboard(db)
\ No newline at end of file
+    return await get_leaderboard(db)
+
+@router.get("/page", response_model=schemas.LeaderboardPage)
+@depends_on(LEADERBOARD)
+async def get_leaderboard_page_data(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Prisma = Depends(get_db)
+):
+    """
+    Keyset-paginated leaderboard. Follow `next_cursor` until it is null.
+    """
+    return await get_leaderboard_page(db, cursor, limit)
+
+@router.get("/around/{user_id}", response_model=list[schemas.LeaderboardEntry])
+@depends_on(LEADERBOARD)
+async def get_leaderboard_around_user(
+    user_id: str,
+    window: int = Query(5, ge=0, le=50),
+    db: Prisma = Depends(get_db)
+):
+    """
+    The user's leaderboard row with `window` rows above and below it.
+    """
+    return await get_leaderboard_around(db, user_id, window)
+
+@router.get("/rank/{user_id}", response_model=schemas.LeaderboardEntry)
+@depends_on(LEADERBOARD)
+async def get_leaderboard_rank_for_user(user_id: str, db: Prisma = Depends(get_db)):
+    return await get_leaderboard_rank(db, user_id)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from prisma import Prisma
 from app.database import get_db
 from app import schemas
+from app.cache import PLAYERS, CLUBS, STATS
+from app.etag import depends_on
 
 # --- IMPORT SERVICES & REPOS ---
 from app.repositories.player_repo import get_all_players_with_teams
@@ -9,28 +11,35 @@ from app.services.player_service import (
     get_players_with_stats_service, 
     get_player_details_service
 )
+from app.services.sync_service import get_player_changes
 
 router = APIRouter(
     prefix="/players",
     tags=["Players"]
 )
 
-# Use original schema for basic list
-class PlayerStatsOut(schemas.PlayerOut):
-    total_points: int
-
 @router.get("/", response_model=list[schemas.PlayerOut])
+@depends_on(PLAYERS, CLUBS)
 async def get_players(db: Prisma = Depends(get_db)):
     # Simple fetch, no complex logic needed
     return await get_all_players_with_teams(db)
 
-@router.get("/stats", response_model=list[PlayerStatsOut])
+@router.get("/stats", response_model=list[schemas.PlayerStatsOut])
+@depends_on(PLAYERS, CLUBS, STATS)
 async def get_all_player_stats(db: Prisma = Depends(get_db)):
     """
     Retrieves all players and aggregates their total points for the season.
     """
     return await get_players_with_stats_service(db)
 
+@router.get("/changes", response_model=schemas.PlayerChanges)
+async def get_changed_players(since: int = Query(0, ge=0), db: Prisma = Depends(get_db)):
+    """
+    Delta sync: players changed (status, news, price, season points...) after `since`,
+    plus ids deleted since then. Pass the returned `version` as `since` next time.
+    """
+    return await get_player_changes(db, since)
+
 @router.get("/{player_id}/details", response_model=schemas.PlayerDetailResponse)
 async def get_player_details(player_id: int, db: Prisma = Depends(get_db)):
     """
@@ -18,7 +18,7 @@ from app.services.team_service import (
     get_public_team_view
 )
 from app.services.transfer_service import transfer_player
-from app.repositories.gameweek_repo import get_current_gameweek
+from app.repositories.gameweek_repo import get_current_gameweek, get_gameweek_by_number
 
 router = APIRouter()
 
@@ -53,7 +53,7 @@ async def get_team(
         gw = await get_current_gameweek(db)
         gameweek_id = gw.id
     else:
-        gw = await db.gameweek.find_unique(where={'gw_number': gameweek_number})
+        gw = await get_gameweek_by_number(db, gameweek_number)
         if not gw:
             raise HTTPException(status_code=404, detail=f"Gameweek {gameweek_number} not found.")
         gameweek_id = gw.id
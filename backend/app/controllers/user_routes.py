@@ -1,3 +1,4 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from prisma import Prisma
 from prisma import models as PrismaModels
@@ -9,7 +10,8 @@ from app.auth import get_current_user
 # --- IMPORT SERVICES & REPOS ---
 from app.repositories.user_repo import approve_user
 from app.repositories.gameweek_repo import get_current_gameweek
-from app.services.stats_service import get_manager_hub_stats
+from app.services.rank_service import refresh_standings
+from app.services.stats_service import get_manager_hub_stats, get_user_rank_history
 
 router = APIRouter()
 
@@ -19,6 +21,7 @@ async def approve_user_endpoint(user_id: str, db: Prisma = Depends(get_db)): # C
     user = await approve_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    await refresh_standings(db)
     return {"message": f"User {user.email} approved"}
 
 @router.get("/stats", response_model=schemas.ManagerHubStats)
@@ -34,4 +37,12 @@ async def get_user_stats(
         db,
         user_id=str(current_user.id),
         gameweek_id=current_gameweek.id
-    )
\ No newline at end of file
+    )
+
+@router.get("/{user_id}/rank-history", response_model=List[schemas.RankHistoryEntry])
+async def get_rank_history(
+    user_id: str,
+    db: Prisma = Depends(get_db),
+    current_user: PrismaModels.User = Depends(get_current_user)
+):
+    return await get_user_rank_history(db, user_id)
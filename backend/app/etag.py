@@ -0,0 +1,107 @@
+# app/etag.py
+"""
+Conditional GET driven by the data versions in app.cache.
+
+An endpoint declares the domains its payload is built from:
+
+    @router.get("/players/")
+    @depends_on(PLAYERS, CLUBS)
+    async def get_players(...): ...
+
+For GET/HEAD requests to such an endpoint the middleware derives a strong ETag
+from the URL and those domains' current versions *before* the handler runs. If
+the client's If-None-Match matches, it answers 304 straight away (no handler,
+no database). Otherwise the handler runs and the ETag is attached to its 2xx
+response. Versions are read before the handler, so a write landing mid-request
+can only make the tag older than the body, never newer: the next request
+simply refetches.
+
+Only tag endpoints whose payload is a pure function of the URL and the declared
+domains: not per-user views, and not views that follow the current gameweek,
+which moves on at each deadline without any write.
+"""
+import hashlib
+from typing import Callable, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.cache import versions, version_scope
+
+_ATTR = "__etag_domains__"
+
+
+def depends_on(*domains: str) -> Callable:
+    """Marks an endpoint as cacheable by ETag over these data domains."""
+    def decorator(fn):
+        setattr(fn, _ATTR, domains)
+        return fn
+    return decorator
+
+
+def compute_etag(scope: Scope, domains: Tuple[str, ...]) -> str:
+    raw = "|".join([
+        version_scope(),
+        scope["path"],
+        scope.get("query_string", b"").decode("latin-1"),
+        ",".join(domains),
+        ",".join(map(str, versions(*domains))),
+    ])
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp, cache_control: str = "no-cache"):
+        self.app = app
+        # no-cache: clients and the CDN may store the response but must revalidate
+        self.cache_control = cache_control
+
+    def _domains_for(self, scope: Scope) -> Optional[Tuple[str, ...]]:
+        router = scope["app"].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(getattr(route, "endpoint", None), _ATTR, None)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        domains = self._domains_for(scope)
+        if domains is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag = compute_etag(scope, domains)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", self.cache_control.encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = self.cache_control
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -3,9 +3,13 @@ load_dotenv() # <-- MUST BE THE FIRST THING AFTER IMPORTS
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.controllers import auth_routes, user_routes, player_routes, team, gameweek_routes, leaderboard_routes, admin_routes,fixture_routes,transfer_routes,chip_routes
+from app.controllers import auth_routes, user_routes, player_routes, team, gameweek_routes, leaderboard_routes, admin_routes,fixture_routes,transfer_routes,chip_routes,bootstrap_routes
 import logging
 from app.database import db_client
+from app.services.rank_service import rebuild_rank_indexes, follow_remote_changes
+from app.cache import start_cache, stop_cache
+from app.etag import ETagMiddleware
+from app.utils.dataloader import DataLoaderMiddleware
 import os
 
 logging.basicConfig(
@@ -35,6 +39,12 @@ else:
         "https://acesfpl-testadmin.vercel.app"
     ]
 
+# Per-request batching / memoization for single-row repository lookups
+app.add_middleware(DataLoaderMiddleware)
+
+# Added before CORS so CORS stays outermost and its headers reach 304s too
+app.add_middleware(ETagMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -46,9 +56,13 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup():
     await db_client.connect()
+    await start_cache()
+    await rebuild_rank_indexes(db_client)
+    follow_remote_changes(db_client)
 
 @app.on_event("shutdown")
 async def shutdown():
+    await stop_cache()
     await db_client.disconnect()
 
 # --- API Router Includes ---
@@ -62,6 +76,7 @@ app.include_router(fixture_routes.router)
 app.include_router(transfer_routes.router)
 app.include_router(chip_routes.router)
 app.include_router(admin_routes.router)
+app.include_router(bootstrap_routes.router)
 
 # --- Root Endpoint ---
 @app.get("/")
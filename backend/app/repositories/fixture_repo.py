@@ -1,38 +1,63 @@
+import asyncio
+from typing import List
 from prisma import Prisma
+from app.cache import cached, FIXTURES
+from app.utils.dataloader import load
 
 async def get_fixture_by_id(db: Prisma, fixture_id: int):
     return await db.fixture.find_unique(where={"id": fixture_id})
 
 async def get_fixtures_in_gameweek(db: Prisma, gameweek_id: int):
-    return await db.fixture.find_many(
-        where={"gameweek_id": gameweek_id},
+    """
+    A gameweek's fixtures with both clubs, by kickoff (cached; invalidated on fixture
+    writes). Cache misses in the same tick share one query.
+    """
+    return await cached(FIXTURES, ("gw", gameweek_id), lambda: load(
+        "fixtures_by_gameweek", gameweek_id, lambda ids: _load_fixtures_by_gameweek(db, ids), memoize=False
+    ))
+
+async def _load_fixtures_by_gameweek(db: Prisma, gameweek_ids: List[int]):
+    fixtures = await db.fixture.find_many(
+        where={"gameweek_id": {"in": gameweek_ids}},
         include={"home": True, "away": True},
         order={"kickoff": "asc"}
     )
+    by_gw = {gw_id: [] for gw_id in gameweek_ids}
+    for f in fixtures:
+        by_gw[f.gameweek_id].append(f)
+    return by_gw
+
+async def get_fixtures_in_gameweeks(db: Prisma, gameweek_ids: List[int], team_ids=None):
+    """Fixtures across several gameweeks, optionally only those involving `team_ids`, by kickoff."""
+    fixtures = [
+        f for gw_fixtures in await asyncio.gather(*(get_fixtures_in_gameweek(db, gw_id) for gw_id in gameweek_ids))
+        for f in gw_fixtures
+    ]
+    if team_ids is not None:
+        team_ids = set(team_ids)
+        fixtures = [f for f in fixtures if f.home_team_id in team_ids or f.away_team_id in team_ids]
+    # Postgres puts NULL kickoffs last
+    return sorted(fixtures, key=lambda f: (f.kickoff is None, f.kickoff or 0))
 
 async def get_all_fixtures(db: Prisma, gameweek_id: int | None = None):
-    where = {}
     if gameweek_id:
-        where["gameweek_id"] = gameweek_id
-    
-    return await db.fixture.find_many(
-        where=where,
+        return await get_fixtures_in_gameweek(db, gameweek_id)
+
+    return await cached(FIXTURES, "all", lambda: db.fixture.find_many(
         include={"home": True, "away": True},
         order={"kickoff": "asc"}
-    )
+    ))
 
 async def get_fixture_for_history(db: Prisma, gameweek_id: int, team_id: int):
     """Finds the fixture for a specific team in a specific gameweek."""
-    return await db.fixture.find_first(
-        where={
-            'gameweek_id': gameweek_id, 
-            'OR': [{'home_team_id': team_id}, {'away_team_id': team_id}]
-        },
-        include={'home': True, 'away': True}
+    return next(
+        (f for f in await get_fixtures_in_gameweek(db, gameweek_id)
+         if f.home_team_id == team_id or f.away_team_id == team_id),
+        None
     )
 
 async def get_upcoming_fixtures_for_team(db: Prisma, team_id: int, start_gw_number: int, limit: int = 5):
-    return await db.fixture.find_many(
+    return await cached(FIXTURES, ("upcoming", team_id, start_gw_number, limit), lambda: db.fixture.find_many(
         where={
             'gameweek': {'gw_number': {'gte': start_gw_number}},
             'OR': [{'home_team_id': team_id}, {'away_team_id': team_id}]
@@ -40,4 +65,4 @@ async def get_upcoming_fixtures_for_team(db: Prisma, team_id: int, start_gw_numb
         include={'gameweek': True, 'home': True, 'away': True},
         order={'gameweek': {'gw_number': 'asc'}},
         take=limit
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
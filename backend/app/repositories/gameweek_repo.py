@@ -2,25 +2,36 @@ from datetime import datetime, timezone
 from fastapi import HTTPException
 from prisma import Prisma
 from app import schemas
+from app.cache import cached, set_cached, GAMEWEEKS
+from app.utils.gameweek_state import GameweekState
 import logging
 
 logger = logging.getLogger(__name__)
 
+async def get_gameweek_state(db: Prisma) -> GameweekState:
+    """
+    In-memory gameweek state, rebuilt from the cached gameweek list when the next
+    deadline passes or when a gameweek write invalidates the cache.
+    """
+    now_utc = datetime.now(timezone.utc)
+    state = await cached(GAMEWEEKS, "state", lambda: _build_state(db, now_utc))
+    if state.is_expired(now_utc):
+        state = await _build_state(db, now_utc)
+        await set_cached(GAMEWEEKS, "state", state)
+    return state
+
+async def _build_state(db: Prisma, now_utc: datetime) -> GameweekState:
+    return GameweekState(await get_all_gameweeks_list(db), now_utc)
+
 async def get_current_gameweek(db: Prisma):
     try:
         now_utc = datetime.now(timezone.utc)
 
-        # try next upcoming (future deadline)
-        gw = await db.gameweek.find_first(
-            where={'deadline': {'gt': now_utc}},
-            order={'deadline': 'asc'}
-        )
+        # next upcoming (future deadline), falling back to the most recent past
+        gw = (await get_gameweek_state(db)).current(now_utc)
         if not gw:
-            # fallback: most recent past
-            gw = await db.gameweek.find_first(order={'deadline': 'desc'})
-            if not gw:
-                logger.critical("No gameweeks found in database!")
-                raise HTTPException(status_code=404, detail="No gameweeks configured in the database.")
+            logger.critical("No gameweeks found in database!")
+            raise HTTPException(status_code=404, detail="No gameweeks configured in the database.")
 
         # 🔑 build the API schema your frontend expects
         return schemas.Gameweek(
@@ -42,16 +53,20 @@ async def get_current_gameweek(db: Prisma):
 
 async def _resolve_gw(db: Prisma, gameweek_id: int | None):
     if gameweek_id is not None:
-        gw = await db.gameweek.find_unique(where={'id': gameweek_id})
+        gw = await get_gameweek_by_id(db, gameweek_id)
         if not gw: raise HTTPException(404, "Gameweek not found")
         return gw
     return await get_current_gameweek(db)  # returns schemas.Gameweek
 
 async def get_all_gameweeks_list(db: Prisma):
-    return await db.gameweek.find_many(order={'gw_number': 'asc'})
+    """All gameweeks ordered by gw_number (cached; invalidated on gameweek writes)."""
+    return await cached(GAMEWEEKS, "all", lambda: db.gameweek.find_many(order={'gw_number': 'asc'}))
+
+async def get_gameweek_by_id(db: Prisma, gameweek_id: int):
+    return next((g for g in await get_all_gameweeks_list(db) if g.id == gameweek_id), None)
 
 async def get_gameweek_by_number(db: Prisma, gw_number: int):
-    return await db.gameweek.find_unique(where={'gw_number': gw_number})
+    return next((g for g in await get_all_gameweeks_list(db) if g.gw_number == gw_number), None)
 
 async def determine_active_gameweek(db: Prisma):
     """
@@ -60,26 +75,7 @@ async def determine_active_gameweek(db: Prisma):
     2. UPCOMING
     3. FINISHED (Last one)
     """
-    # 1. LIVE
-    gameweek = await db.gameweek.find_first(
-        where={'status': 'LIVE'},
-        order={'gw_number': 'asc'}
-    )
-    if gameweek: return gameweek
-
-    # 2. UPCOMING
-    gameweek = await db.gameweek.find_first(
-        where={'status': 'UPCOMING'},
-        order={'gw_number': 'asc'}
-    )
-    if gameweek: return gameweek
-
-    # 3. FINISHED
-    gameweek = await db.gameweek.find_first(
-        where={'status': 'FINISHED'},
-        order={'gw_number': 'desc'}
-    )
-    return gameweek
+    return (await get_gameweek_state(db)).active
 
 async def get_open_gameweek_for_transfers(db: Prisma):
     """
@@ -88,17 +84,11 @@ async def get_open_gameweek_for_transfers(db: Prisma):
     2. Next UPCOMING (e.g., pre-season or between weeks)
     Returns None if neither exists.
     """
-    # 1. First, try to find a gameweek that is currently LIVE.
-    target = await db.gameweek.find_first(
-        where={'status': 'LIVE'},
-        order={'gw_number': 'asc'}
-    )
-    if target: 
-        return target
+    return (await get_gameweek_state(db)).open_for_transfers
+
+async def get_last_finished_gameweek(db: Prisma):
+    return (await get_gameweek_state(db)).last_finished
 
-    # 2. If no gameweek is LIVE, find the next UPCOMING one.
-    target = await db.gameweek.find_first(
-        where={'status': 'UPCOMING'},
-        order={'gw_number': 'asc'}
-    )
-    return target
\ No newline at end of file
+async def get_next_gameweek(db: Prisma):
+    """First gameweek whose deadline is still in the future."""
+    return (await get_gameweek_state(db)).next_deadline(datetime.now(timezone.utc))
@@ -1,6 +1,9 @@
-from typing import Optional, List
+import json
+from typing import Any, Dict, Optional, List
 from prisma import Prisma
 from app import schemas
+from app.cache import cached, invalidate, PLAYERS, CLUBS
+from app.utils.dataloader import load
 
 async def get_players_filtered(db: Prisma, q: Optional[str], team_id: Optional[int], position: Optional[str], status: Optional[str]):
     where: dict = {}
@@ -21,6 +24,7 @@ async def get_players_filtered(db: Prisma, q: Optional[str], team_id: Optional[i
 
 async def create_player(db: Prisma, payload: schemas.PlayerCreate):
     created = await db.player.create(data=payload.model_dump())
+    invalidate(PLAYERS, CLUBS)
     return await db.player.find_unique(where={"id": created.id}, include={"team": True})
 
 async def update_player(db: Prisma, player_id: int, payload: schemas.PlayerUpdate):
@@ -29,22 +33,37 @@ async def update_player(db: Prisma, player_id: int, payload: schemas.PlayerUpdat
         data["team"] = {"connect": {"id": data.pop("team_id")}}
     
     await db.player.update(where={"id": player_id}, data=data)
+    invalidate(PLAYERS, CLUBS)
     return await db.player.find_unique(where={"id": player_id}, include={"team": True})
 
 async def delete_player(db: Prisma, player_id: int):
     await db.player.delete(where={"id": player_id})
+    invalidate(PLAYERS, CLUBS)
+
+async def _get_player_map(db: Prisma):
+    """{player_id: Player (with team)}, cached. Backs the single and batch player lookups."""
+    async def load():
+        return {p.id: p for p in await db.player.find_many(include={'team': True})}
+    return await cached(PLAYERS, "by_id", load)
+
+async def _load_players(db: Prisma, ids: List[int]):
+    players = await _get_player_map(db)
+    return {i: players[i] for i in ids if i in players}
 
 async def get_player_by_id(db: Prisma, player_id: int):
-    return await db.player.find_unique(where={"id": player_id})
+    # Batched + memoized per request: with a shared cache backend every map read
+    # is a round trip, so loops of single lookups collapse to one
+    return await load("players", player_id, lambda ids: _load_players(db, ids))
 
 async def get_players_by_ids(db: Prisma, ids: List[int]):
-    return await db.player.find_many(where={'id': {'in': ids}})
+    players = await _get_player_map(db)
+    return [players[i] for i in dict.fromkeys(ids) if i in players]
 
 async def count_players_in_team(db: Prisma, team_id: int) -> int:
     return await db.player.count(where={"team_id": team_id})
 
 async def get_all_players_with_teams(db: Prisma):
-    return await db.player.find_many(include={'team': True})
+    return list((await _get_player_map(db)).values())
 
 async def get_all_player_total_points(db: Prisma):
     """Returns a dictionary {player_id: total_points}"""
@@ -63,8 +82,34 @@ async def get_player_history_stats(db: Prisma, player_id: int):
         order={'gameweek': {'gw_number': 'desc'}}
     )
 
+# A player's season stats and every fixture of their club (with opponent), as two
+# JSON arrays from one statement. `fixtures` is ordered by gameweek then kickoff.
+_HISTORY_SQL = """
+WITH st AS (
+    SELECT s."gameweek_id", g."gw_number", s."points", s."goals_scored", s."assists",
+           s."clean_sheets", s."goals_conceded", s."yellow_cards", s."red_cards"
+    FROM "gameweek_player_stats" s
+    JOIN "gameweeks" g ON g."id" = s."gameweek_id"
+    WHERE s."player_id" = $1::int
+),
+fx AS (
+    SELECT f."gameweek_id", g."gw_number", f."kickoff", f."home_score", f."away_score",
+           (f."home_team_id" = $2::int) AS is_home,
+           opp."short_name" AS opp_short, opp."name" AS opp_long
+    FROM "fixtures" f
+    JOIN "gameweeks" g ON g."id" = f."gameweek_id"
+    JOIN "teams" opp ON opp."id" = CASE WHEN f."home_team_id" = $2::int THEN f."away_team_id" ELSE f."home_team_id" END
+    WHERE $2::int IN (f."home_team_id", f."away_team_id")
+)
+SELECT
+    (SELECT COALESCE(json_agg(st ORDER BY st."gw_number" DESC), '[]'::json) FROM st) AS stats,
+    (SELECT COALESCE(json_agg(fx ORDER BY fx."gw_number", fx."kickoff" NULLS LAST), '[]'::json) FROM fx) AS fixtures
+"""
+
+async def get_player_history_rows(db: Prisma, player_id: int, team_id: int) -> Dict[str, List[Dict[str, Any]]]:
+    """{"stats": [...], "fixtures": [...]} for the player details page, in one round trip."""
+    row = (await db.query_raw(_HISTORY_SQL, player_id, team_id))[0]
+    return {key: json.loads(row[key]) if isinstance(row[key], str) else row[key] for key in ("stats", "fixtures")}
+
 async def get_player_with_team(db: Prisma, player_id: int):
-    return await db.player.find_unique(
-        where={'id': player_id}, 
-        include={'team': True}
-    )
\ No newline at end of file
+    return await get_player_by_id(db, player_id)
\ No newline at end of file
@@ -0,0 +1,260 @@
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+from prisma import Prisma
+
+
+class ScoreChange(NamedTuple):
+    """One written UserGameweekScore row, before and after. old_* are None when the write created it."""
+    old_gross: Optional[int]
+    old_net: Optional[int]
+    gross: int
+    net: int
+
+
+def _changes(rows: List[Dict[str, Any]]) -> Dict[str, ScoreChange]:
+    """Rows with user_id, total_points, transfer_hits, old_total, old_hits -> {user_id: ScoreChange}."""
+    out = {}
+    for r in rows:
+        gross, hits = int(r["total_points"]), int(r["transfer_hits"] or 0)
+        created = r["old_total"] is None
+        old_gross = None if created else int(r["old_total"])
+        old_net = None if created else old_gross - int(r["old_hits"] or 0)
+        out[str(r["user_id"])] = ScoreChange(old_gross, old_net, gross, gross - hits)
+    return out
+
+
+async def bulk_upsert_gameweek_scores(db: Prisma, gameweek_id: int, totals: Dict[str, int]) -> Dict[str, ScoreChange]:
+    """
+    Writes total_points for many users in a single INSERT ... ON CONFLICT statement.
+    Returns the change to every written row (the `old` CTE reads the rows as they
+    were before the statement).
+    """
+    if not totals:
+        return {}
+
+    rows = [{"user_id": uid, "total_points": int(pts)} for uid, pts in totals.items()]
+    result = await db.query_raw(
+        """
+        WITH r AS (
+            SELECT * FROM json_to_recordset($1::json) AS r(user_id text, total_points int)
+        ),
+        old AS (
+            SELECT s."user_id", s."total_points", s."transfer_hits"
+            FROM "user_gameweek_scores" s
+            JOIN r ON r.user_id = s."user_id"
+            WHERE s."gameweek_id" = $2::int
+        ),
+        written AS (
+            INSERT INTO "user_gameweek_scores" ("user_id", "gameweek_id", "total_points")
+            SELECT r.user_id, $2::int, r.total_points FROM r
+            ON CONFLICT ("user_id", "gameweek_id")
+            DO UPDATE SET "total_points" = EXCLUDED."total_points"
+            RETURNING "user_id", "total_points", "transfer_hits"
+        )
+        SELECT w."user_id", w."total_points", w."transfer_hits",
+            old."total_points" AS old_total, old."transfer_hits" AS old_hits
+        FROM written w
+        LEFT JOIN old ON old."user_id" = w."user_id"
+        """,
+        json.dumps(rows),
+        gameweek_id,
+    )
+    return _changes(result)
+
+
+async def bulk_increment_gameweek_scores(db: Prisma, gameweek_id: int, deltas: Dict[str, int]) -> Dict[str, ScoreChange]:
+    """
+    Adds a per-user delta to existing total_points rows in one UPDATE.
+    Returns the change to every updated row.
+    """
+    rows = [{"user_id": uid, "delta": int(d)} for uid, d in deltas.items() if d]
+    if not rows:
+        return {}
+    result = await db.query_raw(
+        """
+        UPDATE "user_gameweek_scores" AS s
+        SET "total_points" = s."total_points" + r.delta
+        FROM json_to_recordset($1::json) AS r(user_id text, delta int)
+        WHERE s."user_id" = r.user_id AND s."gameweek_id" = $2::int
+        RETURNING s."user_id", s."total_points", s."transfer_hits",
+            s."total_points" - r.delta AS old_total, s."transfer_hits" AS old_hits
+        """,
+        json.dumps(rows),
+        gameweek_id,
+    )
+    return _changes(result)
+
+
+async def upsert_transfer_hits(
+    db: Prisma, user_id: str, gameweek_id: int, hits: int, increment: bool = True
+) -> Dict[str, ScoreChange]:
+    """
+    Adds `hits` to (or with increment=False, sets) a manager's transfer hits for the
+    gameweek, creating the score row if needed. Returns {user_id: ScoreChange}.
+    `db` may be a transaction.
+    """
+    result = await db.query_raw(
+        """
+        WITH old AS (
+            SELECT "total_points", "transfer_hits" FROM "user_gameweek_scores"
+            WHERE "user_id" = $1 AND "gameweek_id" = $2::int
+        ),
+        written AS (
+            INSERT INTO "user_gameweek_scores" ("user_id", "gameweek_id", "total_points", "transfer_hits")
+            VALUES ($1, $2::int, 0, $3::int)
+            ON CONFLICT ("user_id", "gameweek_id") DO UPDATE SET "transfer_hits" =
+                CASE WHEN $4::boolean
+                    THEN "user_gameweek_scores"."transfer_hits" + EXCLUDED."transfer_hits"
+                    ELSE EXCLUDED."transfer_hits"
+                END
+            RETURNING "user_id", "total_points", "transfer_hits"
+        )
+        SELECT w."user_id", w."total_points", w."transfer_hits",
+            old."total_points" AS old_total, old."transfer_hits" AS old_hits
+        FROM written w
+        LEFT JOIN old ON true
+        """,
+        user_id,
+        gameweek_id,
+        int(hits),
+        increment,
+    )
+    return _changes(result)
+
+
+async def refresh_gameweek_summary(db: Prisma, gameweek_id: int) -> None:
+    """Re-aggregates one gameweek's scores into its gameweek_summaries row (a full scan of the gameweek)."""
+    await db.execute_raw(
+        """
+        WITH s AS (
+            SELECT "user_id", "total_points" AS gross, "total_points" - "transfer_hits" AS net
+            FROM "user_gameweek_scores"
+            WHERE "gameweek_id" = $1::int
+        ),
+        hist AS (
+            SELECT net, COUNT(*)::int AS n FROM s GROUP BY net
+        )
+        INSERT INTO "gameweek_summaries" (
+            "gameweek_id", "manager_count", "points_sum", "gross_sum", "average_points", "highest_points",
+            "average_gross", "highest_gross", "histogram", "top_user_id", "updated_at"
+        )
+        SELECT $1::int, COUNT(*)::int,
+            COALESCE(SUM(net), 0)::bigint, COALESCE(SUM(gross), 0)::bigint,
+            COALESCE(AVG(net), 0)::float8, COALESCE(MAX(net), 0)::int,
+            COALESCE(AVG(gross), 0)::float8, COALESCE(MAX(gross), 0)::int,
+            COALESCE((SELECT jsonb_object_agg(net::text, n) FROM hist), '{}'::jsonb),
+            (SELECT "user_id" FROM s ORDER BY net DESC, "user_id" ASC LIMIT 1),
+            now()
+        FROM s
+        ON CONFLICT ("gameweek_id") DO UPDATE SET
+            "manager_count" = EXCLUDED."manager_count",
+            "points_sum" = EXCLUDED."points_sum",
+            "gross_sum" = EXCLUDED."gross_sum",
+            "average_points" = EXCLUDED."average_points",
+            "highest_points" = EXCLUDED."highest_points",
+            "average_gross" = EXCLUDED."average_gross",
+            "highest_gross" = EXCLUDED."highest_gross",
+            "histogram" = EXCLUDED."histogram",
+            "top_user_id" = EXCLUDED."top_user_id",
+            "updated_at" = EXCLUDED."updated_at"
+        """,
+        gameweek_id,
+    )
+
+
+# Moves a gameweek_summaries row by a batch of score changes ($2: rows of user_id,
+# old_gross, old_net, gross, net; old_* NULL for created rows) without scanning the
+# gameweek. Count and sums move by the deltas, averages are derived from them, the
+# histogram loses each old net and gains each new one, and the highest net is its
+# top key. The gameweek is only read when a maximum may have gone down: the highest
+# gross when its holder dropped, the top manager when the leader dropped out of the
+# top score and nobody else known to be there can take over.
+# Every SET expression reads the summary through `s`, so a concurrent update is
+# applied on top of (not instead of) this one.
+_APPLY_SUMMARY_CHANGES_SQL = """
+WITH d AS (
+    SELECT * FROM json_to_recordset($2::json)
+        AS r(user_id text, old_gross int, old_net int, gross int, net int)
+),
+agg AS (
+    SELECT
+        COUNT(*) FILTER (WHERE old_net IS NULL)::int AS added,
+        SUM(net - COALESCE(old_net, 0))::bigint AS net_delta,
+        SUM(gross - COALESCE(old_gross, 0))::bigint AS gross_delta,
+        MAX(gross) AS max_gross
+    FROM d
+)
+UPDATE "gameweek_summaries" AS s SET (
+    "manager_count", "points_sum", "gross_sum", "average_points", "average_gross",
+    "histogram", "highest_points", "highest_gross", "top_user_id", "updated_at"
+) = (
+    SELECT n.manager_count, n.points_sum, n.gross_sum,
+        CASE WHEN n.manager_count > 0 THEN n.points_sum::float8 / n.manager_count ELSE 0 END,
+        CASE WHEN n.manager_count > 0 THEN n.gross_sum::float8 / n.manager_count ELSE 0 END,
+        h.histogram,
+        h.highest,
+        CASE
+            WHEN a.max_gross >= s."highest_gross"
+                OR NOT EXISTS (SELECT 1 FROM d WHERE d.old_gross = s."highest_gross" AND d.gross < d.old_gross)
+            THEN GREATEST(s."highest_gross", a.max_gross)
+            ELSE (SELECT COALESCE(MAX(g."total_points"), 0) FROM "user_gameweek_scores" g
+                  WHERE g."gameweek_id" = $1::int)
+        END,
+        CASE
+            -- everyone on the top score was just written
+            WHEN h.at_top = (SELECT COUNT(*) FROM d WHERE d.net = h.highest)
+            THEN (SELECT MIN(d.user_id) FROM d WHERE d.net = h.highest)
+            -- same top score and the previous leader is still on it
+            WHEN h.highest = s."highest_points" AND s."top_user_id" IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM d WHERE d.user_id = s."top_user_id" AND d.net <> h.highest)
+            THEN LEAST(s."top_user_id", (SELECT MIN(d.user_id) FROM d WHERE d.net = h.highest))
+            ELSE (SELECT g."user_id" FROM "user_gameweek_scores" g
+                  WHERE g."gameweek_id" = $1::int AND g."total_points" - g."transfer_hits" = h.highest
+                  ORDER BY g."user_id" ASC LIMIT 1)
+        END,
+        now()
+    FROM agg a
+    CROSS JOIN LATERAL (
+        SELECT s."manager_count" + a.added AS manager_count,
+            s."points_sum" + a.net_delta AS points_sum,
+            s."gross_sum" + a.gross_delta AS gross_sum
+    ) n
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(jsonb_object_agg(k::text, c), '{}'::jsonb) AS histogram,
+            COALESCE(MAX(k), 0) AS highest,
+            (array_agg(c ORDER BY k DESC))[1] AS at_top
+        FROM (
+            SELECT k, SUM(c)::int AS c
+            FROM (
+                SELECT key::int AS k, value::int AS c FROM jsonb_each_text(s."histogram")
+                UNION ALL SELECT old_net, -1 FROM d WHERE old_net IS NOT NULL
+                UNION ALL SELECT net, 1 FROM d
+            ) moves
+            GROUP BY k
+            HAVING SUM(c) > 0
+        ) buckets
+    ) h
+)
+WHERE s."gameweek_id" = $1::int
+"""
+
+
+async def apply_gameweek_summary_changes(db: Prisma, gameweek_id: int, changes: Dict[str, ScoreChange]) -> None:
+    """
+    Moves the gameweek's summary row by `changes` (as returned by the writers above)
+    in one statement. A gameweek without a summary row yet gets a full re-aggregate.
+    """
+    rows = [
+        {"user_id": uid, "old_gross": c.old_gross, "old_net": c.old_net, "gross": c.gross, "net": c.net}
+        for uid, c in changes.items()
+        if (c.old_gross, c.old_net) != (c.gross, c.net)
+    ]
+    if not rows:
+        return
+    updated = await db.execute_raw(_APPLY_SUMMARY_CHANGES_SQL, gameweek_id, json.dumps(rows))
+    if not updated:
+        await refresh_gameweek_summary(db, gameweek_id)
+
+
+async def get_gameweek_summary(db: Prisma, gameweek_id: int):
+    return await db.gameweeksummary.find_unique(where={'gameweek_id': gameweek_id})
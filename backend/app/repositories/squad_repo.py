@@ -0,0 +1,103 @@
+import json
+from typing import Dict, Optional
+from prisma import Prisma
+
+# Squads are stored only for the gameweeks in which they were set explicitly. A
+# manager's squad for gameweek N is their latest stored squad at or before N;
+# rows for N itself are written (team_service.carry_forward_team) only when the
+# manager changes something or the gameweek is scored. Lookups ride the
+# (user_id, gameweek_id, player_id) unique index.
+
+
+async def resolve_squad_gameweek(db: Prisma, user_id: str, gameweek_id: int) -> Optional[int]:
+    """The gameweek id whose stored squad applies to `gameweek_id`, or None."""
+    latest = await db.userteam.find_first(
+        where={'user_id': user_id, 'gameweek_id': {'lte': gameweek_id}},
+        order={'gameweek_id': 'desc'}
+    )
+    return latest.gameweek_id if latest else None
+
+
+async def get_squad_entries(db: Prisma, user_id: str, gameweek_id: int, include: Optional[dict] = None):
+    """The squad in effect for `gameweek_id`, stored or not."""
+    source_gw_id = await resolve_squad_gameweek(db, user_id, gameweek_id)
+    if source_gw_id is None:
+        return []
+    return await db.userteam.find_many(
+        where={'user_id': user_id, 'gameweek_id': source_gw_id},
+        include=include
+    )
+
+
+async def get_squad_entry(db: Prisma, user_id: str, gameweek_id: int, player_id: int, include: Optional[dict] = None):
+    """One player's row in the squad in effect for `gameweek_id`, or None."""
+    source_gw_id = await resolve_squad_gameweek(db, user_id, gameweek_id)
+    if source_gw_id is None:
+        return None
+    return await db.userteam.find_first(
+        where={'user_id': user_id, 'gameweek_id': source_gw_id, 'player_id': player_id},
+        include=include
+    )
+
+
+# Gameweek rollover, set-based. For every active manager with a fantasy team:
+# the squad to carry into the next gameweek is the one in effect for the live
+# gameweek, except after a Free Hit, which reverts to the latest squad stored
+# before the live gameweek (or the Free Hit squad if there is none).
+_ROLLOVER_SOURCES_SQL = """
+SELECT u."id" AS user_id,
+       CASE WHEN fh."id" IS NOT NULL
+            THEN COALESCE(
+                (SELECT MAX(ut."gameweek_id") FROM "user_teams" ut
+                  WHERE ut."user_id" = u."id" AND ut."gameweek_id" < $1::int),
+                cur.gw)
+            ELSE cur.gw
+       END AS source_gw_id,
+       fh."id" IS NOT NULL AS free_hit
+FROM "users" u
+JOIN "fantasy_teams" ft ON ft."user_id" = u."id"
+LEFT JOIN "user_chips" fh
+       ON fh."user_id" = u."id" AND fh."gameweek_id" = $1::int AND fh."chip" = 'FREE_HIT'
+CROSS JOIN LATERAL (
+    SELECT MAX(ut."gameweek_id") AS gw FROM "user_teams" ut
+     WHERE ut."user_id" = u."id" AND ut."gameweek_id" <= $1::int
+) cur
+WHERE u."is_active"
+"""
+
+_ROLLOVER_DELETE_SQL = """
+DELETE FROM "user_teams"
+WHERE "gameweek_id" = $1::int
+  AND "user_id" IN (SELECT r.user_id FROM json_to_recordset($2::json) AS r(user_id text, source_gw_id int))
+"""
+
+_ROLLOVER_COPY_SQL = """
+INSERT INTO "user_teams" ("user_id", "gameweek_id", "player_id", "is_captain", "is_vice_captain", "is_benched")
+SELECT ut."user_id", $1::int, ut."player_id", ut."is_captain", ut."is_vice_captain", ut."is_benched"
+FROM json_to_recordset($2::json) AS r(user_id text, source_gw_id int)
+JOIN "user_teams" ut ON ut."user_id" = r.user_id AND ut."gameweek_id" = r.source_gw_id
+ON CONFLICT DO NOTHING
+"""
+
+
+async def rollover_squads(db: Prisma, live_gw_id: int, next_gw_id: int) -> Dict[str, int]:
+    """
+    Copies every active manager's squad from the live gameweek (see above) into
+    `next_gw_id`, replacing whatever is stored there, in three statements:
+    resolve sources, bulk delete, INSERT ... SELECT. Managers with no squad at
+    all are left alone. Run it inside a transaction.
+    """
+    sources = [
+        r for r in await db.query_raw(_ROLLOVER_SOURCES_SQL, live_gw_id)
+        if r["source_gw_id"] is not None
+    ]
+    if not sources:
+        return {"managers": 0, "free_hit_reverts": 0, "rows": 0}
+    payload = json.dumps([{"user_id": r["user_id"], "source_gw_id": r["source_gw_id"]} for r in sources])
+    await db.execute_raw(_ROLLOVER_DELETE_SQL, next_gw_id, payload)
+    rows = await db.execute_raw(_ROLLOVER_COPY_SQL, next_gw_id, payload)
+    return {
+        "managers": len(sources),
+        "free_hit_reverts": sum(1 for r in sources if r["free_hit"] and r["source_gw_id"] != live_gw_id),
+        "rows": rows,
+    }
@@ -0,0 +1,253 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from prisma import Prisma
+
+logger = logging.getLogger(__name__)
+
+# Eligible managers: active, role 'user', with a fantasy team (same filter the
+# leaderboard has always used).
+_ELIGIBLE_SQL = """
+    SELECT u."id" AS user_id, u."email", ft."name" AS team_name
+    FROM "users" u
+    JOIN "fantasy_teams" ft ON ft."user_id" = u."id"
+    WHERE u."is_active" = true AND u."role" = 'user'
+"""
+
+# Rebuilds every standings row in one statement. "Current" is the latest LIVE or
+# FINISHED gameweek; previous_rank is read from the previous gameweek's rank
+# snapshot and only re-derived from the scores when that snapshot is missing.
+# RANK() gives competition ranking (50, 50, 40 -> 1, 1, 3).
+_CUR_GW_SQL = """
+    SELECT "id", "gw_number" FROM "gameweeks"
+    WHERE "status" IN ('LIVE', 'FINISHED')
+    ORDER BY "gw_number" DESC
+    LIMIT 1
+"""
+
+_REFRESH_SQL = f"""
+    WITH cur_gw AS ({_CUR_GW_SQL}),
+    prev_gw AS (
+        SELECT "id" FROM "gameweeks"
+        WHERE "gw_number" < (SELECT "gw_number" FROM cur_gw)
+        ORDER BY "gw_number" DESC
+        LIMIT 1
+    ),
+    eligible AS ({_ELIGIBLE_SQL}),
+    totals AS (
+        SELECT e.user_id, e.email, e.team_name,
+            COALESCE(SUM(s."total_points" - s."transfer_hits"), 0)::int AS total_points,
+            COALESCE(SUM(s."total_points" - s."transfer_hits")
+                FILTER (WHERE g."gw_number" < (SELECT "gw_number" FROM cur_gw)), 0)::int AS prev_points,
+            COALESCE(SUM(s."total_points" - s."transfer_hits")
+                FILTER (WHERE s."gameweek_id" = (SELECT "id" FROM cur_gw)), 0)::int AS gw_points
+        FROM eligible e
+        LEFT JOIN "user_gameweek_scores" s ON s."user_id" = e.user_id
+        LEFT JOIN "gameweeks" g ON g."id" = s."gameweek_id"
+        GROUP BY e.user_id, e.email, e.team_name
+    ),
+    ranked AS (
+        SELECT t.*,
+            RANK() OVER (ORDER BY t.total_points DESC)::int AS rank,
+            RANK() OVER (ORDER BY t.prev_points DESC)::int AS prev_rank,
+            RANK() OVER (ORDER BY t.gw_points DESC)::int AS gw_rank
+        FROM totals t
+    )
+    INSERT INTO "standings" (
+        "user_id", "team_name", "manager_email", "total_points", "rank", "previous_rank",
+        "gameweek_id", "gameweek_points", "gameweek_rank", "updated_at"
+    )
+    SELECT r.user_id, r.team_name, r.email, r.total_points, r.rank,
+        CASE WHEN (SELECT "gw_number" FROM cur_gw) > 1 THEN COALESCE(snap."overall_rank", r.prev_rank) END,
+        (SELECT "id" FROM cur_gw),
+        r.gw_points,
+        CASE WHEN (SELECT "id" FROM cur_gw) IS NOT NULL THEN r.gw_rank END,
+        now()
+    FROM ranked r
+    LEFT JOIN "rank_snapshots" snap
+        ON snap."user_id" = r.user_id AND snap."gameweek_id" = (SELECT "id" FROM prev_gw)
+    ON CONFLICT ("user_id") DO UPDATE SET
+        "team_name" = EXCLUDED."team_name",
+        "manager_email" = EXCLUDED."manager_email",
+        "total_points" = EXCLUDED."total_points",
+        "rank" = EXCLUDED."rank",
+        "previous_rank" = EXCLUDED."previous_rank",
+        "gameweek_id" = EXCLUDED."gameweek_id",
+        "gameweek_points" = EXCLUDED."gameweek_points",
+        "gameweek_rank" = EXCLUDED."gameweek_rank",
+        "updated_at" = EXCLUDED."updated_at"
+    RETURNING "user_id", "total_points", "gameweek_id", "gameweek_points"
+"""
+
+# One eligible manager's standings row as refresh_standings would compute it
+# (without ranks); no row when the manager is not eligible.
+_MANAGER_TOTALS_SQL = f"""
+    WITH cur_gw AS ({_CUR_GW_SQL})
+    SELECT e.user_id, e.email, e.team_name,
+        (SELECT "id" FROM cur_gw) AS gameweek_id,
+        COALESCE(SUM(s."total_points" - s."transfer_hits"), 0)::int AS total_points,
+        COALESCE(SUM(s."total_points" - s."transfer_hits")
+            FILTER (WHERE s."gameweek_id" = (SELECT "id" FROM cur_gw)), 0)::int AS gameweek_points
+    FROM ({_ELIGIBLE_SQL}) e
+    LEFT JOIN "user_gameweek_scores" s ON s."user_id" = e.user_id
+    WHERE e.user_id = $1
+    GROUP BY e.user_id, e.email, e.team_name
+"""
+
+# Moves a few standings rows in place ($1: rows of user_id, delta, rank, gameweek_rank).
+# The delta is added to the total, and to the gameweek points when the row is on
+# gameweek $2; a NULL rank / gameweek_rank keeps the stored one.
+_APPLY_DELTAS_SQL = """
+    UPDATE "standings" AS s SET
+        "total_points" = s."total_points" + r.delta,
+        "gameweek_points" = CASE WHEN s."gameweek_id" = $2::int
+            THEN s."gameweek_points" + r.delta ELSE s."gameweek_points" END,
+        "rank" = COALESCE(r.rank, s."rank"),
+        "gameweek_rank" = COALESCE(r.gameweek_rank, s."gameweek_rank"),
+        "updated_at" = now()
+    FROM json_to_recordset($1::json) AS r(user_id text, delta int, rank int, gameweek_rank int)
+    WHERE s."user_id" = r.user_id
+"""
+
+# Freezes overall rank, gameweek rank and cumulative points as of gameweek $1 for
+# every eligible manager. Existing snapshots are never overwritten.
+_SNAPSHOT_SQL = f"""
+    WITH target AS (
+        SELECT "id", "gw_number" FROM "gameweeks" WHERE "id" = $1::int
+    ),
+    eligible AS ({_ELIGIBLE_SQL}),
+    totals AS (
+        SELECT e.user_id,
+            COALESCE(SUM(s."total_points" - s."transfer_hits")
+                FILTER (WHERE g."gw_number" <= (SELECT "gw_number" FROM target)), 0)::int AS total_points,
+            COALESCE(SUM(s."total_points" - s."transfer_hits")
+                FILTER (WHERE s."gameweek_id" = $1::int), 0)::int AS gw_points
+        FROM eligible e
+        LEFT JOIN "user_gameweek_scores" s ON s."user_id" = e.user_id
+        LEFT JOIN "gameweeks" g ON g."id" = s."gameweek_id"
+        GROUP BY e.user_id
+    )
+    INSERT INTO "rank_snapshots" (
+        "user_id", "gameweek_id", "total_points", "overall_rank", "gameweek_points", "gameweek_rank", "created_at"
+    )
+    SELECT t.user_id, (SELECT "id" FROM target), t.total_points,
+        RANK() OVER (ORDER BY t.total_points DESC)::int,
+        t.gw_points,
+        RANK() OVER (ORDER BY t.gw_points DESC)::int,
+        now()
+    FROM totals t
+    WHERE EXISTS (SELECT 1 FROM target)
+    ON CONFLICT ("user_id", "gameweek_id") DO NOTHING
+"""
+
+
+async def refresh_standings(db: Prisma) -> List[Dict[str, Any]]:
+    """
+    Recomputes the whole standings table in bulk. Returns the written rows
+    (user_id, total_points, gameweek_id, gameweek_points).
+    """
+    async with db.tx() as tx:
+        await tx.execute_raw(
+            f'DELETE FROM "standings" WHERE "user_id" NOT IN (SELECT user_id FROM ({_ELIGIBLE_SQL}) e)'
+        )
+        written = await tx.query_raw(_REFRESH_SQL)
+    logger.info(f"Standings refreshed for {len(written)} managers")
+    return written
+
+
+async def rename_standing(db: Prisma, user_id: str) -> int:
+    """Copies the manager's fantasy team name onto their standings row. Returns 0 when they have none."""
+    return await db.execute_raw(
+        """
+        UPDATE "standings" AS s SET "team_name" = ft."name", "updated_at" = now()
+        FROM "fantasy_teams" ft
+        WHERE ft."user_id" = s."user_id" AND s."user_id" = $1
+        """,
+        user_id,
+    )
+
+
+async def get_manager_totals(db: Prisma, user_id: str) -> Optional[Dict[str, Any]]:
+    """user_id, email, team_name, gameweek_id, total_points, gameweek_points for one eligible manager."""
+    rows = await db.query_raw(_MANAGER_TOTALS_SQL, user_id)
+    return rows[0] if rows else None
+
+
+async def insert_standing(db: Prisma, row: Dict[str, Any]) -> int:
+    """Adds one manager's standings row (see get_manager_totals, plus rank / gameweek_rank)."""
+    return await db.execute_raw(
+        """
+        INSERT INTO "standings" (
+            "user_id", "team_name", "manager_email", "total_points", "rank",
+            "gameweek_id", "gameweek_points", "gameweek_rank", "updated_at"
+        )
+        VALUES ($1, $2, $3, $4::int, $5::int, $6::int, $7::int, $8::int, now())
+        ON CONFLICT ("user_id") DO NOTHING
+        """,
+        row["user_id"], row["team_name"], row["email"], row["total_points"], row["rank"],
+        row["gameweek_id"], row["gameweek_points"], row["gameweek_rank"],
+    )
+
+
+async def apply_standings_deltas(db: Prisma, gameweek_id: int, rows: List[Dict[str, Any]]) -> int:
+    """
+    Updates only the given standings rows in one statement: {user_id, delta, rank,
+    gameweek_rank} each, see _APPLY_DELTAS_SQL. Returns the number of rows updated.
+    """
+    if not rows:
+        return 0
+    return await db.execute_raw(_APPLY_DELTAS_SQL, json.dumps(rows), gameweek_id)
+
+
+async def snapshot_gameweek_ranks(db: Prisma, gameweek_id: int) -> int:
+    """Writes the rank snapshot for one gameweek in bulk. Returns the number of new rows."""
+    written = await db.execute_raw(_SNAPSHOT_SQL, gameweek_id)
+    logger.info(f"Rank snapshot for GW {gameweek_id}: {written} managers")
+    return written
+
+
+async def get_rank_history(db: Prisma, user_id: str):
+    """One row per snapshotted gameweek for this manager, in gameweek order."""
+    return await db.ranksnapshot.find_many(
+        where={'user_id': user_id},
+        include={'gameweek': True},
+        order={'gameweek_id': 'asc'}
+    )
+
+
+async def get_standings(db: Prisma):
+    return await db.standing.find_many(order=[{'rank': 'asc'}, {'user_id': 'asc'}])
+
+
+# --- Keyset reads. (rank, user_id) is the sort key and is backed by an index. ---
+
+async def get_standing(db: Prisma, user_id: str):
+    return await db.standing.find_unique(where={'user_id': user_id})
+
+
+async def get_standings_after(db: Prisma, after_rank: Optional[int], after_user_id: Optional[str], limit: int):
+    """Next `limit` rows strictly after the (rank, user_id) cursor, or the first page."""
+    where: dict = {}
+    if after_rank is not None:
+        where = {'OR': [
+            {'rank': {'gt': after_rank}},
+            {'rank': after_rank, 'user_id': {'gt': after_user_id or ''}},
+        ]}
+    return await db.standing.find_many(
+        where=where,
+        order=[{'rank': 'asc'}, {'user_id': 'asc'}],
+        take=limit
+    )
+
+
+async def get_standings_before(db: Prisma, before_rank: int, before_user_id: str, limit: int):
+    """Up to `limit` rows strictly before the cursor, returned in leaderboard order."""
+    rows = await db.standing.find_many(
+        where={'OR': [
+            {'rank': {'lt': before_rank}},
+            {'rank': before_rank, 'user_id': {'lt': before_user_id}},
+        ]},
+        order=[{'rank': 'desc'}, {'user_id': 'desc'}],
+        take=limit
+    )
+    return list(reversed(rows))
@@ -0,0 +1,77 @@
+import json
+from typing import Dict, List
+from prisma import Prisma
+
+
+async def get_all_stat_lines_with_position(db: Prisma) -> List[Dict]:
+    """Every GameweekPlayerStats row with the player's position, as plain dicts."""
+    return await db.query_raw(
+        """
+        SELECT s."id", s."gameweek_id", s."player_id", p."position",
+               s."goals_scored", s."assists", s."clean_sheets", s."goals_conceded",
+               s."own_goals", s."penalties_missed", s."penalties_saved",
+               s."yellow_cards", s."red_cards", s."bonus_points", s."points"
+        FROM "gameweek_player_stats" s
+        JOIN "players" p ON p."id" = s."player_id"
+        """
+    )
+
+
+async def bulk_update_stat_points(db: Prisma, points_by_id: Dict[int, int]) -> int:
+    """Sets the denormalized `points` column for many stat rows in one UPDATE."""
+    if not points_by_id:
+        return 0
+    rows = [{"id": int(k), "points": int(v)} for k, v in points_by_id.items()]
+    return await db.execute_raw(
+        """
+        UPDATE "gameweek_player_stats" AS s
+        SET "points" = r.points
+        FROM json_to_recordset($1::json) AS r(id int, points int)
+        WHERE s."id" = r.id
+        """,
+        json.dumps(rows),
+    )
+
+
+# Stat columns written by fixture submission, in table order
+STAT_LINE_FIELDS = (
+    "goals_scored", "assists", "clean_sheets", "goals_conceded", "own_goals",
+    "penalties_missed", "penalties_saved", "yellow_cards", "red_cards", "bonus_points", "points",
+)
+_STAT_LINE_TYPES = {"clean_sheets": "boolean"}
+
+
+def _stat_line_sql() -> str:
+    cols = ", ".join(f'"{f}"' for f in STAT_LINE_FIELDS)
+    record = ", ".join(f"{f} {_STAT_LINE_TYPES.get(f, 'int')}" for f in STAT_LINE_FIELDS)
+    select = ", ".join(f"r.{f}" for f in STAT_LINE_FIELDS)
+    assign = ", ".join(f'"{f}" = EXCLUDED."{f}"' for f in STAT_LINE_FIELDS)
+    current = ", ".join(f't."{f}"' for f in STAT_LINE_FIELDS)
+    incoming = ", ".join(f'EXCLUDED."{f}"' for f in STAT_LINE_FIELDS)
+    return f"""
+        INSERT INTO "gameweek_player_stats" AS t ("gameweek_id", "player_id", {cols})
+        SELECT $2::int, r.player_id, {select}
+        FROM json_to_recordset($1::json) AS r(player_id int, {record})
+        ON CONFLICT ("gameweek_id", "player_id")
+        DO UPDATE SET {assign}
+        WHERE ({current}) IS DISTINCT FROM ({incoming})
+        RETURNING t."player_id"
+    """
+
+
+_UPSERT_STAT_LINES_SQL = _stat_line_sql()
+
+
+async def bulk_upsert_stat_lines(db: Prisma, gameweek_id: int, lines: List[Dict]) -> List[int]:
+    """
+    Writes many players' stat lines for one gameweek in a single INSERT ... ON
+    CONFLICT DO UPDATE. Each line has player_id plus STAT_LINE_FIELDS; a later
+    line for the same player wins. Rows whose values are unchanged are not
+    touched. Returns the ids of players whose row was inserted or changed.
+    """
+    by_player = {int(l["player_id"]): l for l in lines}
+    if not by_player:
+        return []
+    rows = [{"player_id": pid, **{f: l[f] for f in STAT_LINE_FIELDS}} for pid, l in by_player.items()]
+    result = await db.query_raw(_UPSERT_STAT_LINES_SQL, json.dumps(rows), gameweek_id)
+    return [int(r["player_id"]) for r in result]
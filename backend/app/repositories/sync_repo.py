@@ -0,0 +1,62 @@
+from typing import List
+from prisma import Prisma
+
+# Delta-sync reads. Triggers stamp every insert / update with change_version (one
+# global sequence, used for ordering) and change_xid (the writing transaction); see
+# the add_change_versions / add_change_xids migrations. Deletions leave a row in
+# "tombstones". The cursor is a transaction id horizon: a poll returns the writes of
+# every transaction with id >= `since`, committed by the time it reads.
+
+
+async def get_sync_horizon(db: Prisma) -> int:
+    """
+    The oldest transaction id still in flight (or the next one to be assigned).
+    Every transaction below it has finished, so its writes are visible to any read
+    made after this call; a cursor never needs to go past it. Must be read before
+    the rows it is returned with.
+    """
+    rows = await db.query_raw(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS horizon"
+    )
+    return int(rows[0]["horizon"])
+
+
+async def get_players_changed_since(db: Prisma, since: int):
+    return await db.player.find_many(
+        where={'change_xid': {'gte': since}},
+        include={'team': True},
+        order={'change_version': 'asc'}
+    )
+
+
+async def get_fixtures_changed_since(db: Prisma, since: int):
+    return await db.fixture.find_many(
+        where={'change_xid': {'gte': since}},
+        order={'change_version': 'asc'}
+    )
+
+
+async def get_gameweeks_changed_since(db: Prisma, since: int):
+    return await db.gameweek.find_many(
+        where={'change_xid': {'gte': since}},
+        order={'change_version': 'asc'}
+    )
+
+
+async def get_tombstones_since(db: Prisma, entity: str, since: int):
+    return await db.tombstone.find_many(
+        where={'entity': entity, 'change_xid': {'gte': since}},
+        order={'change_version': 'asc'}
+    )
+
+
+async def get_player_total_points_for(db: Prisma, player_ids: List[int]):
+    """{player_id: season points} for just these players."""
+    if not player_ids:
+        return {}
+    stats = await db.gameweekplayerstats.group_by(
+        by=['player_id'],
+        where={'player_id': {'in': player_ids}},
+        sum={'points': True},
+    )
+    return {s['player_id']: s['_sum']['points'] or 0 for s in stats}
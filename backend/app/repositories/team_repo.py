@@ -1,8 +1,15 @@
+import json
+from typing import List
 from prisma import Prisma
 from app import schemas
+from app.cache import cached, invalidate, PLAYERS, CLUBS, FIXTURES
+from app.utils.dataloader import load
 
 
 async def get_all_teams_with_counts(db: Prisma):
+    return await cached(CLUBS, "with_counts", lambda: _load_teams_with_counts(db))
+
+async def _load_teams_with_counts(db: Prisma):
     teams = await db.team.find_many(order={"name": "asc"})
     player_counts = await db.player.group_by(by=['team_id'], count={'_all': True})
     count_map = {item['team_id']: item['_count']['_all'] for item in player_counts}
@@ -13,25 +20,37 @@ async def get_all_teams_with_counts(db: Prisma):
         for t in teams
     ]
 
+# Players and fixtures embed their club, so club writes invalidate those too
 async def create_team(db: Prisma, payload: schemas.TeamCreate):
-    return await db.team.create(data=payload.model_dump())
+    team = await db.team.create(data=payload.model_dump())
+    invalidate(CLUBS, PLAYERS, FIXTURES)
+    return team
 
 async def update_team(db: Prisma, team_id: int, payload: schemas.TeamUpdate):
-    return await db.team.update(
+    team = await db.team.update(
         where={"id": team_id}, 
         data=payload.model_dump(exclude_unset=True, exclude_none=True)
     )
+    invalidate(CLUBS, PLAYERS, FIXTURES)
+    return team
 
 async def delete_team(db: Prisma, team_id: int):
     await db.team.delete(where={"id": team_id})
+    invalidate(CLUBS, PLAYERS, FIXTURES)
 
 async def get_team_by_name_or_short(db: Prisma, name: str, short_name: str):
     return await db.team.find_first(
         where={"OR": [{"name": name}, {"short_name": short_name}]}
     )
 
+async def _load_teams(db: Prisma, ids: List[int]):
+    return {t.id: t for t in await db.team.find_many(where={"id": {"in": ids}})}
+
 async def get_team_by_id(db: Prisma, team_id: int):
-    return await db.team.find_unique(where={"id": team_id})
+    # Cache misses in the same tick share one IN query
+    return await cached(CLUBS, ("by_id", team_id), lambda: load(
+        "clubs", team_id, lambda ids: _load_teams(db, ids), memoize=False
+    ))
 
 async def get_top_pick_for_gameweek(db: Prisma, gameweek_id: int, field: str = None):
     """
@@ -55,4 +74,24 @@ async def get_top_pick_for_gameweek(db: Prisma, gameweek_id: int, field: str = N
     player = await db.player.find_unique(where={'id': agg[0]['player_id']}, include={'team': True})
     if player and player.team:
         return {"name": player.full_name, "team_name": player.team.name}
-    return None
\ No newline at end of file
+    return None
+
+# Owners through virtual squads: a user's squad for the gameweek is their latest
+# stored one at or before it (see squad_repo), so unscored managers who did not
+# touch their team still count.
+_SQUAD_OWNERS_SQL = """
+SELECT DISTINCT ut."user_id"
+FROM "user_teams" ut
+WHERE ut."player_id" IN (SELECT json_array_elements_text($2::json)::int)
+  AND ut."gameweek_id" = (
+    SELECT MAX(latest."gameweek_id") FROM "user_teams" latest
+     WHERE latest."user_id" = ut."user_id" AND latest."gameweek_id" <= $1::int
+  )
+"""
+
+async def get_squad_owner_ids(db: Prisma, gameweek_id: int, player_ids: List[int]) -> List[str]:
+    """Player -> owners lookup: ids of users whose squad for the gameweek holds any of these players."""
+    if not player_ids:
+        return []
+    rows = await db.query_raw(_SQUAD_OWNERS_SQL, gameweek_id, json.dumps(player_ids))
+    return [r["user_id"] for r in rows]
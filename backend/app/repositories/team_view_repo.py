@@ -0,0 +1,55 @@
+import json
+from typing import Any, Dict, List
+from prisma import Prisma
+
+# Everything per-user that get_user_team_full needs, in one statement: the
+# fantasy team name and active chip (repeated on every row), and per squad entry
+# the player, club and current-gameweek stat row. Recent form is shared by all
+# managers and comes from recent_form_service instead.
+# The squad is the latest stored one at or before the gameweek (see squad_repo).
+# The LEFT JOIN from fantasy_teams keeps one row (with NULL entry columns) when
+# the user has no squad for the gameweek; no rows means no fantasy team at all.
+_TEAM_VIEW_SQL = """
+SELECT
+    ft."name" AS team_name,
+    (SELECT uc."chip"::text FROM "user_chips" uc
+      WHERE uc."user_id" = ft."user_id" AND uc."gameweek_id" = $2::int
+      LIMIT 1) AS active_chip,
+    ut."player_id",
+    ut."is_captain",
+    ut."is_vice_captain",
+    ut."is_benched",
+    p."full_name",
+    p."position",
+    p."price"::float8 AS price,
+    p."status"::text AS status,
+    p."news",
+    p."chance_of_playing",
+    p."return_date",
+    c."id" AS club_id,
+    c."name" AS club_name,
+    c."short_name" AS club_short_name,
+    row_to_json(s) AS stats
+FROM "fantasy_teams" ft
+LEFT JOIN "user_teams" ut ON ut."user_id" = ft."user_id" AND ut."gameweek_id" = (
+    SELECT MAX(latest."gameweek_id") FROM "user_teams" latest
+     WHERE latest."user_id" = ft."user_id" AND latest."gameweek_id" <= $2::int
+)
+LEFT JOIN "players" p ON p."id" = ut."player_id"
+LEFT JOIN "teams" c ON c."id" = p."team_id"
+LEFT JOIN "gameweek_player_stats" s ON s."player_id" = ut."player_id" AND s."gameweek_id" = $2::int
+WHERE ft."user_id" = $1
+ORDER BY ut."is_benched" ASC, ut."bench_priority" ASC, ut."player_id" ASC
+"""
+
+
+def _json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def get_team_view_rows(db: Prisma, user_id: str, gameweek_id: int) -> List[Dict[str, Any]]:
+    """Rows of _TEAM_VIEW_SQL with `stats` decoded to a dict (or None)."""
+    rows = await db.query_raw(_TEAM_VIEW_SQL, user_id, gameweek_id)
+    for r in rows:
+        r["stats"] = _json(r["stats"])
+    return rows
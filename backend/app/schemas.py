@@ -151,6 +151,18 @@ class LeaderboardEntry(BaseModel):
     manager_email: str
     user_id: str
 
+class LeaderboardPage(BaseModel):
+    items: List[LeaderboardEntry]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+class RankHistoryEntry(BaseModel):
+    gameweek_id: int
+    gw_number: int
+    overall_rank: int
+    gameweek_rank: int
+    total_points: int
+    gameweek_points: int
+
 class TransferRequest(BaseModel):
     out_player_id: int
     in_player_id: int
@@ -246,6 +258,8 @@ class ManagerHubStats(BaseModel):
     in_the_bank: float
     gameweek_transfers: int
     total_transfers: int
+    overall_rank: Optional[int] = None
+    percentile: Optional[float] = None
 
 class TeamOfTheWeekOut(BaseModel):
     manager_name: str
@@ -266,6 +280,52 @@ class Gameweek(BaseModel):
     data_checked: bool
     model_config = ConfigDict(from_attributes=True)
 
+# --- Bootstrap (one-shot static game data) ---
+class PlayerStatsOut(PlayerOut):
+    total_points: int
+
+class BootstrapGameweek(BaseModel):
+    id: int
+    gw_number: int
+    deadline: datetime
+    status: str
+    model_config = ConfigDict(from_attributes=True)
+
+class BootstrapFixture(BaseModel):
+    id: int
+    gameweek_id: int
+    home_team_id: int
+    away_team_id: int
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+    stats_entered: Optional[bool] = None
+    kickoff: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class BootstrapOut(BaseModel):
+    players: List[PlayerStatsOut]
+    clubs: List[TeamOut]
+    gameweeks: List[BootstrapGameweek]
+    current_gameweek: Optional[Gameweek] = None
+    fixtures: List[BootstrapFixture]  # clubs referenced by id, see `clubs`
+    next_fixture_map: Dict[int, str]
+
+# --- Delta sync: rows changed after ?since=<version>, plus deleted ids ---
+class PlayerChanges(BaseModel):
+    version: int
+    players: List[PlayerStatsOut]
+    deleted: List[int]
+
+class FixtureChanges(BaseModel):
+    version: int
+    fixtures: List[BootstrapFixture]
+    deleted: List[int]
+
+class GameweekChanges(BaseModel):
+    version: int
+    gameweeks: List[BootstrapGameweek]
+    deleted: List[int]
+
 class Activity(BaseModel):
     id: str
     type: str
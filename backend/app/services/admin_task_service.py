@@ -2,6 +2,8 @@ import logging
 from prisma import Prisma
 from datetime import datetime, timezone
 from fastapi import HTTPException
+from app.cache import invalidate, PLAYERS, CLUBS, GAMEWEEKS, FIXTURES
+from app.repositories.squad_repo import rollover_squads
 
 alog = logging.getLogger("aces.admin_tasks")
 
@@ -20,91 +22,28 @@ async def perform_gameweek_rollover_tasks(db: Prisma, live_gw_id: int):
         alog.warning("End of season: No next gameweek found. Rollover tasks skipped.")
         return
 
-    active_users = await db.user.find_many(where={'is_active': True, 'fantasy_team': {'is_not': None}})
-    if not active_users:
-        alog.info("No active users with teams to roll over.")
-        return
-        
-    for user in active_users:
-        # 1. Determine if Free Hit was active in the GW that just finished
-        free_hit_active = await db.userchip.find_first(
-            where={
-                'user_id': user.id, 
-                'gameweek_id': live_gw_id, 
-                'chip': 'FREE_HIT'
-            }
+    # One transaction, constant round trips whatever the league size
+    async with db.tx() as tx:
+        copied = await rollover_squads(tx, live_gw.id, next_gw.id)
+        alog.info(
+            f"Copied {copied['rows']} squad rows for {copied['managers']} managers to GW {next_gw.gw_number} "
+            f"({copied['free_hit_reverts']} Free Hit reverts)."
         )
 
-        source_gw_id = live_gw_id
-
-        if free_hit_active:
-            # 2. Revert logic: Find the team state BEFORE the Free Hit week
-            prev_entry = await db.userteam.find_first(
-                where={
-                    'user_id': user.id, 
-                    'gameweek_id': {'lt': live_gw_id}
-                },
-                order={'gameweek_id': 'desc'}
-            )
-            
-            if prev_entry:
-                source_gw_id = prev_entry.gameweek_id
-                alog.info(f"Free Hit detected for {user.email}. Reverting to team from GW ID {source_gw_id}.")
-            else:
-                alog.warning(f"User {user.email} used Free Hit but no previous team found. Defaulting to live GW.")
-
-        # 3. Fetch the team from our determined source
-        user_team_to_copy = await db.userteam.find_many(
-            where={'user_id': user.id, 'gameweek_id': source_gw_id}
-        )
-        
-        if not user_team_to_copy:
-            continue
-
-        # --- ADD THIS CLEANUP STEP ---
-        # Clear out any "temporary" or accidental data in the next GW 
-        # to ensure the revert is clean.
-        await db.userteam.delete_many(
-            where={
-                'user_id': user.id,
-                'gameweek_id': next_gw.id
-            }
-        )
-
-        # 4. Prepare data for the NEXT gameweek
-        new_team_data = [
-            {
-                "user_id": user.id,
-                "gameweek_id": next_gw.id,
-                "player_id": p.player_id,
-                "is_captain": p.is_captain,
-                "is_vice_captain": p.is_vice_captain,
-                "is_benched": p.is_benched
-            } for p in user_team_to_copy
-        ]
-
-        # 5. Atomic copy (removed the redundant duplicate block)
-        await db.userteam.create_many(data=new_team_data, skip_duplicates=True)
-        alog.info(f"Copied team for user {user.email} to GW {next_gw.gw_number}.")
-
-    # --- Keep existing steps 4 and 5 (flags and transfer resets) ---
-    if live_gw.gw_number == 1:
-        user_ids_in_gw1 = [
-            ut.user_id for ut in await db.userteam.find_many(
-                where={'gameweek_id': live_gw.id},
-                distinct=['user_id']
-            )
-        ]
-        if user_ids_in_gw1:
-            await db.user.update_many(
-                where={'id': {'in': user_ids_in_gw1}},
-                data={'played_first_gameweek': True}
+        # Flags and transfer resets
+        if live_gw.gw_number == 1:
+            await tx.execute_raw(
+                """
+                UPDATE "users" SET "played_first_gameweek" = true
+                WHERE "id" IN (SELECT DISTINCT "user_id" FROM "user_teams" WHERE "gameweek_id" = $1::int)
+                """,
+                live_gw.id,
             )
 
-    await db.user.update_many(
-        where={'is_active': True, 'played_first_gameweek': True},
-        data={'free_transfers': 2}
-    )
+        await tx.user.update_many(
+            where={'is_active': True, 'played_first_gameweek': True},
+            data={'free_transfers': 2}
+        )
     alog.info(f"--- Gameweek Rollover for GW ID: {live_gw_id} Completed ---")
 
 
@@ -121,6 +60,7 @@ async def start_season_logic(db: Prisma):
         raise HTTPException(status_code=400, detail=f"Deadline for GW {first_gw.gw_number} has not passed.")
     
     await db.gameweek.update(where={'id': first_gw.id}, data={'status': 'LIVE'})
+    invalidate(GAMEWEEKS, FIXTURES)
     return first_gw
 
 async def finalize_gameweek_logic(db: Prisma, gameweek_id: int):
@@ -138,6 +78,7 @@ async def finalize_gameweek_logic(db: Prisma, gameweek_id: int):
             await transaction.gameweek.update(where={'id': live_gw.id}, data={'status': 'FINISHED'})
             if upcoming_gw:
                 await transaction.gameweek.update(where={'id': upcoming_gw.id}, data={'status': 'LIVE'})
+        invalidate(GAMEWEEKS, FIXTURES)
 
         return live_gw, upcoming_gw
     except HTTPException:
@@ -186,5 +127,6 @@ async def process_player_reinstatements(db: Prisma, next_gameweek_id: int):
             'return_date': None
         }
     )
+    invalidate(PLAYERS, CLUBS)
     
     alog.info(f"Successfully reinstated {len(player_ids)} players for GW {next_gw.gw_number}.")    
\ No newline at end of file
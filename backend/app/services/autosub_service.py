@@ -2,6 +2,7 @@ import logging
 from typing import List, Dict, Set
 from prisma import Prisma
 from app.repositories.player_repo import count_players_in_team
+from app.cache import bump, SCORES
 from collections import Counter
 
 logger = logging.getLogger("aces.autosub")
@@ -250,5 +251,7 @@ async def process_autosubs_for_gameweek(db: Prisma, gameweek_id: int):
         
         updates_made += 1
 
+    if updates_made:
+        bump(SCORES)  # squads changed; score-derived views must be rebuilt
     logger.info(f"Autosub complete. Teams updated: {updates_made}")
     return updates_made
\ No newline at end of file
@@ -0,0 +1,42 @@
+import gzip
+import logging
+from prisma import Prisma
+from app import schemas
+from app.cache import cached, versions, RESPONSES, PLAYERS, CLUBS, GAMEWEEKS, FIXTURES, STATS
+from app.repositories.gameweek_repo import get_current_gameweek, get_all_gameweeks_list
+from app.repositories.fixture_repo import get_all_fixtures
+from app.repositories.team_repo import get_all_teams_with_counts
+from app.services.player_service import get_players_with_stats_service
+from app.services.fixture_service import get_next_fixture_map_service
+
+logger = logging.getLogger(__name__)
+
+# Everything in the snapshot comes from these domains (STATS for season points)
+_DEPENDS_ON = (PLAYERS, CLUBS, GAMEWEEKS, FIXTURES, STATS)
+
+
+async def get_bootstrap_gzip(db: Prisma) -> bytes:
+    """
+    Gzipped JSON snapshot of the static game data the frontend loads on start:
+    players with season points, clubs, gameweeks, the current gameweek and the
+    next-fixture map. Built once per data version; the current gameweek is part
+    of the key because it moves on at each deadline without any write.
+    """
+    current = await get_current_gameweek(db)
+    key = ("bootstrap", current.id, current.is_current)
+    return await cached(RESPONSES, (key, versions(*_DEPENDS_ON)), lambda: _build(db, current))
+
+
+async def _build(db: Prisma, current: schemas.Gameweek) -> bytes:
+    snapshot = schemas.BootstrapOut(
+        players=await get_players_with_stats_service(db),
+        clubs=await get_all_teams_with_counts(db),
+        gameweeks=await get_all_gameweeks_list(db),
+        current_gameweek=current,
+        fixtures=await get_all_fixtures(db),
+        next_fixture_map=await get_next_fixture_map_service(db),
+    )
+    raw = snapshot.model_dump_json().encode()
+    body = gzip.compress(raw, compresslevel=6)
+    logger.info(f"Bootstrap snapshot built: {len(raw)} bytes, {len(body)} gzipped")
+    return body
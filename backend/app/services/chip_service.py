@@ -3,6 +3,8 @@ from fastapi import HTTPException
 from prisma import Prisma
 from app import schemas
 from app.repositories.gameweek_repo import _resolve_gw
+from app.services.rank_service import record_gameweek_scores
+from app.repositories.score_repo import upsert_transfer_hits
 import logging
 
 logger = logging.getLogger("aces.chips")
@@ -57,6 +59,7 @@ async def play_chip(db: Prisma, user_id: str, chip: str, gameweek_id: int | None
     if already_used:
         raise HTTPException(400, f"{chip} already used this season.")
 
+    score_changes = {}
     async with db.tx() as tx:
         # 1. Create the chip record
         new_chip = await tx.userchip.create(data={
@@ -67,27 +70,11 @@ async def play_chip(db: Prisma, user_id: str, chip: str, gameweek_id: int | None
 
         # 2. Reset transfer hits if it's a Wildcard or Free Hit
         if chip in ["WILDCARD", "FREE_HIT"]:
-            await tx.usergameweekscore.upsert(
-                where={
-                    'user_id_gameweek_id': {
-                        'user_id': user_id, 
-                        'gameweek_id': gw.id
-                    }
-                },
-                data={
-                    'create': {
-                        'user_id': user_id, 
-                        'gameweek_id': gw.id, 
-                        'transfer_hits': 0
-                    },
-                    'update': {
-                        'transfer_hits': 0
-                    }
-                }
-            )
+            score_changes = await upsert_transfer_hits(tx, user_id, gw.id, 0, increment=False)
             logger.info(f"User {user_id} activated {chip}. Transfer hits reset to 0.")
 
-        return new_chip
+    await record_gameweek_scores(db, gw.id, score_changes)
+    return new_chip
 
 
 async def cancel_chip(db: Prisma, user_id: str, gameweek_id: int | None):
@@ -2,14 +2,18 @@ import logging
 from fastapi import HTTPException
 from prisma import Prisma
 from app import schemas
-from app.utils.points_calculator import calculate_player_points
+from app.utils.points_calculator import calculate_points_vectorized, stats_to_columns
 from app.repositories.player_repo import get_players_by_ids
-from app.repositories.gameweek_repo import get_current_gameweek
+from app.repositories.gameweek_repo import get_current_gameweek, get_gameweek_by_id, get_gameweek_by_number
 from app.repositories.fixture_repo import get_fixtures_in_gameweek
+from app.repositories.team_repo import get_squad_owner_ids
+from app.repositories.stats_repo import bulk_upsert_stat_lines, STAT_LINE_FIELDS
+from app.services.stats_service import rescore_live_managers
+from app.cache import invalidate, bump, FIXTURES, STATS
 
 logger = logging.getLogger(__name__)
 
-async def submit_fixture_stats_service(db: Prisma, gameweek_id: int, payload: schemas.SubmitFixtureStats):
+async def submit_fixture_stats_service(db: Prisma, gameweek_id: int, payload: schemas.SubmitFixtureStats, provisional: bool = True):
     fx = await db.fixture.find_unique(where={"id": payload.fixture_id})
     if not fx or fx.gameweek_id != gameweek_id: 
         raise HTTPException(400, "Fixture does not belong to this gameweek")
@@ -18,48 +22,41 @@ async def submit_fixture_stats_service(db: Prisma, gameweek_id: int, payload: sc
     players = await get_players_by_ids(db, player_ids)
     player_map = {p.id: p for p in players}
 
+    # Score every submitted line in one vectorized pass
+    scored_stats = [s for s in payload.player_stats if s.player_id in player_map]
+    points = calculate_points_vectorized(
+        [player_map[s.player_id].position for s in scored_stats],
+        stats_to_columns(scored_stats)
+    )
+
+    lines = [
+        {**s.model_dump(include={"player_id", *STAT_LINE_FIELDS}), "points": int(total_points)}
+        for s, total_points in zip(scored_stats, points.tolist())
+    ]
+
+    # Score update + every stat line in two statements
     async with db.tx() as tx:
         await tx.fixture.update(
             where={"id": payload.fixture_id}, 
             data={"home_score": payload.home_score, "away_score": payload.away_score, "stats_entered": True}
         )
-        for s in payload.player_stats:
-            player = player_map.get(s.player_id)
-            if not player: continue
-            
-            total_points = calculate_player_points(player.position, s)
-            stat_data = s.model_dump()
-            
-            # 1. Safely remove fields that do not exist in the GameweekPlayerStats table
-            keys_to_remove = ['player_id', 'played', 'minutes', 'suspension_duration']
-            for key in keys_to_remove:
-                stat_data.pop(key, None)
-            
-            # 2. Upsert using the flat scalar IDs for gameweek_id and player_id
-            await tx.gameweekplayerstats.upsert(
-                where={
-                    "gameweek_id_player_id": {
-                        "gameweek_id": gameweek_id, 
-                        "player_id": s.player_id
-                    }
-                },
-                data={
-                    "create": {
-                        # Use connect syntax for relations
-                        "gameweek": {"connect": {"id": gameweek_id}},
-                        "player": {"connect": {"id": s.player_id}},
-                        # Spread the rest of the data
-                        **stat_data, 
-                        "points": total_points
-                    }, 
-                    "update": {
-                        **stat_data, 
-                        "points": total_points
-                    }
-                }
-            )
-            
-    return {"ok": True}
+        changed_ids = await bulk_upsert_stat_lines(tx, gameweek_id, lines)
+    invalidate(FIXTURES)
+    if changed_ids:
+        bump(STATS)
+
+    # Live provisional scoring: only managers owning a player whose line actually
+    # changed are rescored, and only their standings rows move, so a submission
+    # costs O(owners of 2 clubs) at most.
+    rescored = 0
+    if provisional and changed_ids:
+        gw = await get_gameweek_by_id(db, gameweek_id)
+        if gw and gw.status == 'LIVE':
+            owner_ids = await get_squad_owner_ids(db, gameweek_id, changed_ids)
+            rescored = len(await rescore_live_managers(db, gameweek_id, owner_ids))
+            logger.info(f"Provisional rescore after fixture {payload.fixture_id}: {rescored} managers")
+
+    return {"ok": True, "changed_players": changed_ids, "rescored_managers": rescored}
 
 async def get_fixture_stats_service(db: Prisma, fixture_id: int):
     fx = await db.fixture.find_unique(where={"id": fixture_id})
@@ -73,7 +70,7 @@ async def get_fixture_stats_service(db: Prisma, fixture_id: int):
 
 async def get_next_fixture_map_service(db: Prisma):
     cur = await get_current_gameweek(db)
-    nxt = await db.gameweek.find_unique(where={'gw_number': cur.gw_number + 1})
+    nxt = await get_gameweek_by_number(db, cur.gw_number + 1)
     
     if not nxt:
         return {}
@@ -1,9 +1,10 @@
 from fastapi import HTTPException
 from prisma import Prisma
-from app.repositories.gameweek_repo import determine_active_gameweek
+from app.repositories.gameweek_repo import determine_active_gameweek, get_next_gameweek
 from app.repositories.team_repo import get_top_pick_for_gameweek
-from datetime import datetime
+from app.utils.singleflight import singleflight
 
+@singleflight()
 async def get_current_gameweek_with_stats(db: Prisma):
     gameweek = await determine_active_gameweek(db)
     
@@ -30,11 +31,4 @@ async def get_current_gameweek_with_stats(db: Prisma):
 
 async def get_next_gameweek_service(db: Prisma):
     # Find the first gameweek where the deadline is in the future
-    return await db.gameweek.find_first(
-        where={
-            "deadline": {
-                "gt": datetime.now() # "Greater Than" Now
-            }
-        },
-        order={"deadline": "asc"}
-    )
\ No newline at end of file
+    return await get_next_gameweek(db)
\ No newline at end of file
@@ -5,16 +5,15 @@ from app import schemas
 # Import Repos
 from app.repositories.player_repo import (
     get_player_with_team, 
-    get_player_history_stats,
+    get_player_history_rows,
     get_all_players_with_teams,
     get_all_player_total_points
 )
-from app.repositories.fixture_repo import (
-    get_fixture_for_history,
-    get_upcoming_fixtures_for_team
-)
+from app.cache import cached, versions, RESPONSES, STATS, FIXTURES, CLUBS, GAMEWEEKS
 from app.repositories.gameweek_repo import get_current_gameweek
+from app.utils.singleflight import singleflight
 
+@singleflight()
 async def get_players_with_stats_service(db: Prisma):
     players = await get_all_players_with_teams(db)
     points_map = await get_all_player_total_points(db)
@@ -33,71 +32,83 @@ async def get_player_details_service(db: Prisma, player_id: int):
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    # 2. Fetch Season History Stats
-    stats_history = await get_player_history_stats(db, player_id)
+    # 2. Season history + club fixtures (cached per player and club)
+    season = await get_player_season(db, player_id, player.team_id)
+
+    # 3. Upcoming Fixtures: depends on the current gameweek, so picked per request
+    current_gw = await get_current_gameweek(db)
+    # Handle edge case where no current GW exists (start of season -> 1)
+    current_gw_num = current_gw.gw_number if current_gw else 1
+    upcoming_items = [f for f in season["fixtures"] if f["gw"] >= current_gw_num][:5]
+
+    return schemas.PlayerDetailResponse(
+        id=player.id,
+        full_name=player.full_name,
+        position=player.position,
+        team_name=player.team.name,
+        price=float(player.price),
+        total_points=season["total_points"],
+        history=season["history"],
+        upcoming_fixtures=upcoming_items
+    )
+
+
+async def get_player_season(db: Prisma, player_id: int, team_id: int):
+    """
+    History rows (opponent, W/D/L, stats) and the club's fixture list for one player.
+    Cached until stats, fixtures, clubs or gameweeks change; the club is part of the
+    key so a transfer between clubs starts a fresh entry.
+    """
+    return await cached(
+        RESPONSES,
+        (("player-season", player_id, team_id), versions(STATS, FIXTURES, CLUBS, GAMEWEEKS)),
+        lambda: _build_player_season(db, player_id, team_id)
+    )
+
+
+async def _build_player_season(db: Prisma, player_id: int, team_id: int):
+    rows = await get_player_history_rows(db, player_id, team_id)
+
+    # First fixture (by kickoff) of each gameweek, as get_fixture_for_history picks it
+    fixture_by_gw = {}
+    for f in rows["fixtures"]:
+        fixture_by_gw.setdefault(f["gameweek_id"], f)
 
     history_items = []
     total_points = 0
-    
-    # 3. Process History (Calculate Opponent & Result)
-    for stat in stats_history:
-        total_points += stat.points
-        fixture = await get_fixture_for_history(db, stat.gameweek_id, player.team_id)
-        
+    for stat in rows["stats"]:
+        total_points += stat["points"]
+        fixture = fixture_by_gw.get(stat["gameweek_id"])
+
         opp = "---"
         result = "-"
-        
+
         if fixture:
-            is_home = fixture.home_team_id == player.team_id
-            opponent_team = fixture.away if is_home else fixture.home
-            opp = f"{opponent_team.short_name} ({'H' if is_home else 'A'})"
-            
+            is_home = fixture["is_home"]
+            opp = f"{fixture['opp_short']} ({'H' if is_home else 'A'})"
+
             # Result Logic (W/D/L)
-            if fixture.home_score is not None and fixture.away_score is not None:
-                if (is_home and fixture.home_score > fixture.away_score) or \
-                   (not is_home and fixture.away_score > fixture.home_score):
-                    result = 'W'
-                elif fixture.home_score == fixture.away_score:
-                    result = 'D'
-                else:
-                    result = 'L'
+            own, other = fixture["home_score"], fixture["away_score"]
+            if not is_home:
+                own, other = other, own
+            if own is not None and other is not None:
+                result = 'W' if own > other else 'D' if own == other else 'L'
 
         history_items.append(schemas.PlayerHistoryItem(
-            gw=stat.gameweek.gw_number,
+            gw=stat["gw_number"],
             opp=opp,
             result=result,
-            pts=stat.points,
-            gs=stat.goals_scored,
-            a=stat.assists,
-            cs=1 if stat.clean_sheets else 0,
-            gc=stat.goals_conceded,
-            yc=stat.yellow_cards,
-            rc=stat.red_cards
+            pts=stat["points"],
+            gs=stat["goals_scored"],
+            a=stat["assists"],
+            cs=1 if stat["clean_sheets"] else 0,
+            gc=stat["goals_conceded"],
+            yc=stat["yellow_cards"],
+            rc=stat["red_cards"]
         ))
 
-    # 4. Fetch Upcoming Fixtures
-    current_gw = await get_current_gameweek(db)
-    # Handle edge case where no current GW exists (start of season -> 1)
-    current_gw_num = current_gw.gw_number if current_gw else 1
-    
-    upcoming_db_fixtures = await get_upcoming_fixtures_for_team(db, player.team_id, current_gw_num)
-
-    upcoming_items = [
-        {
-            "gw": f.gameweek.gw_number,
-            "opp_short": f.away.short_name if f.home_team_id == player.team_id else f.home.short_name,
-            "opp_long": f.away.name if f.home_team_id == player.team_id else f.home.name,
-            "is_home": f.home_team_id == player.team_id
-        } for f in upcoming_db_fixtures
+    fixtures = [
+        {"gw": f["gw_number"], "opp_short": f["opp_short"], "opp_long": f["opp_long"], "is_home": f["is_home"]}
+        for f in rows["fixtures"]
     ]
-    
-    return schemas.PlayerDetailResponse(
-        id=player.id,
-        full_name=player.full_name,
-        position=player.position,
-        team_name=player.team.name,
-        price=float(player.price),
-        total_points=total_points,
-        history=history_items,
-        upcoming_fixtures=upcoming_items
-    )
\ No newline at end of file
+    return {"history": history_items, "total_points": total_points, "fixtures": fixtures}
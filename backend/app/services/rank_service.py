@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from prisma import Prisma
+from app.utils.rank_index import RankIndex
+from app.repositories import standings_repo
+from app.repositories.score_repo import ScoreChange, apply_gameweek_summary_changes, refresh_gameweek_summary
+from app.cache import bump, publish_event, on_remote_event, SCORES, LEADERBOARD
+
+logger = logging.getLogger(__name__)
+
+# Process-wide rank indexes. The overall index mirrors the standings table
+# (cumulative net points); each gameweek index holds net points for that GW,
+# over every UserGameweekScore row, the same population the GW rank always used.
+# The standings gameweek index mirrors standings.gameweek_points (the standings'
+# current gameweek, eligible managers only) so its gameweek_rank can move in place.
+_overall = RankIndex()
+_gameweeks: Dict[int, RankIndex] = {}
+_standings_gameweek = RankIndex()
+_standings_gameweek_id: Optional[int] = None
+
+# Index updates are shared with the other workers over the cache channel: point
+# updates carry absolute scores (so a repeated message is harmless), full rebuilds
+# only say what to reload.
+_GAMEWEEK_TOPIC = "ranks:gameweek"
+_STANDINGS_TOPIC = "ranks:standings"
+_pending_reloads: Dict[Any, asyncio.Task] = {}
+
+
+async def rebuild_rank_indexes(db: Prisma) -> None:
+    """Full rebuild from the database. Called once at startup."""
+    await rebuild_standings_indexes(db)
+
+    rows = await db.usergameweekscore.find_many()
+    by_gw: Dict[int, Dict[str, int]] = {}
+    for r in rows:
+        by_gw.setdefault(r.gameweek_id, {})[r.user_id] = (r.total_points or 0) - (r.transfer_hits or 0)
+    _gameweeks.clear()
+    for gw_id, scores in by_gw.items():
+        _gameweeks[gw_id] = RankIndex(scores)
+
+    # Backfill summaries for gameweeks scored before summaries existed
+    summarized = {s.gameweek_id for s in await db.gameweeksummary.find_many()}
+    for gw_id in by_gw.keys() - summarized:
+        await refresh_gameweek_summary(db, gw_id)
+
+    logger.info(f"Rank indexes built: {len(_overall)} managers, {len(_gameweeks)} gameweeks")
+
+
+async def rebuild_standings_indexes(db: Prisma) -> None:
+    """Reloads the overall and standings gameweek indexes from the standings table."""
+    standings = await standings_repo.get_standings(db)
+    _load_standings([
+        {"user_id": s.user_id, "total_points": s.total_points,
+         "gameweek_id": s.gameweek_id, "gameweek_points": s.gameweek_points}
+        for s in standings
+    ])
+
+
+def _load_standings(rows: List[dict]) -> None:
+    global _standings_gameweek_id
+    _overall.rebuild({str(r["user_id"]): int(r["total_points"]) for r in rows})
+    _standings_gameweek.rebuild({str(r["user_id"]): int(r["gameweek_points"] or 0) for r in rows})
+    _standings_gameweek_id = next((r["gameweek_id"] for r in rows if r["gameweek_id"] is not None), None)
+
+
+def _move(index: RankIndex, deltas: Dict[str, int]) -> Dict[str, int]:
+    """
+    Applies score deltas to `index`. Returns {user_id: rank} for the moved members
+    and for every member whose rank changed: only scores between a moved member's
+    old and new score can have been passed, so nobody else is looked at.
+    """
+    moves = {uid: (index.score(uid), index.score(uid) + d) for uid, d in deltas.items() if d and uid in index}
+    affected = set(moves)
+    for old, new in moves.values():
+        affected |= index.members_between(min(old, new), max(old, new))
+    before = {uid: index.rank(uid) for uid in affected}
+    index.update_many({uid: new for uid, (_, new) in moves.items()})
+    after = {uid: index.rank(uid) for uid in affected}
+    return {uid: r for uid, r in after.items() if uid in moves or r != before[uid]}
+
+
+def _enter(index: RankIndex, user_id: str, score: int) -> Dict[str, int]:
+    """Adds a new member. Returns {user_id: rank} for it and for everyone it now ranks above."""
+    lowest = index.lowest()
+    below = index.members_between(lowest, score - 1) if lowest is not None else set()
+    index.update(user_id, score)
+    return {uid: index.rank(uid) for uid in below | {user_id}}
+
+
+async def refresh_standings(db: Prisma) -> int:
+    """Rebuilds the standings table and reloads the overall index from the written rows."""
+    rows = await standings_repo.refresh_standings(db)
+    _load_standings(rows)
+    publish_event(_STANDINGS_TOPIC, {"reload": True})
+    bump(LEADERBOARD)
+    return len(rows)
+
+
+def _publish_standings(user_ids) -> None:
+    """Sends these managers' current totals (and standings gameweek points) to the other workers."""
+    publish_event(_STANDINGS_TOPIC, {
+        "totals": {uid: _overall.score(uid) for uid in user_ids if uid in _overall},
+        "gameweek_id": _standings_gameweek_id,
+        "gameweek_points": {uid: _standings_gameweek.score(uid) for uid in user_ids if uid in _standings_gameweek},
+    })
+
+
+async def apply_standings_changes(db: Prisma, gameweek_id: int, changes: Dict[str, ScoreChange]) -> None:
+    """
+    Incremental counterpart of refresh_standings for provisional rescoring: each
+    rescored manager's standings row moves by the change in their net points, and
+    rank / gameweek_rank are rewritten only on rows whose rank actually moved
+    (computed from the in-memory indexes). Managers not on the leaderboard are
+    skipped, as refresh_standings would.
+    """
+    deltas = {uid: c.net - (c.old_net or 0) for uid, c in changes.items()}
+    deltas = {uid: d for uid, d in deltas.items() if d and uid in _overall}
+    if not deltas:
+        return
+    ranks = _move(_overall, deltas)
+    gw_ranks = _move(_standings_gameweek, deltas) if gameweek_id == _standings_gameweek_id else {}
+    rows = [
+        {"user_id": uid, "delta": deltas.get(uid, 0), "rank": ranks.get(uid), "gameweek_rank": gw_ranks.get(uid)}
+        for uid in ranks.keys() | gw_ranks.keys()
+    ]
+    await standings_repo.apply_standings_deltas(db, gameweek_id, rows)
+    logger.info(f"Standings moved for {len(deltas)} managers, {len(rows)} rows rewritten")
+    _publish_standings(deltas)
+    bump(LEADERBOARD)
+
+
+async def sync_manager_standing(db: Prisma, user_id: str) -> None:
+    """
+    Brings one manager's standings row in line after they save their team: renames
+    it, or adds it when the team is new. An added row only pushes down the managers
+    it ranks above; the rest of the table is untouched.
+    """
+    if not await standings_repo.rename_standing(db, user_id):
+        row = await standings_repo.get_manager_totals(db, user_id)
+        if row is None or user_id in _overall:
+            return
+        ranks = _enter(_overall, user_id, row["total_points"])
+        gw_ranks = {}
+        if row["gameweek_id"] is not None and row["gameweek_id"] == _standings_gameweek_id:
+            gw_ranks = _enter(_standings_gameweek, user_id, row["gameweek_points"])
+        await standings_repo.insert_standing(
+            db, {**row, "rank": ranks[user_id], "gameweek_rank": gw_ranks.get(user_id)}
+        )
+        await standings_repo.apply_standings_deltas(db, _standings_gameweek_id or 0, [
+            {"user_id": uid, "delta": 0, "rank": ranks.get(uid), "gameweek_rank": gw_ranks.get(uid)}
+            for uid in (ranks.keys() | gw_ranks.keys()) - {user_id}
+        ])
+        _publish_standings([user_id])
+    bump(LEADERBOARD)
+
+
+async def record_gameweek_scores(
+    db: Prisma, gameweek_id: int, changes: Dict[str, ScoreChange], full: bool = False
+) -> None:
+    """
+    Call after UserGameweekScore rows are written, with the changes the score_repo
+    writers return. The GW index gets point updates and the summary row is moved by
+    the same deltas; `full` (every manager was just rescored) re-aggregates it instead.
+    """
+    if not changes:
+        return
+    scores = {uid: c.net for uid, c in changes.items()}
+    _gameweeks.setdefault(gameweek_id, RankIndex()).update_many(scores)
+    if full:
+        await refresh_gameweek_summary(db, gameweek_id)
+        publish_event(_GAMEWEEK_TOPIC, {"gameweek_id": gameweek_id, "reload": True})
+    else:
+        await apply_gameweek_summary_changes(db, gameweek_id, changes)
+        publish_event(_GAMEWEEK_TOPIC, {"gameweek_id": gameweek_id, "scores": scores})
+    bump(SCORES)
+
+
+async def _reload_gameweek(db: Prisma, gameweek_id: int) -> None:
+    rows = await db.usergameweekscore.find_many(where={'gameweek_id': gameweek_id})
+    _gameweeks[gameweek_id] = RankIndex({r.user_id: (r.total_points or 0) - (r.transfer_hits or 0) for r in rows})
+
+
+def follow_remote_changes(db: Prisma, delay: float = 1.0) -> None:
+    """
+    Keeps this worker's indexes in step with score / standings writes made by other
+    workers. Point updates arrive with the new scores and are applied in place.
+    A full rescore or standings refresh elsewhere reloads only the index it
+    rebuilt (one gameweek, or the standings), with bursts coalesced into one
+    reload after `delay`.
+    """
+    def reload_later(key: Any, reload) -> None:
+        task = _pending_reloads.get(key)
+        if task and not task.done():
+            return
+
+        async def run():
+            await asyncio.sleep(delay)
+            try:
+                await reload()
+            except Exception:
+                logger.error(f"Rank index reload after remote change failed ({key})", exc_info=True)
+
+        _pending_reloads[key] = asyncio.get_running_loop().create_task(run())
+
+    def on_gameweek(payload: Dict[str, Any]) -> None:
+        gameweek_id = int(payload["gameweek_id"])
+        if payload.get("reload"):
+            reload_later(("gameweek", gameweek_id), lambda: _reload_gameweek(db, gameweek_id))
+        else:
+            _gameweeks.setdefault(gameweek_id, RankIndex()).update_many(payload.get("scores") or {})
+
+    def on_standings(payload: Dict[str, Any]) -> None:
+        if payload.get("reload"):
+            reload_later("standings", lambda: rebuild_standings_indexes(db))
+            return
+        _overall.update_many(payload.get("totals") or {})
+        if payload.get("gameweek_id") == _standings_gameweek_id:
+            _standings_gameweek.update_many(payload.get("gameweek_points") or {})
+
+    on_remote_event(_GAMEWEEK_TOPIC, on_gameweek)
+    on_remote_event(_STANDINGS_TOPIC, on_standings)
+
+
+def overall_rank(user_id: str) -> Optional[int]:
+    return _overall.rank(user_id)
+
+
+def overall_percentile(user_id: str) -> Optional[float]:
+    return _overall.percentile(user_id)
+
+
+def gameweek_rank(gameweek_id: int, user_id: str) -> Optional[int]:
+    index = _gameweeks.get(gameweek_id)
+    return index.rank(user_id) if index else None
+
@@ -0,0 +1,80 @@
+import logging
+from typing import Any, Dict, List, Tuple
+from prisma import Prisma
+from app.cache import cached, versions, RESPONSES, GAMEWEEKS, FIXTURES, CLUBS, STATS
+from app.cache_backends import cacheable
+from app.repositories.gameweek_repo import get_gameweek_by_id, get_all_gameweeks_list
+from app.repositories.fixture_repo import get_fixtures_in_gameweeks
+from app.utils.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+# Rebuilt whenever stats, fixtures, clubs or gameweeks change
+_DEPENDS_ON = (GAMEWEEKS, FIXTURES, CLUBS, STATS)
+
+
+@cacheable
+class RecentForm:
+    """
+    Recent form for one gameweek window (the gameweek plus the two before it),
+    shared by every team view and player card: each club's fixture strip, the
+    current gameweek's fixture string per club and every player's points per
+    gameweek in the window.
+    """
+
+    def __init__(
+        self,
+        strips: Dict[int, List[Tuple[int, int, str, str]]],
+        fixture_strs: Dict[int, str],
+        points: Dict[Tuple[int, int], int],
+    ):
+        self.strips = strips              # club_id -> [(gameweek_id, gw_number, opp short name, "H"/"A")]
+        self.fixture_strs = fixture_strs  # club_id -> "OPP (H) "
+        self.points = points              # (player_id, gameweek_id) -> points
+
+    def fixture_str(self, club_id: int) -> str:
+        return self.fixture_strs.get(club_id, "—")
+
+    def recent_fixtures(self, club_id: int, player_id: int) -> List[Dict[str, Any]]:
+        return [
+            {"gw": gw_num, "opp": opp, "ha": ha, "points": self.points.get((player_id, gw_id), 0)}
+            for gw_id, gw_num, opp, ha in self.strips.get(club_id, [])
+        ]
+
+
+async def get_recent_form(db: Prisma, gameweek_id: int) -> RecentForm:
+    return await cached(
+        RESPONSES,
+        (("recent-form", gameweek_id), versions(*_DEPENDS_ON)),
+        lambda: _build(db, gameweek_id)
+    )
+
+
+@singleflight("recent_form")
+async def _build(db: Prisma, gameweek_id: int) -> RecentForm:
+    cur_gw = await get_gameweek_by_id(db, gameweek_id)
+    if not cur_gw:
+        return RecentForm({}, {}, {})
+
+    gw_rows = [
+        g for g in await get_all_gameweeks_list(db)
+        if max(1, cur_gw.gw_number - 2) <= g.gw_number <= cur_gw.gw_number
+    ]
+    gw_id_to_num: Dict[int, int] = {g.id: g.gw_number for g in gw_rows}
+    recent_gw_ids: List[int] = [g.id for g in gw_rows]
+
+    strips: Dict[int, List[Tuple[int, int, str, str]]] = {}
+    fixture_strs: Dict[int, str] = {}
+    for f in await get_fixtures_in_gameweeks(db, recent_gw_ids):
+        gw_num = gw_id_to_num[f.gameweek_id]
+        strips.setdefault(f.home_team_id, []).append((f.gameweek_id, gw_num, f.away.short_name, "H"))
+        strips.setdefault(f.away_team_id, []).append((f.gameweek_id, gw_num, f.home.short_name, "A"))
+        if f.gameweek_id == gameweek_id:
+            fixture_strs[f.home_team_id] = f"{f.away.short_name} (H) "
+            fixture_strs[f.away_team_id] = f"{f.home.short_name} (A) "
+
+    stats = await db.gameweekplayerstats.find_many(where={"gameweek_id": {"in": recent_gw_ids}})
+    points = {(s.player_id, s.gameweek_id): int(s.points or 0) for s in stats}
+
+    logger.info(f"Recent form built for GW id {gameweek_id}: {len(strips)} clubs, {len(points)} stat rows")
+    return RecentForm(strips, fixture_strs, points)
@@ -0,0 +1,192 @@
+import csv
+import json
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from fastapi import HTTPException
+from prisma import Prisma
+from pydantic import ValidationError
+from app import schemas
+from app.cache import bump, STATS
+from app.utils.points_calculator import calculate_points_vectorized, stats_to_columns
+from app.repositories.player_repo import get_all_players_with_teams
+from app.repositories.gameweek_repo import get_gameweek_by_id
+from app.repositories.fixture_repo import get_fixtures_in_gameweek
+from app.repositories.stats_repo import bulk_upsert_stat_lines, STAT_LINE_FIELDS
+from app.repositories.team_repo import get_squad_owner_ids
+from app.services.stats_service import rescore_live_managers
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 500
+# Only the first errors are kept in the report; all of them are counted
+MAX_REPORTED_ERRORS = 200
+
+
+class PlayerIndex:
+    """
+    In-memory lookup for import rows: by player_id, or by player name plus club
+    (short name or full name), all case-insensitive. Only players whose club has
+    a fixture in the gameweek are accepted.
+    """
+
+    def __init__(self, players: Iterable[Any], playing_club_ids: set):
+        self.by_id = {p.id: p for p in players}
+        self.by_name: Dict[Tuple[str, str], Any] = {}
+        for p in self.by_id.values():
+            name = p.full_name.strip().lower()
+            self.by_name[(name, p.team.short_name.lower())] = p
+            self.by_name[(name, p.team.name.lower())] = p
+        self.playing_club_ids = playing_club_ids
+
+    def resolve(self, row: Dict[str, Any]):
+        raw_id = row.get("player_id")
+        if raw_id not in (None, ""):
+            try:
+                player = self.by_id.get(int(raw_id))
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid player_id {raw_id!r}")
+            if not player:
+                raise ValueError(f"unknown player_id {raw_id}")
+        else:
+            name = str(row.get("player") or row.get("full_name") or "").strip().lower()
+            club = str(row.get("club") or row.get("team") or "").strip().lower()
+            if not name or not club:
+                raise ValueError("row needs player_id, or player and club")
+            player = self.by_name.get((name, club))
+            if not player:
+                raise ValueError(f"unknown player {row.get('player') or row.get('full_name')!r} at club {row.get('club') or row.get('team')!r}")
+        if player.team_id not in self.playing_club_ids:
+            raise ValueError(f"{player.full_name}'s club has no fixture in this gameweek")
+        return player
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith(".csv"):
+        fmt = "csv"
+    elif filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        fmt = "ndjson"
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown import format; use one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def iter_rows(stream: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (line number, row) lazily from a text stream. A row that cannot be
+    parsed is yielded as an Exception so it is reported, not fatal.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells mean "not given" (the stat defaults to 0)
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+        return
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_num, ValueError(f"invalid JSON: {e}")
+            continue
+        yield line_num, row if isinstance(row, dict) else ValueError("each line must be a JSON object")
+
+
+def _validate(index: PlayerIndex, row: Any) -> Tuple[Any, schemas.PlayerStatIn]:
+    if isinstance(row, Exception):
+        raise row
+    player = index.resolve(row)
+    fields = {k: row[k] for k in STAT_LINE_FIELDS if k in row and k != "points"}
+    stat = schemas.PlayerStatIn(player_id=player.id, **fields)
+    negative = [k for k in fields if int(getattr(stat, k)) < 0]
+    if negative:
+        raise ValueError(f"negative value for {', '.join(negative)}")
+    return player, stat
+
+
+async def import_gameweek_stats(
+    db: Prisma,
+    gameweek_id: int,
+    stream: Iterable[str],
+    fmt: str,
+    dry_run: bool = False,
+    provisional: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    Streams stat lines for one gameweek from `stream` (CSV with a header row, or
+    NDJSON), `chunk_size` rows at a time: each chunk is validated against the
+    player/club index, scored in one vectorized pass and written with one bulk
+    upsert. Memory stays bounded by the chunk size whatever the file size. Bad
+    rows are reported with their line number and skipped; the rest still import.
+    """
+    gw = await get_gameweek_by_id(db, gameweek_id)
+    if not gw:
+        raise HTTPException(status_code=404, detail="Gameweek not found")
+
+    fixtures = await get_fixtures_in_gameweek(db, gameweek_id)
+    index = PlayerIndex(
+        await get_all_players_with_teams(db),
+        {c for f in fixtures for c in (f.home_team_id, f.away_team_id)},
+    )
+
+    report: Dict[str, Any] = {
+        "gameweek_id": gameweek_id,
+        "dry_run": dry_run,
+        "rows": 0,
+        "valid": 0,
+        "written": 0,
+        "changed": 0,
+        "error_count": 0,
+        "errors": [],
+        "rescored_managers": 0,
+    }
+    changed_ids: set = set()
+
+    rows = iter_rows(stream, fmt)
+    while chunk := list(islice(rows, chunk_size)):
+        valid: List[Tuple[Any, schemas.PlayerStatIn]] = []
+        for line_num, row in chunk:
+            report["rows"] += 1
+            try:
+                valid.append(_validate(index, row))
+            except (ValueError, ValidationError) as e:
+                report["error_count"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    message = "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                    ) if isinstance(e, ValidationError) else str(e)
+                    report["errors"].append({"line": line_num, "error": message})
+
+        report["valid"] += len(valid)
+        if not valid or dry_run:
+            continue
+
+        points = calculate_points_vectorized(
+            [p.position for p, _ in valid],
+            stats_to_columns([s for _, s in valid])
+        )
+        lines = [
+            {**s.model_dump(include={"player_id", *STAT_LINE_FIELDS}), "points": int(pts)}
+            for (_, s), pts in zip(valid, points.tolist())
+        ]
+        changed = await bulk_upsert_stat_lines(db, gameweek_id, lines)
+        report["written"] += len(lines)
+        changed_ids.update(changed)
+
+    report["changed"] = len(changed_ids)
+    if changed_ids:
+        bump(STATS)
+        if provisional and gw.status == 'LIVE':
+            owner_ids = await get_squad_owner_ids(db, gameweek_id, list(changed_ids))
+            report["rescored_managers"] = len(await rescore_live_managers(db, gameweek_id, owner_ids))
+
+    logger.info(
+        f"Stats import for GW id {gameweek_id}: {report['rows']} rows, {report['valid']} valid, "
+        f"{report['changed']} changed, {report['error_count']} errors{' (dry run)' if dry_run else ''}"
+    )
+    return report
@@ -4,12 +4,37 @@ from collections import Counter
 from fastapi import HTTPException
 from prisma import Prisma
 from app import schemas
-from app.repositories.gameweek_repo import get_current_gameweek
-from app.services.team_service import carry_forward_team
-from app.services.chip_service import is_triple_captain_active , is_bench_boost_active 
+from app.repositories.gameweek_repo import get_current_gameweek, get_gameweek_by_number, get_last_finished_gameweek
+from app.services.team_service import carry_forward_teams
+from app.repositories.squad_repo import get_squad_entries
 from app.utils.stats_utils import calculate_breakdown
-from app.repositories.team_repo import get_team_by_id
+from app.utils.scoring_engine import score_squad, has_participation, player_multiplier
+from app.repositories.team_repo import get_team_by_id, get_squad_owner_ids
 from app.repositories.player_repo import get_players_by_ids
+from app.repositories.score_repo import (
+    ScoreChange,
+    bulk_upsert_gameweek_scores,
+    bulk_increment_gameweek_scores,
+    get_gameweek_summary
+)
+from app.services.rank_service import (
+    refresh_standings,
+    apply_standings_changes,
+    record_gameweek_scores,
+    overall_rank,
+    overall_percentile
+)
+from app.repositories.standings_repo import (
+    get_standings,
+    get_standing,
+    get_standings_after,
+    get_standings_before,
+    get_rank_history
+)
+from app.repositories.stats_repo import get_all_stat_lines_with_position, bulk_update_stat_points
+from app.utils.points_calculator import calculate_points_vectorized, stats_to_columns
+from app.cache import bump, STATS
+from app.utils.singleflight import singleflight
 
 import logging
 
@@ -33,120 +58,84 @@ async def get_dashboard_stats(db: Prisma):
     )
 
 
-async def get_leaderboard(db: Prisma):
-    users = await db.user.find_many(
-        where={'is_active': True, 'role': 'user', 'fantasy_team': {'is_not': None}},
-        include={'fantasy_team': True},
-    )
-    if not users:
-        return []
-
-    scores_data = await db.usergameweekscore.group_by(
-        by=['user_id'],
-        sum={'total_points': True, 'transfer_hits': True},  # prisma-py expects `sum=...`
-    )
+def _leaderboard_row(r) -> Dict[str, Any]:
+    return {
+        "rank": r.rank,
+        "previous_rank": r.previous_rank,
+        "team_name": r.team_name,
+        "manager_email": r.manager_email,
+        "user_id": r.user_id,
+        "total_points": r.total_points,
+    }
 
-    score_map: dict[str, int] = {}
-    for item in scores_data:
-        agg = item.get('_sum') or item.get('sum') or {}     # handle either result shape
-        total = int(agg.get('total_points') or 0)
-        hits  = int(agg.get('transfer_hits') or 0)
-        score_map[str(item['user_id'])] = total - hits
-
-    rows = [{
-        "rank": 0,
-        "team_name": u.fantasy_team.name,
-        "manager_email": u.email,
-        "user_id": str(u.id),
-        "total_points": int(score_map.get(str(u.id), 0)),
-    } for u in users]
-
-    rows.sort(key=lambda r: r['total_points'], reverse=True)
-    for i, r in enumerate(rows, 1):
-        r["rank"] = i
-    return rows
 
+@singleflight()
 async def get_leaderboard(db: Prisma):
-    users = await db.user.find_many(
-        where={'is_active': True, 'role': 'user', 'fantasy_team': {'is_not': None}},
-        include={'fantasy_team': True},
-    )
-    if not users:
-        return []
-
-    # 1. Get Current Overall Scores
-    scores_data = await db.usergameweekscore.group_by(
-        by=['user_id'],
-        sum={'total_points': True, 'transfer_hits': True},
-    )
-
-    score_map: dict[str, int] = {}
-    for item in scores_data:
-        agg = item.get('_sum') or item.get('sum') or {}
-        total = int(agg.get('total_points') or 0)
-        hits  = int(agg.get('transfer_hits') or 0)
-        score_map[str(item['user_id'])] = total - hits
-
-    # 2. Get Previous Overall Scores (Before the latest LIVE/FINISHED Gameweek)
-    current_gw = await db.gameweek.find_first(
-        where={'status': {'in': ['LIVE', 'FINISHED']}},
-        order={'gw_number': 'desc'}
-    )
-
-    prev_score_map: dict[str, int] = {str(u.id): 0 for u in users}
-
-    if current_gw and current_gw.gw_number > 1:
-        # Fetch IDs for all gameweeks prior to the current one
-        prev_gws = await db.gameweek.find_many(where={'gw_number': {'lt': current_gw.gw_number}})
-        prev_gw_ids = [gw.id for gw in prev_gws]
-
-        if prev_gw_ids:
-            prev_scores_data = await db.usergameweekscore.group_by(
-                by=['user_id'],
-                where={'gameweek_id': {'in': prev_gw_ids}},
-                sum={'total_points': True, 'transfer_hits': True},
-            )
-            for item in prev_scores_data:
-                agg = item.get('_sum') or item.get('sum') or {}
-                total = int(agg.get('total_points') or 0)
-                hits  = int(agg.get('transfer_hits') or 0)
-                prev_score_map[str(item['user_id'])] = total - hits
-
-    # 3. Helper to assign ranks accurately (handling ties)
-    def assign_ranks(rows_list):
-        rank_dict = {}
-        current_rank = 1
-        for i, r in enumerate(rows_list):
-            if i > 0 and rows_list[i]['score'] == rows_list[i-1]['score']:
-                rank_dict[r['user_id']] = current_rank
-            else:
-                current_rank = i + 1
-                rank_dict[r['user_id']] = current_rank
-        return rank_dict
-
-    # Calculate Current Ranks
-    current_rows = [{"user_id": str(u.id), "score": score_map.get(str(u.id), 0)} for u in users]
-    current_rows.sort(key=lambda r: r['score'], reverse=True)
-    curr_rank_map = assign_ranks(current_rows)
-
-    # Calculate Previous Ranks
-    prev_rows = [{"user_id": str(u.id), "score": prev_score_map.get(str(u.id), 0)} for u in users]
-    prev_rows.sort(key=lambda r: r['score'], reverse=True)
-    prev_rank_map = assign_ranks(prev_rows)
-
-    # 4. Construct the Final Output
-    final_rows = [{
-        "rank": curr_rank_map[str(u.id)],
-        "previous_rank": prev_rank_map[str(u.id)] if (current_gw and current_gw.gw_number > 1) else None,
-        "team_name": u.fantasy_team.name,
-        "manager_email": u.email,
-        "user_id": str(u.id),
-        "total_points": score_map.get(str(u.id), 0),
-    } for u in users]
-
-    final_rows.sort(key=lambda r: r['rank'])
-    return final_rows
-
+    """
+    Reads the materialized standings table (see standings_repo.refresh_standings),
+    which is rebuilt in bulk whenever a gameweek is scored or finalized.
+    """
+    rows = await get_standings(db)
+    if not rows:
+        # Table never populated (fresh deploy) -> build it once
+        await refresh_standings(db)
+        rows = await get_standings(db)
+
+    return [_leaderboard_row(r) for r in rows]
+
+
+async def get_leaderboard_page(db: Prisma, cursor: Optional[str], limit: int):
+    """Keyset page of the leaderboard. The cursor is the 'rank:user_id' of the last row seen."""
+    after_rank, after_user_id = None, None
+    if cursor:
+        try:
+            rank_str, after_user_id = cursor.split(":", 1)
+            after_rank = int(rank_str)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid leaderboard cursor.")
+
+    # Fetch one extra row to know whether another page exists
+    rows = await get_standings_after(db, after_rank, after_user_id, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = f"{rows[-1].rank}:{rows[-1].user_id}" if has_more else None
+    return {"items": [_leaderboard_row(r) for r in rows], "next_cursor": next_cursor}
+
+
+async def get_leaderboard_around(db: Prisma, user_id: str, window: int):
+    """The user's row plus up to `window` rows above and below it."""
+    me = await get_standing(db, user_id)
+    if not me:
+        raise HTTPException(status_code=404, detail="User is not on the leaderboard.")
+    above = await get_standings_before(db, me.rank, me.user_id, window)
+    below = await get_standings_after(db, me.rank, me.user_id, window)
+    return [_leaderboard_row(r) for r in [*above, me, *below]]
+
+
+async def get_leaderboard_rank(db: Prisma, user_id: str):
+    me = await get_standing(db, user_id)
+    if not me:
+        raise HTTPException(status_code=404, detail="User is not on the leaderboard.")
+    return _leaderboard_row(me)
+
+
+async def get_user_rank_history(db: Prisma, user_id: str):
+    """Season rank chart data, read straight from the per-gameweek snapshots."""
+    if not await db.user.find_unique(where={'id': user_id}):
+        raise HTTPException(status_code=404, detail="User not found")
+    rows = await get_rank_history(db, user_id)
+    rows.sort(key=lambda r: r.gameweek.gw_number)
+    return [
+        {
+            "gameweek_id": r.gameweek_id,
+            "gw_number": r.gameweek.gw_number,
+            "overall_rank": r.overall_rank,
+            "gameweek_rank": r.gameweek_rank,
+            "total_points": r.total_points,
+            "gameweek_points": r.gameweek_points,
+        }
+        for r in rows
+    ]
 
 
 async def get_transfer_stats(db: Prisma, gameweek_id: int):
@@ -164,11 +153,7 @@ async def get_transfer_stats(db: Prisma, gameweek_id: int):
 
     # 3) Fetch player + team details for all involved player_ids
     player_ids = list({pid for pid, _ in top_in} | {pid for pid, _ in top_out})
-    players = await db.player.find_many(
-        where={'id': {'in': player_ids}},
-        include={'team': True}
-    )
-    pmap: Dict[int, any] = {p.id: p for p in players}
+    pmap: Dict[int, any] = {p.id: p for p in await get_players_by_ids(db, player_ids)}
 
     def to_rows(pairs: List[tuple[int, int]]):
         rows = []
@@ -196,111 +181,67 @@ async def get_transfer_stats(db: Prisma, gameweek_id: int):
     }
 
 
-# Ensure you have imported these in stats_service.py:
-# from app.services.chip_service import is_triple_captain_active, is_bench_boost_active
+async def compute_scores_for_gw(db: Prisma, gameweek_id: int, user_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Set-based scoring engine. Loads the gameweek's stats, squads and chips once,
+    scores every manager in memory and writes all UserGameweekScore rows in one
+    bulk upsert. Defaults to every active user with a fantasy team.
+    Returns {user_id: net points (gross - transfer hits)}.
+    """
+    changes = await _score_managers(db, gameweek_id, user_ids)
+    return {uid: c.net for uid, c in changes.items()}
 
-async def compute_user_score_for_gw(db: Prisma, user_id: str, gameweek_id: int) -> int:
-    await carry_forward_team(db, user_id, gameweek_id)
-    # Fetch team for the GW
-    entries = await db.userteam.find_many(
-        where={'user_id': user_id, 'gameweek_id': gameweek_id}
-    )
 
-    # If no entries, store 0 and return 0 minus any hits (usually 0)
-    if not entries:
-        gross = 0
-        await db.usergameweekscore.upsert(
-            where={'user_id_gameweek_id': {'user_id': user_id, 'gameweek_id': gameweek_id}},
-            data={
-                'create': {'user_id': user_id, 'gameweek_id': gameweek_id, 'total_points': gross},
-                'update': {'total_points': gross},
-            },
-        )
-        ugws = await db.usergameweekscore.find_unique(
-            where={'user_id_gameweek_id': {'user_id': user_id, 'gameweek_id': gameweek_id}}
-        )
-        hits = getattr(ugws, 'transfer_hits', 0) if ugws else 0
-        return gross - hits
+async def rescore_live_managers(db: Prisma, gameweek_id: int, user_ids: List[str]) -> Dict[str, int]:
+    """
+    Provisional rescore while a gameweek is LIVE: scores these managers like
+    compute_scores_for_gw, then moves only their standings rows by the change
+    instead of rebuilding the table (finalize / explicit rescores still do).
+    Returns {user_id: net points}.
+    """
+    changes = await _score_managers(db, gameweek_id, user_ids)
+    await apply_standings_changes(db, gameweek_id, changes)
+    return {uid: c.net for uid, c in changes.items()}
+
+
+async def _score_managers(db: Prisma, gameweek_id: int, user_ids: Optional[List[str]]) -> Dict[str, ScoreChange]:
+    rescore_all = user_ids is None
+    if rescore_all:
+        users = await db.user.find_many(where={'is_active': True, 'fantasy_team': {'is_not': None}})
+        user_ids = [str(u.id) for u in users]
+    if not user_ids:
+        return {}
+
+    await carry_forward_teams(db, gameweek_id, user_ids)
 
-    # Build points map for the GW
     stats = await db.gameweekplayerstats.find_many(where={'gameweek_id': gameweek_id})
-    pts = {s.player_id: s.points for s in stats}  # missing => 0
-
-    def has_participation(player_id: int) -> bool:
-        s = next((item for item in stats if item.player_id == player_id), None)
-        if not s: return False
-        # If they have points, they played. 
-        if s.points != 0: return True
-        # If points are 0, check for any non-zero stat (Yellow cards, etc.)
-        return any([
-            s.goals_scored > 0, 
-            s.assists > 0, 
-            s.yellow_cards > 0, 
-            s.red_cards > 0, 
-            s.bonus_points > 0, 
-            s.clean_sheets,
-            s.goals_conceded > 0, 
-            s.own_goals > 0, 
-            s.penalties_missed > 0,
-            s.penalties_saved > 0
-        ])
-
-    # --- 1. CHECK CHIPS FIRST ---
-    # We need to know this BEFORE calculating the base points
-    triple = await is_triple_captain_active(db, user_id, gameweek_id)
-    bench_boost = await is_bench_boost_active(db, user_id, gameweek_id)
-
-    # --- 2. DEFINE SCORING PLAYERS ---
-    # If Bench Boost is active, ALL players count.
-    # Otherwise, only non-benched players count.
-    if bench_boost:
-        scoring_pool = entries
-    else:
-        scoring_pool = [e for e in entries if not e.is_benched]
-
-    # --- 3. CALCULATE BASE POINTS ---
-    # Sum points for everyone in the valid scoring pool (1x multiplier)
-    base = sum(pts.get(e.player_id, 0) for e in scoring_pool)
-
-    # --- 4. HANDLE CAPTAINCY ---
-    # Get starters specifically to find C/VC (Captain is always a starter in valid teams)
-    # However, searching 'entries' is safe because C/VC are flags on the row.
-    cap = next((e for e in entries if e.is_captain), None)
-    vice = next((e for e in entries if e.is_vice_captain), None)
-
-    # Choose multiplier target: captain if played else vice if played
-    bonus_target = None
-    if cap and has_participation(cap.player_id):
-        bonus_target = cap.player_id
-    elif vice and has_participation(vice.player_id):
-        bonus_target = vice.player_id
-
-    # Add the Bonus Points
-    # Base already includes 1x points for the captain.
-    # Standard Captain = 2x total (Add 1x)
-    # Triple Captain = 3x total (Add 2x)
-    if bonus_target is not None:
-        bonus_points = pts.get(bonus_target, 0)
-        if triple:
-            gross = base + (2 * bonus_points)
-        else:
-            gross = base + bonus_points
-    else:
-        gross = base
-
-    # Persist gross points
-    ugws = await db.usergameweekscore.upsert(
-        where={'user_id_gameweek_id': {'user_id': user_id, 'gameweek_id': gameweek_id}},
-        data={
-            'create': {'user_id': user_id, 'gameweek_id': gameweek_id, 'total_points': gross},
-            'update': {'total_points': gross},
-        },
+    entries = await db.userteam.find_many(
+        where={'gameweek_id': gameweek_id, 'user_id': {'in': user_ids}}
+    )
+    chips = await db.userchip.find_many(
+        where={'gameweek_id': gameweek_id, 'user_id': {'in': user_ids}}
     )
 
-    # Subtract transfer hits
-    hits = getattr(ugws, 'transfer_hits', 0) if ugws else 0
-    net = gross - hits
-    return net
+    stats_map = {s.player_id: s for s in stats}
+    chip_map = {c.user_id: c.chip for c in chips}
+    squads: Dict[str, list] = {uid: [] for uid in user_ids}
+    for e in entries:
+        squads[e.user_id].append(e)
+
+    # Users without a squad still get a 0 row, exactly like the per-user path
+    gross = {uid: score_squad(squad, stats_map, chip_map.get(uid)) for uid, squad in squads.items()}
+    changes = await bulk_upsert_gameweek_scores(db, gameweek_id, gross)
+    # Rescoring every manager (calculate-points, finalize, season rescore) re-aggregates the summary
+    await record_gameweek_scores(db, gameweek_id, changes, full=rescore_all)
+
+    logger.info(f"Scored {len(gross)} managers for GW {gameweek_id}")
+    return changes
+
+
+async def compute_user_score_for_gw(db: Prisma, user_id: str, gameweek_id: int) -> int:
+    """Single-user entry point; a thin wrapper over compute_scores_for_gw."""
+    scores = await compute_scores_for_gw(db, gameweek_id, [user_id])
+    return scores.get(user_id, 0)
 
 async def get_manager_hub_stats(db: Prisma, user_id: str, gameweek_id: int):
     """
@@ -335,11 +276,10 @@ async def get_manager_hub_stats(db: Prisma, user_id: str, gameweek_id: int):
     gameweek_points = gameweek_score.total_points if gameweek_score else 0
 
     total_players = await db.user.count(where={'is_active': True, 'role': 'user'})
+    rank = overall_rank(user_id)
+    percentile = overall_percentile(user_id)
 
-    user_squad_entries = await db.userteam.find_many(
-        where={'user_id': user_id, 'gameweek_id': gameweek_id},
-        include={'player': True} 
-    )
+    user_squad_entries = await get_squad_entries(db, user_id, gameweek_id, include={'player': True})
     squad_value = sum(p.player.price for p in user_squad_entries) if user_squad_entries else 0.0
     in_the_bank = 100.0 - float(squad_value)
 
@@ -367,6 +307,8 @@ async def get_manager_hub_stats(db: Prisma, user_id: str, gameweek_id: int):
         "in_the_bank": in_the_bank,
         "gameweek_transfers": gameweek_transfers_count,
         "total_transfers": total_transfers_count,
+        "overall_rank": rank,
+        "percentile": percentile,
     }
 
 async def get_team_of_the_week(db: Prisma, gameweek_number: Optional[int] = None):
@@ -375,7 +317,7 @@ async def get_team_of_the_week(db: Prisma, gameweek_number: Optional[int] = None
     """
     target_gw = None
     if gameweek_number:
-        target_gw = await db.gameweek.find_unique(where={'gw_number': gameweek_number})
+        target_gw = await get_gameweek_by_number(db, gameweek_number)
     else:
         # 1. CHANGE: Logic for finding the gameweek was updated.
         # ---------------------------------------------------------------------
@@ -383,10 +325,7 @@ async def get_team_of_the_week(db: Prisma, gameweek_number: Optional[int] = None
         # this now finds the latest gameweek that has an official 'FINISHED' status.
         # This is more reliable because it ensures the Team of the Week is only
         # shown after you, the admin, have finalized all scores and bonus points.
-        target_gw = await db.gameweek.find_first(
-            where={'status': 'FINISHED'},
-            order={'gw_number': 'desc'}
-        )
+        target_gw = await get_last_finished_gameweek(db)
 
     if not target_gw:
         return None
@@ -410,8 +349,8 @@ async def get_team_of_the_week(db: Prisma, gameweek_number: Optional[int] = None
     team_name = manager.fantasy_team.name if manager and manager.fantasy_team else "Team of the Week"
 
     # Fetch the full team roster
-    user_team_entries = await db.userteam.find_many(
-        where={'user_id': top_user_id, 'gameweek_id': target_gw.id},
+    user_team_entries = await get_squad_entries(
+        db, top_user_id, target_gw.id,
         include={'player': {'include': {'team': True}}}
     )
     
@@ -466,30 +405,22 @@ async def get_team_of_the_week(db: Prisma, gameweek_number: Optional[int] = None
 async def get_gameweek_stats_for_user(db: Prisma, user_id: str, gameweek_id: int):
     """
     Calculates the user's points, the average points, and the highest points
-    for a specific gameweek.
+    for a specific gameweek. Average / highest come from the GameweekSummary row.
     """
-    # 1. Get all scores for the specified gameweek
-    all_scores = await db.usergameweekscore.find_many(
-        where={'gameweek_id': gameweek_id}
-    )
-
-    if not all_scores:
+    summary = await get_gameweek_summary(db, gameweek_id)
+    if not summary or not summary.manager_count:
         # If no scores are in yet, return all zeros
         return {"user_points": 0, "average_points": 0, "highest_points": 0}
 
-    # 2. Find the current user's score
-    user_score_entry = next((s for s in all_scores if s.user_id == user_id), None)
+    user_score_entry = await db.usergameweekscore.find_unique(
+        where={'user_id_gameweek_id': {'user_id': user_id, 'gameweek_id': gameweek_id}}
+    )
     user_points = user_score_entry.total_points if user_score_entry else 0
-    
-    # 3. Calculate average and highest scores
-    total_points_sum = sum(s.total_points for s in all_scores)
-    average_points = round(total_points_sum / len(all_scores))
-    highest_points = max(s.total_points for s in all_scores)
 
     return {
         "user_points": user_points,
-        "average_points": average_points,
-        "highest_points": highest_points,
+        "average_points": round(summary.average_gross),
+        "highest_points": summary.highest_gross,
     }
 
 async def calculate_dream_team(db: Prisma, gameweek_id: int):
@@ -623,6 +554,7 @@ async def calculate_dream_team(db: Prisma, gameweek_id: int):
         "bench": formatted_bench
     }
 
+@singleflight()
 async def calculate_team_of_the_season(db: Prisma):
     """
     Calculates the Team of the Season based on total points accumulated
@@ -727,7 +659,67 @@ async def calculate_team_of_the_season(db: Prisma):
     }
 
 
-async def update_historical_stats(db: Prisma, data: schemas.UpdatePlayerStatsRequest):
+async def _apply_player_delta(
+    db: Prisma, gameweek_id: int, entries: List[Any], old_stats: Any, new_stats: Any
+) -> Dict[str, ScoreChange]:
+    """
+    Incremental rescoring after one player's stats change. The point delta is computed
+    once and added to every owner's UserGameweekScore with that owner's multiplier in
+    a single UPDATE. Owners fall back to a full recompute only when the captaincy
+    bonus could move (participation changed for their captain / vice-captain) or
+    when they have no score row yet. Returns the score change of every rewritten row.
+    """
+    if not entries:
+        return {}
+
+    old_points = old_stats.points if old_stats else 0
+    delta = new_stats.points - old_points
+    old_played = has_participation(old_stats)
+    played = has_participation(new_stats)
+    if delta == 0 and old_played == played:
+        return {}
+
+    user_ids = [e.user_id for e in entries]
+    chips = await db.userchip.find_many(where={'gameweek_id': gameweek_id, 'user_id': {'in': user_ids}})
+    chip_map = {c.user_id: c.chip for c in chips}
+    scored = await db.usergameweekscore.find_many(where={'gameweek_id': gameweek_id, 'user_id': {'in': user_ids}})
+    has_row = {s.user_id for s in scored}
+
+    full_ids: List[str] = []
+    delta_entries = []
+    for e in entries:
+        if e.user_id not in has_row or (old_played != played and (e.is_captain or e.is_vice_captain)):
+            full_ids.append(e.user_id)
+        else:
+            delta_entries.append(e)
+
+    # The vice-captain's bonus depends on whether the captain played
+    vice_users = [e.user_id for e in delta_entries if e.is_vice_captain and not e.is_captain]
+    captain_played: Dict[str, bool] = {}
+    if vice_users:
+        captains = await db.userteam.find_many(
+            where={'gameweek_id': gameweek_id, 'user_id': {'in': vice_users}, 'is_captain': True}
+        )
+        cap_stats = await db.gameweekplayerstats.find_many(
+            where={'gameweek_id': gameweek_id, 'player_id': {'in': list({c.player_id for c in captains})}}
+        )
+        cap_stats_map = {s.player_id: s for s in cap_stats}
+        captain_played = {c.user_id: has_participation(cap_stats_map.get(c.player_id)) for c in captains}
+
+    deltas = {
+        e.user_id: delta * player_multiplier(e, chip_map.get(e.user_id), played, captain_played.get(e.user_id, False))
+        for e in delta_entries
+    }
+    changes = await bulk_increment_gameweek_scores(db, gameweek_id, deltas)
+    await record_gameweek_scores(db, gameweek_id, changes)
+    if full_ids:
+        changes.update(await _score_managers(db, gameweek_id, full_ids))
+
+    logger.info(f"Stat edit rippled to {len(deltas)} managers by delta, {len(full_ids)} by full recompute")
+    return changes
+
+
+async def update_historical_stats(db: Prisma, data: schemas.UpdatePlayerStatsRequest, incremental: bool = True):
     # Import the calculator utility
     from app.utils.points_calculator import calculate_player_points
     
@@ -780,7 +772,7 @@ async def update_historical_stats(db: Prisma, data: schemas.UpdatePlayerStatsReq
     db_update_data["points"] = new_total_points
 
     # 4. Perform the Update
-    await db.gameweekplayerstats.update(
+    updated_stats = await db.gameweekplayerstats.update(
         where={
             'gameweek_id_player_id': {
                 'player_id': player_id,
@@ -790,18 +782,55 @@ async def update_historical_stats(db: Prisma, data: schemas.UpdatePlayerStatsReq
         data=db_update_data
     )
 
-    # 5. Trigger the ripple effect for affected users
-    # 5. Find ALL users who have this player in their team (Starters OR Bench)
-    affected_users = await db.userteam.find_many(
-        where={'player_id': player_id, 'gameweek_id': gameweek_id},
-        distinct=['user_id']
+    # 5. Trigger the ripple effect for affected users (Starters OR Bench)
+    # Owners are found through their virtual squads; rescoring stores those squads
+    affected_ids = await get_squad_owner_ids(db, gameweek_id, [player_id])
+    await carry_forward_teams(db, gameweek_id, affected_ids)
+    affected_entries = await db.userteam.find_many(
+        where={'player_id': player_id, 'gameweek_id': gameweek_id, 'user_id': {'in': affected_ids}}
     )
 
-    # 6. Force Recalculation for every affected user
-    # This updates the UserGameweekScore table (Fixes the Total Points Box)
-    for record in affected_users:
-        await compute_user_score_for_gw(db, record.user_id, gameweek_id)
-    
-    # --- CRITICAL FIX ENDS HERE ---
-    
-    return {"message": f"Successfully updated stats for {player.full_name}. New GW points: {new_total_points}"}
\ No newline at end of file
+    bump(STATS)
+    if not incremental:
+        await compute_scores_for_gw(db, gameweek_id, affected_ids)
+        await refresh_standings(db)
+    else:
+        changes = await _apply_player_delta(
+            db, gameweek_id, affected_entries,
+            old_stats=current_stats, new_stats=updated_stats
+        )
+        # Only the owners' standings rows move (see rank_service.apply_standings_changes)
+        await apply_standings_changes(db, gameweek_id, changes)
+
+    return {"message": f"Successfully updated stats for {player.full_name}. New GW points: {new_total_points}"}
+
+
+async def rescore_season_stats(db: Prisma):
+    """
+    Re-applies the current scoring rules to every stat line of the season in one
+    vectorized pass, writes back only the rows whose points changed, then rescores
+    managers for every gameweek that was touched.
+    """
+    lines = await get_all_stat_lines_with_position(db)
+    if not lines:
+        return {"updated_rows": 0, "gameweeks_rescored": []}
+
+    points = calculate_points_vectorized([l["position"] for l in lines], stats_to_columns(lines))
+
+    changed: Dict[int, int] = {}
+    touched_gws = set()
+    for line, new_points in zip(lines, points.tolist()):
+        if int(line["points"] or 0) != new_points:
+            changed[line["id"]] = new_points
+            touched_gws.add(line["gameweek_id"])
+
+    await bulk_update_stat_points(db, changed)
+    if changed:
+        bump(STATS)
+    for gw_id in sorted(touched_gws):
+        await compute_scores_for_gw(db, gw_id)
+    if touched_gws:
+        await refresh_standings(db)
+
+    logger.info(f"Season rescore: {len(changed)} stat rows changed across {len(touched_gws)} gameweeks")
+    return {"updated_rows": len(changed), "gameweeks_rescored": sorted(touched_gws)}
@@ -0,0 +1,46 @@
+from prisma import Prisma
+from app.repositories.sync_repo import (
+    get_sync_horizon,
+    get_players_changed_since,
+    get_fixtures_changed_since,
+    get_gameweeks_changed_since,
+    get_tombstones_since,
+    get_player_total_points_for
+)
+
+
+def _envelope(horizon: int, key: str, rows: list, tombstones: list) -> dict:
+    """
+    `version` is the transaction horizon read before the rows; clients store it and
+    pass it back as ?since= on the next poll. A write whose transaction was still in
+    flight here has an id at or above it, so it is picked up by that next poll even
+    if it took a lower change_version than rows returned now. Rows from transactions
+    that finished after the horizon was read can be returned twice; clients upsert.
+    """
+    return {
+        "version": horizon,
+        key: rows,
+        "deleted": [t.entity_id for t in tombstones],
+    }
+
+
+async def get_player_changes(db: Prisma, since: int):
+    """Players (with season points) changed after `since`; since=0 is a full sync."""
+    horizon = await get_sync_horizon(db)
+    players = await get_players_changed_since(db, since)
+    points = await get_player_total_points_for(db, [p.id for p in players])
+    out = _envelope(horizon, "players", players, await get_tombstones_since(db, "players", since))
+    out["players"] = [{**p.model_dump(), "total_points": points.get(p.id, 0)} for p in players]
+    return out
+
+
+async def get_fixture_changes(db: Prisma, since: int):
+    horizon = await get_sync_horizon(db)
+    fixtures = await get_fixtures_changed_since(db, since)
+    return _envelope(horizon, "fixtures", fixtures, await get_tombstones_since(db, "fixtures", since))
+
+
+async def get_gameweek_changes(db: Prisma, since: int):
+    horizon = await get_sync_horizon(db)
+    gameweeks = await get_gameweeks_changed_since(db, since)
+    return _envelope(horizon, "gameweeks", gameweeks, await get_tombstones_since(db, "gameweeks", since))
@@ -6,7 +6,17 @@ from prisma import Prisma
 from app import schemas
 from collections import Counter
 import uuid
+import json
+from types import SimpleNamespace
 from app.utils.stats_utils import calculate_breakdown
+from app.repositories.standings_repo import get_standing
+from app.repositories.gameweek_repo import get_gameweek_by_id, get_gameweek_by_number
+from app.repositories.score_repo import get_gameweek_summary
+from app.repositories.team_view_repo import get_team_view_rows
+from app.repositories.squad_repo import get_squad_entry
+from app.services.recent_form_service import get_recent_form
+from app.services.rank_service import sync_manager_standing, overall_rank, gameweek_rank
+from app.utils.rank_index import rank_from_histogram
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +101,8 @@ async def save_user_team(db: Prisma, user_id: str, gameweek_id: int, team_name:
             if starters: starters[0]['is_vice_captain'] = True
 
         await db.userteam.create_many(data=team_to_create)
+        # New or renamed fantasy team -> keep this manager's leaderboard row in step
+        await sync_manager_standing(db, user_id)
         logger.info("Team saved successfully")
 
     except HTTPException:
@@ -100,246 +112,117 @@ async def save_user_team(db: Prisma, user_id: str, gameweek_id: int, team_name:
         raise e
 
 async def carry_forward_team(db: Prisma, user_id: str, new_gameweek_id: int):
-    try:
-        # 1. Check if the user already has a team for this GW
-        existing = await db.userteam.find_first(
-            where={'user_id': user_id, 'gameweek_id': new_gameweek_id}
-        )
-        if existing:
-            return  # Already exists, no need to copy
-
-        # 2. Find the latest gameweek before this one
-        prev_entry = await db.userteam.find_first(
-            where={'user_id': user_id, 'gameweek_id': {'lt': new_gameweek_id}},
-            order={'gameweek_id': 'desc'}
-        )
-        if not prev_entry:
-            return  # User has no previous team (maybe new user)
-
-        prev_gw_id = prev_entry.gameweek_id
-        prev_team: List = await db.userteam.find_many(
-            where={'user_id': user_id, 'gameweek_id': prev_gw_id}
+    """
+    Materializes the user's squad for `new_gameweek_id` (a copy of their latest
+    earlier squad) if it is not stored yet. Reads resolve squads virtually (see
+    squad_repo); call this only before writing to the gameweek's squad.
+    """
+    await carry_forward_teams(db, new_gameweek_id, [user_id])
+
+async def carry_forward_teams(db: Prisma, gameweek_id: int, user_ids: List[str]) -> int:
+    """
+    Set-based carry_forward_team: in one statement, copies each user's latest earlier
+    squad into `gameweek_id` for every user in `user_ids` who has no squad there yet.
+    Scoring calls this so scored gameweeks always have their squads stored.
+    """
+    if not user_ids:
+        return 0
+    copied = await db.execute_raw(
+        """
+        INSERT INTO "user_teams" ("user_id", "gameweek_id", "player_id", "is_captain", "is_vice_captain", "is_benched")
+        SELECT ut."user_id", $1::int, ut."player_id", ut."is_captain", ut."is_vice_captain", ut."is_benched"
+        FROM "user_teams" ut
+        JOIN (
+            SELECT "user_id", MAX("gameweek_id") AS src_gw
+            FROM "user_teams"
+            WHERE "gameweek_id" < $1::int
+              AND "user_id" IN (SELECT json_array_elements_text($2::json))
+            GROUP BY "user_id"
+        ) latest ON latest."user_id" = ut."user_id" AND latest.src_gw = ut."gameweek_id"
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "user_teams" cur
+            WHERE cur."user_id" = ut."user_id" AND cur."gameweek_id" = $1::int
         )
-
-        if not prev_team:
-            return
-
-        # 3. Copy forward into new gameweek
-        team_to_create = [
-            {
-                'user_id': user_id,
-                'gameweek_id': new_gameweek_id,
-                'player_id': entry.player_id,
-                'is_captain': entry.is_captain,
-                'is_vice_captain': entry.is_vice_captain,
-                'is_benched': entry.is_benched,
-            }
-            for entry in prev_team
-        ]
-        cap_count = sum(1 for e in prev_team if e.is_captain)
-        vice_count = sum(1 for e in prev_team if e.is_vice_captain)
-        if cap_count != 1 or vice_count != 1:
-            starters = [e for e in prev_team if not e.is_benched]
-            if starters:
-                for e in prev_team:
-                    e.is_captain = False
-                    e.is_vice_captain = False
-                starters[0].is_captain = True
-                if len(starters) > 1:
-                    starters[1].is_vice_captain = True
-        await db.userteam.create_many(data=team_to_create)
-        logger.info(f"Carried forward team for user {user_id} to GW {new_gameweek_id}")
-
-    except Exception as e:
-        logger.error(f"Error carrying forward team for user {user_id}", exc_info=True)
-        raise e
+        ON CONFLICT DO NOTHING
+        """,
+        gameweek_id,
+        json.dumps(user_ids),
+    )
+    if copied:
+        logger.info(f"Carried forward {copied} squad rows to GW {gameweek_id}")
+    return copied
 
 async def get_user_team_full(db: Prisma, user_id: str, gameweek_id: int):
+    """
+    The team page payload, in one statement for team, squad, stats and chip (see
+    team_view_repo). The squad is resolved virtually, so reading never writes.
+    Fixture strings and recent form come from the shared recent-form cache.
+    """
     logger.info(f"Fetching team for user_id={user_id}, gameweek_id={gameweek_id}")
 
-    # 0) Ensure team exists and auto-carry forward
-    await carry_forward_team(db, user_id, gameweek_id)
-    fantasy_team = await db.fantasyteam.find_unique(where={'user_id': user_id})
-    if not fantasy_team:
+    if not await get_gameweek_by_id(db, gameweek_id):
+        raise HTTPException(status_code=404, detail="Gameweek not found")
+
+    # 1) Load the whole view (squad = latest stored one at or before this gameweek)
+    rows = await get_team_view_rows(db, user_id, gameweek_id)
+    if not rows:
         logger.warning(f"No fantasy team found for user {user_id}")
         return {"team_name": "", "starting": [], "bench": []}
 
-    # 1) Load current user team entries + player + club
-    entries = await db.userteam.find_many(
-    where={'user_id': user_id, 'gameweek_id': gameweek_id},
-    include={'player': {'include': {'team': True}}},
-    # Sort by is_benched (starters first) then by priority
-    order=[
-        {'is_benched': 'asc'}, 
-        {'bench_priority': 'asc'}, 
-        {'player_id': 'asc'}
-    ] 
-)
+    team_name = rows[0]["team_name"]
+    active_chip = rows[0]["active_chip"]
+    entries = [r for r in rows if r["player_id"] is not None]
     logger.info(f"User team entries fetched: {len(entries)}")
     if not entries:
-        # FIX 2: Add active_chip here (This is where your specific error triggered)
         return {
-            "team_name": fantasy_team.name, 
-            "starting": [], 
-            "bench": [], 
-            "active_chip": None
+            "team_name": team_name,
+            "starting": [],
+            "bench": [],
+            "active_chip": active_chip
         }
 
-    player_ids: List[int] = [e.player_id for e in entries]
-    team_ids: List[int] = list({e.player.team_id for e in entries})
-
-    # 2) Points and raw stats for current GW
-    stats = await db.gameweekplayerstats.find_many(
-        where={'gameweek_id': gameweek_id, 'player_id': {'in': player_ids}}
-    )
-    logger.info(f"Stats fetched for {len(stats)} players")
-    pts_map: Dict[int, int] = {s.player_id: s.points for s in stats}
-    stats_map: Dict[int, Any] = {s.player_id: s for s in stats}
-
-    # 3) Get current gameweek object (needed for 'recent fixtures' logic)
-    cur_gw = await db.gameweek.find_unique(where={'id': gameweek_id})
-    if not cur_gw:
-        raise HTTPException(status_code=404, detail="Gameweek not found")
-
-    # 4) Build fixture_str for CURRENT GW
-    fixture_map_current: Dict[int, str] = {}
-    fixtures_current = await db.fixture.find_many(
-        where={
-            'gameweek_id': gameweek_id,
-            'OR': [
-                {'home_team_id': {'in': team_ids}},
-                {'away_team_id': {'in': team_ids}},
-            ]
-        },
-        include={'home': True, 'away': True}
-    )
-
-    def fmt_fixture(opp_short: str, venue: str) -> str:
-        return f"{opp_short} ({venue}) "
-
-    for f in fixtures_current:
-        if f.home_team_id in team_ids:
-            fixture_map_current[f.home_team_id] = fmt_fixture(f.away.short_name, 'H')
-        if f.away_team_id in team_ids:
-            fixture_map_current[f.away_team_id] = fmt_fixture(f.home.short_name, 'A')
-
-    # 5) Recent fixtures (last two + current) with points per player
-    gw_rows = await db.gameweek.find_many(
-        where={"gw_number": {"gte": max(1, cur_gw.gw_number - 2), "lte": cur_gw.gw_number}},
-        order={"gw_number": "asc"}
-    )
-    gw_id_to_num: Dict[int, int] = {g.id: g.gw_number for g in gw_rows}
-    recent_gw_ids: List[int] = [g.id for g in gw_rows]
-
-    fixtures_recent = await db.fixture.find_many(
-        where={
-            "gameweek_id": {"in": recent_gw_ids},
-            "OR": [
-                {"home_team_id": {"in": team_ids}},
-                {"away_team_id": {"in": team_ids}},
-            ],
-        },
-        include={"home": True, "away": True},
-        order={"kickoff": "asc"}
-    )
-
-    fixtures_by_team: Dict[int, List[Any]] = {}
-    for f in fixtures_recent:
-        fixtures_by_team.setdefault(f.home_team_id, []).append(f)
-        fixtures_by_team.setdefault(f.away_team_id, []).append(f)
+    # 2) Fixture strings and last two + current fixtures with points (shared cache)
+    form = await get_recent_form(db, gameweek_id)
 
-    recent_stats = await db.gameweekplayerstats.find_many(
-        where={"player_id": {"in": player_ids}, "gameweek_id": {"in": recent_gw_ids}}
-    )
-    pts_by_player_gw: Dict[tuple[int, int], int] = {
-        (s.player_id, s.gameweek_id): int(s.points or 0) for s in recent_stats
-    }
-
-    # def _breakdown_for(position: str, st: Any) -> tuple[dict, list[dict]]:
-    #     raw = {
-    #         "played": bool(st.played or False),
-    #         "goals_scored": int(st.goals_scored or 0),
-    #         "assists": int(st.assists or 0),
-    #         "yellow_cards": int(st.yellow_cards or 0),
-    #         "red_cards": int(st.red_cards or 0),
-    #         "bonus_points": int(st.bonus_points or 0),
-    #         "clean_sheets": int(st.clean_sheets or 0),
-    #     }
-    #     pos = (position or "").upper()
-    #     goal_pts = 10 if pos == "GK" else 6 if pos == "DEF" else 5 if pos == "MID" else 4
-    #     if pos in ["GK", "DEF"]:
-    #         cs_pts = 4 
-    #     elif pos == "MID":
-    #         cs_pts = 1
-    #     else:
-    #         cs_pts = 0
-    #     breakdown = [
-    #         {"label": "Appearance",   "value": 1 if raw["played"] else 0, "points": 1 if raw["played"] else 0},
-    #         {"label": "Goals",        "value": raw["goals_scored"],            "points": raw["goals_scored"] * goal_pts},
-    #         {"label": "Assists",      "value": raw["assists"],                 "points": raw["assists"] * 3},
-    #         {"label": "Clean Sheet",  "value": raw["clean_sheets"],       "points": raw["clean_sheets"] * cs_pts},
-    #         {"label": "Yellow cards", "value": raw["yellow_cards"],            "points": -1 * raw["yellow_cards"]},
-    #         {"label": "Red cards",    "value": raw["red_cards"],               "points": -3 * raw["red_cards"]},
-    #         {"label": "Bonus",        "value": raw["bonus_points"],            "points": raw["bonus_points"]},
-    #     ]
-    #     return raw, breakdown
-
-    # 6) Shape response objects
-    def to_display(entry):
-        club = entry.player.team
+    # 3) Shape response objects in one pass
+    def to_display(e):
+        club_id = e["club_id"]
+        st = SimpleNamespace(**e["stats"]) if e["stats"] else None
         out = {
-            "id": entry.player.id,
-            "full_name": entry.player.full_name,
-            "position": entry.player.position,
-            "price": entry.player.price,
-            "is_captain": entry.is_captain,
-            "is_vice_captain": entry.is_vice_captain,
-            "team": {"id": club.id, "name": club.name, "short_name": club.short_name},
-            "is_benched": entry.is_benched,
-            "points": pts_map.get(entry.player.id, 0),
-            "fixture_str": fixture_map_current.get(club.id, "—"),
-
-            "status": entry.player.status,
-            "news": entry.player.news,
-            "chance_of_playing": entry.player.chance_of_playing,
-            "return_date": entry.player.return_date,
+            "id": e["player_id"],
+            "full_name": e["full_name"],
+            "position": e["position"],
+            "price": e["price"],
+            "is_captain": e["is_captain"],
+            "is_vice_captain": e["is_vice_captain"],
+            "team": {"id": club_id, "name": e["club_name"], "short_name": e["club_short_name"]},
+            "is_benched": e["is_benched"],
+            "points": st.points if st else 0,
+            "fixture_str": form.fixture_str(club_id),
+
+            "status": e["status"],
+            "news": e["news"],
+            "chance_of_playing": e["chance_of_playing"],
+            "return_date": e["return_date"],
         }
 
-        st = stats_map.get(entry.player.id)
         if st:
-            raw, br = calculate_breakdown(entry.player.position, st)
+            raw, br = calculate_breakdown(e["position"], st)
             out["raw_stats"] = raw
             out["breakdown"] = br
         else:
             out["raw_stats"] = None
             out["breakdown"] = None
 
-        rows = []
-        for f in fixtures_by_team.get(club.id, []):
-            gw_num = gw_id_to_num.get(f.gameweek_id)
-            if not gw_num:
-                continue
-            is_home = (f.home_team_id == club.id)
-            opp = f.away.short_name if is_home else f.home.short_name
-            pts = pts_by_player_gw.get((entry.player.id, f.gameweek_id), 0)
-            rows.append({"gw": gw_num, "opp": opp, "ha": "H" if is_home else "A", "points": pts})
-        out["recent_fixtures"] = rows
-
+        out["recent_fixtures"] = form.recent_fixtures(club_id, e["player_id"])
         return out
 
     all_players = [to_display(e) for e in entries]
     starting = [p for p in all_players if not p["is_benched"]]
     bench = [p for p in all_players if p["is_benched"]]
 
-    # --- NEW: Fetch Active Chip ---
-    active_chip_row = await db.userchip.find_first(
-        where={'user_id': user_id, 'gameweek_id': gameweek_id}
-    )
-    # Convert to string to ensure Pydantic validation passes (avoids 500 error)
-    active_chip = str(active_chip_row.chip) if active_chip_row else None
-
     return {
-        "team_name": fantasy_team.name,
+        "team_name": team_name,
         "starting": starting,
         "bench": bench,
         "active_chip": active_chip
@@ -352,8 +235,8 @@ async def get_player_card(
     player_id: int,
 ) -> Dict[str, Any]:
     # 0) verify membership in team and load player + club
-    ut = await db.userteam.find_first(
-        where={'user_id': user_id, 'gameweek_id': gameweek_id, 'player_id': player_id},
+    ut = await get_squad_entry(
+        db, user_id, gameweek_id, player_id,
         include={'player': {'include': {'team': True}}},
     )
     if not ut:
@@ -407,48 +290,11 @@ async def get_player_card(
     raw_stats, breakdown = _breakdown_for(player.position, st)
     total_points = int(st.points) if st and st.points is not None else 0
 
-    # 2) recent fixtures: last two + current
-    cur_gw = await db.gameweek.find_unique(where={'id': gameweek_id})
-    if not cur_gw:
+    # 2) recent fixtures: last two + current (shared cache)
+    if not await get_gameweek_by_id(db, gameweek_id):
         raise HTTPException(404, "Gameweek not found")
-
-    gw_rows = await db.gameweek.find_many(
-        where={"gw_number": {"gte": max(1, cur_gw.gw_number - 2), "lte": cur_gw.gw_number}},
-        order={"gw_number": "asc"}
-    )
-    gw_id_to_num: Dict[int, int] = {g.id: g.gw_number for g in gw_rows}
-    recent_gw_ids: List[int] = [g.id for g in gw_rows]
-
-    fixtures_recent = await db.fixture.find_many(
-        where={
-            "gameweek_id": {"in": recent_gw_ids},
-            "OR": [
-                {"home_team_id": club.id},
-                {"away_team_id": club.id},
-            ],
-        },
-        include={"home": True, "away": True},
-        order={"kickoff": "asc"}
-    )
-
-    recent_stats = await db.gameweekplayerstats.find_many(
-        where={"player_id": player_id, "gameweek_id": {"in": recent_gw_ids}}
-    )
-    pts_by_gw: Dict[int, int] = {s.gameweek_id: int(s.points or 0) for s in recent_stats}
-
-    recent_fixtures: List[Dict[str, Any]] = []
-    for f in fixtures_recent:
-        gw_num = gw_id_to_num.get(f.gameweek_id)
-        if not gw_num:
-            continue
-        is_home = f.home_team_id == club.id
-        opp = f.away.short_name if is_home else f.home.short_name
-        recent_fixtures.append({
-            "gw": gw_num,
-            "opp": opp,
-            "ha": "H" if is_home else "A",
-            "points": pts_by_gw.get(f.gameweek_id, 0),
-        })
+    form = await get_recent_form(db, gameweek_id)
+    recent_fixtures = form.recent_fixtures(club.id, player.id)
 
     return {
         "id": player.id,
@@ -476,6 +322,7 @@ async def save_existing_team(
     gameweek_id: int,
     new_players: List[Dict],
 ):
+    await carry_forward_team(db, user_id, gameweek_id)
     existing = await db.userteam.find_many(
         where={'user_id': user_id, 'gameweek_id': gameweek_id}
     )
@@ -593,6 +440,7 @@ async def save_existing_team(
     return await get_user_team_full(db, user_id, gameweek_id)
 
 async def set_captain(db: Prisma, user_id: str, gameweek_id: int, player_id: int):
+    await carry_forward_team(db, user_id, gameweek_id)
     ut = await db.userteam.find_first(
         where={'user_id': user_id, 'gameweek_id': gameweek_id, 'player_id': player_id}
     )
@@ -613,6 +461,7 @@ async def set_captain(db: Prisma, user_id: str, gameweek_id: int, player_id: int
     return {"ok": True}
 
 async def set_vice_captain(db: Prisma, user_id: str, gameweek_id: int, player_id: int):
+    await carry_forward_team(db, user_id, gameweek_id)
     ut = await db.userteam.find_first(
         where={'user_id': user_id, 'gameweek_id': gameweek_id, 'player_id': player_id}
     )
@@ -711,7 +560,7 @@ async def get_public_team_view(db: Prisma, user_key: str, gameweek_number: int):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    gw = await db.gameweek.find_unique(where={"gw_number": gameweek_number})
+    gw = await get_gameweek_by_number(db, gameweek_number)
     if not gw:
         raise HTTPException(status_code=404, detail="Gameweek not found")
 
@@ -720,18 +569,16 @@ async def get_public_team_view(db: Prisma, user_key: str, gameweek_number: int):
     if not data:
         raise HTTPException(status_code=404, detail="No fantasy team found for this user/gameweek")
     
-    from app.services.stats_service import get_leaderboard
-
-    # 2. Get Overall Stats from Leaderboard
+    # 2. Get Overall Stats: rank from the in-memory index, points from standings
     try:
-        lb = await get_leaderboard(db)
-        me = next((r for r in lb if r.get("user_id") == str(user.id)), None)
-        overall_points = int(me["total_points"]) if me else 0
-        overall_rank = int(me["rank"]) if me and me.get("rank") is not None else None
+        me = await get_standing(db, str(user.id))
+        overall_points = int(me.total_points) if me else 0
+        overall_rank_value = overall_rank(str(user.id)) or (int(me.rank) if me else None)
     except Exception:
-        overall_points, overall_rank = 0, None
+        overall_points, overall_rank_value = 0, None
 
     # 3. Get Specific Gameweek Score
+    ugws = None
     try:
         ugws = await db.usergameweekscore.find_first(
             where={"user_id": str(user.id), "gameweek_id": gw.id}
@@ -740,48 +587,17 @@ async def get_public_team_view(db: Prisma, user_key: str, gameweek_number: int):
     except Exception:
         gw_points = 0
 
-    # 4. --- NEW LOGIC: Calculate Gameweek Average, Highest, and Rank ---
-    all_gw_scores = await db.usergameweekscore.find_many(
-        where={"gameweek_id": gw.id}
-    )
-
-    avg_points = 0
-    max_points = 0
-    gw_rank_str = "-"
+    # 4. Gameweek Average and Highest (net points: total - hits) from the precomputed summary
+    summary = await get_gameweek_summary(db, gw.id)
+    avg_points = round(summary.average_points) if summary else 0
+    max_points = summary.highest_points if summary else 0
 
-    if all_gw_scores:
-        # Calculate scores as (total - hits) to be fair, or just total_points based on league rules
-        # Usually GW Rank is based on Total Points (before hits) or Net Points. 
-        # Standard FPL uses Net Points for Head-to-Head but Gross for GW Rank usually? 
-        # Actually, let's stick to Net Points (Total - Hits) as that's what 'gameweek_points' displays above.
-        
-        scores_list = []
-        for s in all_gw_scores:
-            net_score = (s.total_points or 0) - (s.transfer_hits or 0)
-            scores_list.append({"uid": s.user_id, "score": net_score})
-        
-        # Sort descending
-        scores_list.sort(key=lambda x: x["score"], reverse=True)
-
-        if scores_list:
-            max_points = scores_list[0]["score"]
-            total_sum = sum(item["score"] for item in scores_list)
-            avg_points = round(total_sum / len(scores_list))
-
-            # Find rank
-            # Handling ties: if scores are [50, 50, 40], ranks are 1, 1, 3
-            current_rank = 0
-            prev_score = None
-            true_rank = 0
-            
-            for idx, item in enumerate(scores_list):
-                if item["score"] != prev_score:
-                    true_rank = idx + 1
-                    prev_score = item["score"]
-                
-                if item["uid"] == str(user.id):
-                    gw_rank_str = str(true_rank)
-                    break
+    # GW rank comes from the rank index (ties share a rank: 50, 50, 40 -> 1, 1, 3),
+    # falling back to the summary histogram
+    gw_rank = gameweek_rank(gw.id, str(user.id))
+    if gw_rank is None and summary and ugws:
+        gw_rank = rank_from_histogram(summary.histogram, gw_points)
+    gw_rank_str = str(gw_rank) if gw_rank is not None else "-"
 
     manager_name = user.full_name or (user.email or "").split("@")[0]
 
@@ -793,7 +609,7 @@ async def get_public_team_view(db: Prisma, user_key: str, gameweek_number: int):
             "total_players": len(data.get("starting") or []) + len(data.get("bench") or []),
             "gameweek_points": gw_points,
         },
-        "overallRank": data.get("overallRank") or overall_rank,
+        "overallRank": data.get("overallRank") or overall_rank_value,
         
         # --- Added Fields ---
         "average_points": avg_points,
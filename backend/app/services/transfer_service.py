@@ -7,6 +7,8 @@ from app import schemas
 from app.services.team_service import get_user_team_full, carry_forward_team
 from app.utils.team_algo import _normalize_8p3
 from app.services.chip_service import is_wildcard_active
+from app.services.rank_service import record_gameweek_scores
+from app.repositories.score_repo import upsert_transfer_hits
 
 
 def validate_squad_structure(players: list):
@@ -99,6 +101,7 @@ async def transfer_player(
     # Decide charge policy before tx for clarity
     charge_transfers = bool(user.played_first_gameweek and not wildcard)
 
+    score_changes = {}
     async with db.tx() as tx:
         # swap
         await tx.userteam.delete_many(
@@ -128,18 +131,10 @@ async def transfer_player(
             else:
                 # apply a -4 hit for this transfer
                 # upsert GW score row and increment hits by 4
-                await tx.usergameweekscore.upsert(
-                    where={'user_id_gameweek_id': {'user_id': user_id, 'gameweek_id': gameweek_id}},
-                    create={
-                        'user_id': user_id,
-                        'gameweek_id': gameweek_id,
-                        'total_points': 0,
-                        'transfer_hits': 4,
-                    },
-                    update={'transfer_hits': {'increment': 4}},
-                )
+                score_changes = await upsert_transfer_hits(tx, user_id, gameweek_id, 4)
         # else: no cost during first GW or wildcard
 
+    await record_gameweek_scores(db, gameweek_id, score_changes)
     return await get_user_team_full(db, user_id, gameweek_id)
 
 
@@ -160,6 +155,9 @@ async def confirm_transfers(
     if not transfers:
         raise HTTPException(status_code=400, detail="No transfers provided.")
 
+    await carry_forward_team(db, user_id, gameweek_id)
+
+    score_changes = {}
     async with db.tx() as tx:
         # Fetch essential user and gameweek data in one go
         user = await tx.user.find_unique(where={"id": user_id})
@@ -314,15 +312,10 @@ async def confirm_transfers(
                 data={"free_transfers": new_free_transfers}
             )
             if transfer_hits > 0:
-                await tx.usergameweekscore.upsert(
-                    where={"user_id_gameweek_id": {"user_id": user_id, "gameweek_id": gameweek_id}},
-                    data={
-                        "create": {"user_id": user_id, "gameweek_id": gameweek_id, "transfer_hits": transfer_hits},
-                        "update": {"transfer_hits": {"increment": transfer_hits}},
-                    },
-                )
+                score_changes = await upsert_transfer_hits(tx, user_id, gameweek_id, transfer_hits)
 
 
+    await record_gameweek_scores(db, gameweek_id, score_changes)
     # Return the updated team view
     return await get_user_team_full(db, user_id, gameweek_id)
 
@@ -0,0 +1,109 @@
+# app/utils/dataloader.py
+"""
+Request-scoped batching for single-key lookups.
+
+Repository functions fetch one row by key through `load(name, key, batch_fn)`.
+Inside a request, every `load` for the same `name` issued in the same event-loop
+tick (e.g. from an asyncio.gather over a loop) is resolved by a single
+`batch_fn(keys)` call, i.e. one `IN (...)` query, and results are memoized
+for the rest of the request. Outside a request scope (startup, admin tasks,
+scripts) `load` simply calls `batch_fn([key])`.
+
+Loads behind app.cache.cached pass memoize=False: the cache already keeps the
+result, and a memoized row would outlive an invalidate() during the request and
+be written back into the cache. Those loads are only batched.
+
+DataLoaderMiddleware opens a fresh scope per HTTP request, so memoized rows
+never outlive the request that read them.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+_scope: ContextVar[Optional[Dict[str, "DataLoader"]]] = ContextVar("dataloaders", default=None)
+
+
+class DataLoader:
+    """
+    Collects keys requested in the same tick and resolves them with one batch_fn
+    call. batch_fn returns {key: value}; keys it leaves out resolve to None.
+    With memoize=False a key is forgotten once its batch is sent.
+    """
+
+    def __init__(self, batch_fn: BatchFn, memoize: bool = True):
+        self.batch_fn = batch_fn
+        self.memoize = memoize
+        self.batches = 0
+        self._memo: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Hashable] = []
+
+    def load(self, key: Hashable) -> "asyncio.Future":
+        fut = self._memo.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            self._memo[key] = fut
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending.append(key)
+        return fut
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        self.batches += 1
+        futures = {k: self._memo[k] if self.memoize else self._memo.pop(k) for k in keys}
+        asyncio.ensure_future(self._resolve(futures))
+
+    async def _resolve(self, futures: Dict[Hashable, asyncio.Future]) -> None:
+        try:
+            found = await self.batch_fn(list(futures))
+        except Exception as e:
+            for k, fut in futures.items():
+                # Failed lookups are not memoized: a later load retries
+                if self._memo.get(k) is fut:
+                    del self._memo[k]
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for k, fut in futures.items():
+            if not fut.done():
+                fut.set_result(found.get(k))
+
+
+async def load(name: str, key: Hashable, batch_fn: BatchFn, memoize: bool = True) -> Any:
+    """One value by key, batched (and unless memoize=False, memoized) per request under `name`."""
+    loaders = _scope.get()
+    if loaders is None:
+        return (await batch_fn([key])).get(key)
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = DataLoader(batch_fn, memoize)
+    return await loader.load(key)
+
+
+@contextmanager
+def request_scope():
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class DataLoaderMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with request_scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,52 @@
+# app/utils/gameweek_state.py
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, List, Optional
+
+from app.cache_backends import cacheable
+
+
+@cacheable
+class GameweekState:
+    """
+    Immutable view over the ordered gameweek list. Deadline questions ("current",
+    "next") are answered by bisection; status questions (live, open for transfers,
+    active) are resolved once when the state is built.
+
+    A state is only valid until `expires_at`, the first deadline after the moment
+    it was built, because that is when "current" moves on. Status changes are
+    handled by rebuilding (the admin lifecycle routes invalidate the gameweek cache).
+    """
+
+    def __init__(self, gameweeks: List[Any], now: datetime):
+        self.gameweeks = sorted(gameweeks, key=lambda g: g.gw_number)
+        self._by_deadline = sorted(gameweeks, key=lambda g: g.deadline)
+        self._deadlines = [g.deadline for g in self._by_deadline]
+
+        idx = bisect_right(self._deadlines, now)
+        self.expires_at: Optional[datetime] = self._deadlines[idx] if idx < len(self._deadlines) else None
+
+        live = [g for g in self.gameweeks if g.status == 'LIVE']
+        upcoming = [g for g in self.gameweeks if g.status == 'UPCOMING']
+        finished = [g for g in self.gameweeks if g.status == 'FINISHED']
+        self.live = live[0] if live else None
+        self.next_upcoming = upcoming[0] if upcoming else None
+        self.last_finished = finished[-1] if finished else None
+        # LIVE first, then the next UPCOMING
+        self.open_for_transfers = self.live or self.next_upcoming
+        # LIVE, then UPCOMING, then the last FINISHED
+        self.active = self.open_for_transfers or self.last_finished
+
+    def is_expired(self, now: datetime) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+    def next_deadline(self, now: datetime):
+        """First gameweek whose deadline is still in the future, or None."""
+        idx = bisect_right(self._deadlines, now)
+        return self._by_deadline[idx] if idx < len(self._by_deadline) else None
+
+    def current(self, now: datetime):
+        """The next deadline's gameweek, falling back to the most recent past one."""
+        if not self._by_deadline:
+            return None
+        return self.next_deadline(now) or self._by_deadline[-1]
@@ -1,3 +1,5 @@
+from typing import Any, Dict, Mapping, Sequence
+import numpy as np
 from app import schemas
 
 def calculate_player_points(position: str, stats: schemas.PlayerStatIn) -> int:
@@ -20,4 +22,71 @@ def calculate_player_points(position: str, stats: schemas.PlayerStatIn) -> int:
     points -= stats.own_goals * 2
     points -= stats.yellow_cards * 1
     points -= stats.red_cards * 3
-    return points
\ No newline at end of file
+    return points
+
+
+# --- Columnar scoring (whole gameweek / season at once) ---
+
+STAT_COLUMNS = (
+    "goals_scored", "assists", "clean_sheets", "goals_conceded", "own_goals",
+    "penalties_missed", "penalties_saved", "yellow_cards", "red_cards", "bonus_points",
+)
+
+# Position rule vectors: (points per goal, clean sheet points, loses 1 per 2 goals conceded)
+# Must stay in sync with calculate_player_points above. Unknown positions score 0 for all three.
+POSITION_RULES: Dict[str, tuple[int, int, int]] = {
+    "GK": (10, 4, 1),
+    "DEF": (6, 4, 1),
+    "MID": (5, 1, 0),
+    "FWD": (4, 0, 0),
+}
+
+
+def stats_to_columns(rows: Sequence[Any]) -> Dict[str, np.ndarray]:
+    """Turns stat rows (PlayerStatIn, Prisma models or dicts) into one array per stat."""
+    def get(row, key):
+        return row.get(key, 0) if isinstance(row, dict) else getattr(row, key, 0)
+
+    return {
+        key: np.fromiter((int(get(r, key) or 0) for r in rows), dtype=np.int64, count=len(rows))
+        for key in STAT_COLUMNS
+    }
+
+
+def calculate_points_vectorized(positions: Sequence[str], columns: Mapping[str, Sequence[int]]) -> np.ndarray:
+    """
+    Vectorized calculate_player_points. `positions[i]` and `columns[stat][i]` describe
+    row i; returns the points column as an int64 array in one pass.
+    """
+    pos = np.asarray(positions, dtype=object)
+    n = len(pos)
+
+    goal_pts = np.zeros(n, dtype=np.int64)
+    cs_pts = np.zeros(n, dtype=np.int64)
+    gc_applies = np.zeros(n, dtype=np.int64)
+    for name, (g, cs, gc) in POSITION_RULES.items():
+        mask = pos == name
+        goal_pts[mask] = g
+        cs_pts[mask] = cs
+        gc_applies[mask] = gc
+
+    def col(key):
+        values = columns.get(key)
+        if values is None:
+            return np.zeros(n, dtype=np.int64)
+        return np.asarray(values, dtype=np.int64)
+
+    goals = col("goals_scored")
+    clean_sheet = col("clean_sheets") != 0
+
+    points = np.where(goals > 0, goals * goal_pts, 0)
+    points += col("assists") * 3
+    points += col("bonus_points")
+    points += np.where(clean_sheet, cs_pts, 0)
+    points -= gc_applies * np.floor_divide(col("goals_conceded"), 2)
+    points += col("penalties_saved") * 5
+    points -= col("penalties_missed") * 2
+    points -= col("own_goals") * 2
+    points -= col("yellow_cards")
+    points -= col("red_cards") * 3
+    return points
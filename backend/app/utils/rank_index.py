@@ -0,0 +1,175 @@
+# app/utils/rank_index.py
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+class RankIndex:
+    """
+    Order-statistic index of {user_id: score} built on a Fenwick tree over score
+    buckets. Point updates, tie-aware rank lookups and the k-th highest score all
+    run in O(log R), where R is the width of the score range. The range grows
+    automatically when a score falls outside it.
+
+    Ranks use competition ranking, the same as the leaderboard: 50, 50, 40 -> 1, 1, 3.
+    """
+
+    def __init__(self, scores: Optional[Dict[str, int]] = None):
+        self._scores: Dict[str, int] = {}
+        self._members: Dict[int, Set[str]] = {}
+        self._lo = 0
+        self._tree: List[int] = [0] * 2
+        if scores:
+            self.rebuild(scores)
+
+    # --- Fenwick internals (1-based) ---
+
+    def _size(self) -> int:
+        return len(self._tree) - 1
+
+    def _add(self, score: int, delta: int) -> None:
+        i = score - self._lo + 1
+        n = self._size()
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, score: int) -> int:
+        """Number of entries with a score <= `score`."""
+        i = min(score - self._lo + 1, self._size())
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _kth_smallest(self, k: int) -> int:
+        """Score of the k-th smallest entry (1-based) via binary lifting."""
+        pos, step = 0, 1 << self._size().bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self._size() and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos + self._lo
+
+    def _fits(self, score: int) -> bool:
+        return self._lo <= score < self._lo + self._size()
+
+    def _grow(self, score: int) -> None:
+        lo = min(self._lo, score) if self._scores else score
+        hi = max(self._lo + self._size() - 1, score) if self._scores else score
+        span = max(hi - lo + 1, 16)
+        # Leave headroom on both sides so typical weekly movement never rebuilds
+        self._rebuild_range(lo - span // 2, span * 2)
+
+    def _rebuild_range(self, lo: int, size: int) -> None:
+        self._lo = lo
+        self._tree = [0] * (size + 1)
+        for score, members in self._members.items():
+            i = score - lo + 1
+            self._tree[i] += len(members)
+        for i in range(1, size + 1):
+            j = i + (i & -i)
+            if j <= size:
+                self._tree[j] += self._tree[i]
+
+    # --- Public API ---
+
+    def rebuild(self, scores: Dict[str, int]) -> None:
+        """Replaces the whole index in O(n + R)."""
+        self._scores = {uid: int(s) for uid, s in scores.items()}
+        self._members = {}
+        for uid, s in self._scores.items():
+            self._members.setdefault(s, set()).add(uid)
+        if not self._scores:
+            self._lo, self._tree = 0, [0] * 2
+            return
+        lo, hi = min(self._members), max(self._members)
+        span = max(hi - lo + 1, 16)
+        self._rebuild_range(lo - span // 2, span * 2)
+
+    def update(self, user_id: str, score: int) -> None:
+        score = int(score)
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self.remove(user_id)
+        if not self._fits(score):
+            self._grow(score)
+        self._scores[user_id] = score
+        self._members.setdefault(score, set()).add(user_id)
+        self._add(score, 1)
+
+    def update_many(self, scores: Dict[str, int]) -> None:
+        for uid, s in scores.items():
+            self.update(uid, s)
+
+    def remove(self, user_id: str) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is None:
+            return
+        members = self._members[old]
+        members.discard(user_id)
+        if not members:
+            del self._members[old]
+        self._add(old, -1)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._scores
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank_of_score(self, score: int) -> int:
+        """Rank a manager with this score would have: 1 + number of strictly higher scores."""
+        if not self._scores:
+            return 1
+        return 1 + len(self._scores) - self._prefix(int(score))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        s = self._scores.get(user_id)
+        return None if s is None else self.rank_of_score(s)
+
+    def percentile(self, user_id: str) -> Optional[float]:
+        """Share of managers (in %) this user is level with or ahead of. The leader scores 100."""
+        r = self.rank(user_id)
+        if r is None:
+            return None
+        n = len(self._scores)
+        return round(100.0 * (n - r + 1) / n, 1)
+
+    def top_k(self, k: int) -> List[Tuple[str, int]]:
+        """The k highest (user_id, score) pairs; ties ordered by user_id."""
+        n = len(self._scores)
+        out: List[Tuple[str, int]] = []
+        position = 1
+        while len(out) < k and position <= n:
+            s = self._kth_smallest(n - position + 1)
+            members = sorted(self._members[s])
+            out.extend((uid, s) for uid in members)
+            position += len(members)
+        return out[:k]
+
+    def lowest(self) -> Optional[int]:
+        """The lowest score in the index, or None when it is empty."""
+        return self._kth_smallest(1) if self._scores else None
+
+    def members_between(self, lo: int, hi: int) -> Set[str]:
+        """Every user_id with lo <= score <= hi."""
+        if hi - lo < len(self._members):
+            buckets = (self._members.get(s) for s in range(lo, hi + 1))
+        else:
+            buckets = (m for s, m in self._members.items() if lo <= s <= hi)
+        return set().union(*(b for b in buckets if b))
+
+    def items(self) -> Iterable[Tuple[str, int]]:
+        return self._scores.items()
+
+
+def rank_from_histogram(histogram: Mapping[Any, int], score: int) -> int:
+    """Competition rank of `score` from a {score: count} histogram (keys may be strings)."""
+    return 1 + sum(int(n) for s, n in histogram.items() if int(s) > score)
@@ -0,0 +1,81 @@
+# app/utils/scoring_engine.py
+from typing import Any, Dict, Iterable, Optional
+
+
+def has_participation(st: Any) -> bool:
+    """
+    A player "played" if they have points, or (with 0 points) any non-zero stat
+    such as a yellow card. Decides whether the captain / vice-captain bonus applies.
+    """
+    if not st:
+        return False
+    # If they have points, they played.
+    if st.points != 0:
+        return True
+    # If points are 0, check for any non-zero stat (Yellow cards, etc.)
+    return any([
+        st.goals_scored > 0,
+        st.assists > 0,
+        st.yellow_cards > 0,
+        st.red_cards > 0,
+        st.bonus_points > 0,
+        st.clean_sheets,
+        st.goals_conceded > 0,
+        st.own_goals > 0,
+        st.penalties_missed > 0,
+        st.penalties_saved > 0
+    ])
+
+
+def score_squad(entries: Iterable[Any], stats_map: Dict[int, Any], chip: Optional[str] = None) -> int:
+    """
+    Gross gameweek points for one squad, computed purely in memory.
+    `entries` are UserTeam rows, `stats_map` maps player_id -> GameweekPlayerStats
+    and `chip` is the chip played that gameweek (if any).
+    """
+    entries = list(entries)
+    if not entries:
+        return 0
+
+    triple = chip == 'TRIPLE_CAPTAIN'
+    bench_boost = chip == 'BENCH_BOOST'
+
+    def pts(player_id: int) -> int:
+        st = stats_map.get(player_id)
+        return st.points if st else 0  # missing => 0
+
+    # If Bench Boost is active, ALL players count. Otherwise only starters.
+    scoring_pool = entries if bench_boost else [e for e in entries if not e.is_benched]
+    base = sum(pts(e.player_id) for e in scoring_pool)
+
+    # Captain if played, else vice if played
+    cap = next((e for e in entries if e.is_captain), None)
+    vice = next((e for e in entries if e.is_vice_captain), None)
+
+    bonus_target = None
+    if cap and has_participation(stats_map.get(cap.player_id)):
+        bonus_target = cap.player_id
+    elif vice and has_participation(stats_map.get(vice.player_id)):
+        bonus_target = vice.player_id
+
+    # Base already includes 1x points for the captain.
+    # Standard Captain = 2x total (Add 1x), Triple Captain = 3x total (Add 2x)
+    if bonus_target is None:
+        return base
+    return base + (2 if triple else 1) * pts(bonus_target)
+
+
+def player_multiplier(entry: Any, chip: Optional[str], played: bool, captain_played: bool = False) -> int:
+    """
+    How many times one squad entry's points count towards the squad total, i.e. the
+    per-entry factor score_squad applies: starter (or Bench Boost) 1x, plus 1x for
+    the captain (2x on Triple Captain), or for the vice-captain when the captain
+    did not play. `captain_played` only matters for the vice-captain.
+    """
+    bonus = 2 if chip == 'TRIPLE_CAPTAIN' else 1
+    factor = 1 if (not entry.is_benched or chip == 'BENCH_BOOST') else 0
+    if entry.is_captain and played:
+        factor += bonus
+    elif entry.is_vice_captain and played and not captain_played:
+        factor += bonus
+    return factor
@@ -0,0 +1,61 @@
+# app/utils/singleflight.py
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one in-flight coroutine. The first
+    caller for a key starts the work; everyone arriving before it finishes awaits the
+    same task and gets the same result (or exception). Nothing is cached afterwards.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # shield: one waiter being cancelled must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            "in_flight": len(self._inflight),
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def singleflight(name: Optional[str] = None):
+    """
+    Decorator for async service functions of the form fn(db, *args, **kwargs).
+    Calls with equal args / kwargs (db excluded) share one execution.
+    """
+    def decorator(fn):
+        group = _groups.setdefault(name or fn.__name__, SingleFlight(name or fn.__name__))
+
+        @functools.wraps(fn)
+        async def wrapper(db, *args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return await group.do(key, lambda: fn(db, *args, **kwargs))
+
+        return wrapper
+    return decorator
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: g.stats() for name, g in _groups.items()}
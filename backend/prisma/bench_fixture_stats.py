@@ -0,0 +1,100 @@
+"""
+Benchmark: fixture stat submission, per-player upsert loop vs one bulk upsert.
+
+    python prisma/bench_fixture_stats.py <fixture_id> [--runs 20]
+
+Uses the fixture's clubs' players and alternates between two payloads (their
+current stat lines, and the same lines with bonus_points + 1) so every run
+really changes every row. The original lines are written back at the end and
+rows the benchmark created are deleted.
+Run it against a development database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the project root (`backend`) to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prisma import Prisma
+from app.repositories.stats_repo import bulk_upsert_stat_lines, STAT_LINE_FIELDS
+
+
+async def loop_upsert(db: Prisma, gameweek_id: int, lines) -> None:
+    """The previous write path: one upsert per player inside a transaction."""
+    async with db.tx() as tx:
+        for line in lines:
+            data = {f: line[f] for f in STAT_LINE_FIELDS}
+            await tx.gameweekplayerstats.upsert(
+                where={"gameweek_id_player_id": {"gameweek_id": gameweek_id, "player_id": line["player_id"]}},
+                data={
+                    "create": {
+                        "gameweek": {"connect": {"id": gameweek_id}},
+                        "player": {"connect": {"id": line["player_id"]}},
+                        **data,
+                    },
+                    "update": data,
+                },
+            )
+
+
+async def bulk_upsert(db: Prisma, gameweek_id: int, lines) -> None:
+    async with db.tx() as tx:
+        await bulk_upsert_stat_lines(tx, gameweek_id, lines)
+
+
+async def time_runs(fn, db, gameweek_id, payloads, runs):
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        await fn(db, gameweek_id, payloads[i % 2])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixture_id", type=int)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    db = Prisma()
+    await db.connect()
+    try:
+        fx = await db.fixture.find_unique(where={"id": args.fixture_id})
+        if not fx:
+            sys.exit(f"Fixture {args.fixture_id} not found")
+        players = await db.player.find_many(where={"team_id": {"in": [fx.home_team_id, fx.away_team_id]}})
+        existing = {
+            s.player_id: s for s in await db.gameweekplayerstats.find_many(
+                where={"gameweek_id": fx.gameweek_id, "player_id": {"in": [p.id for p in players]}}
+            )
+        }
+        original = [
+            {"player_id": p.id, **{f: getattr(existing[p.id], f) if p.id in existing else (False if f == "clean_sheets" else 0)
+                                   for f in STAT_LINE_FIELDS}}
+            for p in players
+        ]
+        bumped = [{**line, "bonus_points": line["bonus_points"] + 1} for line in original]
+        payloads = (bumped, original)
+
+        print(f"Fixture {fx.id} (GW id {fx.gameweek_id}): {len(original)} stat lines, {args.runs} runs each")
+        for name, fn in (("loop upsert", loop_upsert), ("bulk upsert", bulk_upsert)):
+            t = await time_runs(fn, db, fx.gameweek_id, payloads, args.runs)
+            print(f"  {name:12s} median {statistics.median(t):8.1f} ms   min {min(t):8.1f} ms   max {max(t):8.1f} ms")
+
+        # Restore: original lines back, rows the benchmark created removed
+        await bulk_upsert(db, fx.gameweek_id, original)
+        await db.gameweekplayerstats.delete_many(where={
+            "gameweek_id": fx.gameweek_id,
+            "player_id": {"in": [p.id for p in players if p.id not in existing]},
+        })
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
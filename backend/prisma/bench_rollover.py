@@ -0,0 +1,107 @@
+"""
+Benchmark: gameweek rollover squad copy, per-manager loop vs set-based SQL.
+
+    python prisma/bench_rollover.py <live_gameweek_id> [--runs 5]
+
+Both variants copy every active manager's squad from the live gameweek into the
+next one, as the rollover does (flags and free transfers are not touched). The
+next gameweek's stored squads are saved first and restored at the end. Run it
+against a development database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add the project root (`backend`) to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prisma import Prisma
+from app.repositories.squad_repo import rollover_squads
+
+
+async def loop_rollover(db: Prisma, live_gw_id: int, next_gw_id: int) -> None:
+    """The previous squad copy: five-plus round trips per manager."""
+    active_users = await db.user.find_many(where={'is_active': True, 'fantasy_team': {'is_not': None}})
+    for user in active_users:
+        source_gw_id = live_gw_id
+        free_hit_active = await db.userchip.find_first(
+            where={'user_id': user.id, 'gameweek_id': live_gw_id, 'chip': 'FREE_HIT'}
+        )
+        if free_hit_active:
+            prev_entry = await db.userteam.find_first(
+                where={'user_id': user.id, 'gameweek_id': {'lt': live_gw_id}},
+                order={'gameweek_id': 'desc'}
+            )
+            if prev_entry:
+                source_gw_id = prev_entry.gameweek_id
+        team = await db.userteam.find_many(where={'user_id': user.id, 'gameweek_id': source_gw_id})
+        if not team:
+            continue
+        await db.userteam.delete_many(where={'user_id': user.id, 'gameweek_id': next_gw_id})
+        await db.userteam.create_many(data=[
+            {
+                "user_id": user.id,
+                "gameweek_id": next_gw_id,
+                "player_id": p.player_id,
+                "is_captain": p.is_captain,
+                "is_vice_captain": p.is_vice_captain,
+                "is_benched": p.is_benched,
+            } for p in team
+        ], skip_duplicates=True)
+
+
+async def set_based_rollover(db: Prisma, live_gw_id: int, next_gw_id: int) -> None:
+    async with db.tx() as tx:
+        await rollover_squads(tx, live_gw_id, next_gw_id)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("live_gameweek_id", type=int)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    db = Prisma()
+    await db.connect()
+    try:
+        live_gw = await db.gameweek.find_unique(where={'id': args.live_gameweek_id})
+        next_gw = live_gw and await db.gameweek.find_first(where={'gw_number': live_gw.gw_number + 1})
+        if not next_gw:
+            sys.exit("Need a live gameweek with a following gameweek")
+
+        saved = await db.userteam.find_many(where={'gameweek_id': next_gw.id})
+        managers = await db.user.count(where={'is_active': True, 'fantasy_team': {'is_not': None}})
+        print(f"GW {live_gw.gw_number} -> GW {next_gw.gw_number}: {managers} active managers, {args.runs} runs each")
+
+        for name, fn in (("loop", loop_rollover), ("set-based", set_based_rollover)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                await fn(db, live_gw.id, next_gw.id)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {name:10s} median {statistics.median(timings):9.1f} ms   min {min(timings):9.1f} ms   max {max(timings):9.1f} ms")
+
+        # Restore the next gameweek's squads exactly as they were
+        async with db.tx() as tx:
+            await tx.userteam.delete_many(where={'gameweek_id': next_gw.id})
+            if saved:
+                await tx.userteam.create_many(data=[
+                    {
+                        "user_id": r.user_id,
+                        "gameweek_id": r.gameweek_id,
+                        "player_id": r.player_id,
+                        "is_captain": r.is_captain,
+                        "is_vice_captain": r.is_vice_captain,
+                        "is_benched": r.is_benched,
+                        "bench_priority": r.bench_priority,
+                    } for r in saved
+                ])
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
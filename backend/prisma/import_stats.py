@@ -0,0 +1,73 @@
+"""
+Imports a whole gameweek of player stat lines from a CSV or NDJSON file.
+
+    python prisma/import_stats.py <gameweek_id> <file> [--format csv|ndjson] [--dry-run] [--no-rescore]
+
+CSV needs a header row. Each row names the player by player_id, or by
+player + club (short or full name), plus any of: goals_scored, assists,
+clean_sheets, goals_conceded, own_goals, penalties_missed, penalties_saved,
+yellow_cards, red_cards, bonus_points. Missing stats count as 0. The file is
+streamed in chunks; bad rows are listed by line number and skipped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add the project root (`backend`) to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import HTTPException
+from prisma import Prisma
+from app.cache import start_cache, stop_cache
+from app.services.rank_service import rebuild_rank_indexes
+from app.services.stats_import_service import import_gameweek_stats, detect_format
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a gameweek of player stats")
+    parser.add_argument("gameweek_id", type=int)
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    parser.add_argument("--no-rescore", action="store_true", help="skip provisional rescoring of a LIVE gameweek")
+    args = parser.parse_args()
+
+    try:
+        fmt = detect_format(args.file, args.format)
+    except HTTPException as e:
+        sys.exit(e.detail)
+    if not args.dry_run and not os.getenv("REDIS_URL"):
+        print("REDIS_URL is not set: running API workers will serve cached stats and ranks "
+              "until their caches expire or they restart", file=sys.stderr)
+    db = Prisma()
+    await db.connect()
+    # Join the invalidation channel so the API workers drop their cached stats and
+    # follow the provisional rescore; the standings move through this process's
+    # rank indexes, so they are built first
+    await start_cache()
+    try:
+        if not args.dry_run and not args.no_rescore:
+            await rebuild_rank_indexes(db)
+        with open(args.file, encoding="utf-8-sig", newline="") as stream:
+            report = await import_gameweek_stats(
+                db, args.gameweek_id, stream, fmt,
+                dry_run=args.dry_run, provisional=not args.no_rescore
+            )
+    finally:
+        # Waits for the invalidations to be published before the process exits
+        await stop_cache()
+        await db.disconnect()
+
+    errors = report.pop("errors")
+    print(json.dumps(report, indent=2))
+    for e in errors:
+        print(f"  line {e['line']}: {e['error']}", file=sys.stderr)
+    if report["error_count"] > len(errors):
+        print(f"  ... and {report['error_count'] - len(errors)} more errors", file=sys.stderr)
+    sys.exit(1 if report["error_count"] else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "user_teams_gameweek_id_player_id_idx" ON "user_teams"("gameweek_id", "player_id");
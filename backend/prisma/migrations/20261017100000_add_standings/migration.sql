@@ -0,0 +1,21 @@
+-- CreateTable
+CREATE TABLE "standings" (
+    "user_id" TEXT NOT NULL,
+    "team_name" TEXT NOT NULL,
+    "manager_email" TEXT NOT NULL,
+    "total_points" INTEGER NOT NULL DEFAULT 0,
+    "rank" INTEGER NOT NULL,
+    "previous_rank" INTEGER,
+    "gameweek_id" INTEGER,
+    "gameweek_points" INTEGER NOT NULL DEFAULT 0,
+    "gameweek_rank" INTEGER,
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "standings_pkey" PRIMARY KEY ("user_id")
+);
+
+-- CreateIndex
+CREATE INDEX "standings_rank_user_id_idx" ON "standings"("rank", "user_id");
+
+-- AddForeignKey
+ALTER TABLE "standings" ADD CONSTRAINT "standings_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "users"("id") ON DELETE CASCADE ON UPDATE CASCADE;
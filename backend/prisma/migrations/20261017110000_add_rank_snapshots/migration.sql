@@ -0,0 +1,25 @@
+-- CreateTable
+CREATE TABLE "rank_snapshots" (
+    "id" SERIAL NOT NULL,
+    "user_id" TEXT NOT NULL,
+    "gameweek_id" INTEGER NOT NULL,
+    "total_points" INTEGER NOT NULL,
+    "overall_rank" INTEGER NOT NULL,
+    "gameweek_points" INTEGER NOT NULL,
+    "gameweek_rank" INTEGER NOT NULL,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "rank_snapshots_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "rank_snapshots_gameweek_id_idx" ON "rank_snapshots"("gameweek_id");
+
+-- CreateIndex
+CREATE UNIQUE INDEX "rank_snapshots_user_id_gameweek_id_key" ON "rank_snapshots"("user_id", "gameweek_id");
+
+-- AddForeignKey
+ALTER TABLE "rank_snapshots" ADD CONSTRAINT "rank_snapshots_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "users"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "rank_snapshots" ADD CONSTRAINT "rank_snapshots_gameweek_id_fkey" FOREIGN KEY ("gameweek_id") REFERENCES "gameweeks"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,17 @@
+-- CreateTable
+CREATE TABLE "gameweek_summaries" (
+    "gameweek_id" INTEGER NOT NULL,
+    "manager_count" INTEGER NOT NULL DEFAULT 0,
+    "average_points" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "highest_points" INTEGER NOT NULL DEFAULT 0,
+    "average_gross" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "highest_gross" INTEGER NOT NULL DEFAULT 0,
+    "histogram" JSONB NOT NULL,
+    "top_user_id" TEXT,
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "gameweek_summaries_pkey" PRIMARY KEY ("gameweek_id")
+);
+
+-- AddForeignKey
+ALTER TABLE "gameweek_summaries" ADD CONSTRAINT "gameweek_summaries_gameweek_id_fkey" FOREIGN KEY ("gameweek_id") REFERENCES "gameweeks"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,94 @@
+-- CreateSequence
+-- One global, monotonically increasing counter shared by every synced table
+CREATE SEQUENCE "change_version_seq";
+
+-- AlterTable
+ALTER TABLE "players" ADD COLUMN "change_version" BIGINT NOT NULL DEFAULT nextval('change_version_seq'::regclass);
+
+-- AlterTable
+ALTER TABLE "gameweeks" ADD COLUMN "change_version" BIGINT NOT NULL DEFAULT nextval('change_version_seq'::regclass);
+
+-- AlterTable
+ALTER TABLE "fixtures" ADD COLUMN "change_version" BIGINT NOT NULL DEFAULT nextval('change_version_seq'::regclass);
+
+-- CreateTable
+CREATE TABLE "tombstones" (
+    "id" SERIAL NOT NULL,
+    "entity" TEXT NOT NULL,
+    "entity_id" INTEGER NOT NULL,
+    "change_version" BIGINT NOT NULL DEFAULT nextval('change_version_seq'::regclass),
+    "deleted_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "tombstones_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "players_change_version_idx" ON "players"("change_version");
+
+-- CreateIndex
+CREATE INDEX "gameweeks_change_version_idx" ON "gameweeks"("change_version");
+
+-- CreateIndex
+CREATE INDEX "fixtures_change_version_idx" ON "fixtures"("change_version");
+
+-- CreateIndex
+CREATE INDEX "tombstones_entity_change_version_idx" ON "tombstones"("entity", "change_version");
+
+-- CreateFunction
+-- Every insert / update takes a fresh version, whichever code path wrote the row
+CREATE OR REPLACE FUNCTION bump_change_version() RETURNS trigger AS $$
+BEGIN
+    NEW."change_version" := nextval('change_version_seq'::regclass);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateFunction
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO "tombstones" ("entity", "entity_id") VALUES (TG_ARGV[0], OLD."id");
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateFunction
+-- A player's season points live in gameweek_player_stats; touching the player row
+-- lets its bump_change_version trigger publish the new total to delta-sync clients
+CREATE OR REPLACE FUNCTION touch_player_on_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE "players" SET "change_version" = "change_version" WHERE "id" = OLD."player_id";
+    ELSE
+        UPDATE "players" SET "change_version" = "change_version" WHERE "id" = NEW."player_id";
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "players_change_version" BEFORE INSERT OR UPDATE ON "players"
+    FOR EACH ROW EXECUTE FUNCTION bump_change_version();
+
+-- CreateTrigger
+CREATE TRIGGER "gameweeks_change_version" BEFORE INSERT OR UPDATE ON "gameweeks"
+    FOR EACH ROW EXECUTE FUNCTION bump_change_version();
+
+-- CreateTrigger
+CREATE TRIGGER "fixtures_change_version" BEFORE INSERT OR UPDATE ON "fixtures"
+    FOR EACH ROW EXECUTE FUNCTION bump_change_version();
+
+-- CreateTrigger
+CREATE TRIGGER "players_tombstone" AFTER DELETE ON "players"
+    FOR EACH ROW EXECUTE FUNCTION record_tombstone('players');
+
+-- CreateTrigger
+CREATE TRIGGER "gameweeks_tombstone" AFTER DELETE ON "gameweeks"
+    FOR EACH ROW EXECUTE FUNCTION record_tombstone('gameweeks');
+
+-- CreateTrigger
+CREATE TRIGGER "fixtures_tombstone" AFTER DELETE ON "fixtures"
+    FOR EACH ROW EXECUTE FUNCTION record_tombstone('fixtures');
+
+-- CreateTrigger
+CREATE TRIGGER "gameweek_player_stats_touch_player" AFTER INSERT OR UPDATE OR DELETE ON "gameweek_player_stats"
+    FOR EACH ROW EXECUTE FUNCTION touch_player_on_stats();
@@ -0,0 +1,40 @@
+-- Delta sync pages by transaction id rather than by change_version: a sequence value
+-- is taken when a row is written but only becomes visible at commit, so a reader can
+-- see version N+1 before N and must not move its cursor past N. Transaction ids
+-- below pg_snapshot_xmin(pg_current_snapshot()) are all finished, which gives a
+-- cursor that never skips a write (see sync_repo.get_sync_horizon).
+
+-- AlterTable
+-- Rows written before this migration keep 0 and are returned by a full sync (since=0)
+ALTER TABLE "players" ADD COLUMN "change_xid" BIGINT NOT NULL DEFAULT 0;
+
+-- AlterTable
+ALTER TABLE "gameweeks" ADD COLUMN "change_xid" BIGINT NOT NULL DEFAULT 0;
+
+-- AlterTable
+ALTER TABLE "fixtures" ADD COLUMN "change_xid" BIGINT NOT NULL DEFAULT 0;
+
+-- AlterTable
+ALTER TABLE "tombstones" ADD COLUMN "change_xid" BIGINT NOT NULL DEFAULT (pg_current_xact_id()::text)::bigint;
+
+-- CreateIndex
+CREATE INDEX "players_change_xid_idx" ON "players"("change_xid");
+
+-- CreateIndex
+CREATE INDEX "gameweeks_change_xid_idx" ON "gameweeks"("change_xid");
+
+-- CreateIndex
+CREATE INDEX "fixtures_change_xid_idx" ON "fixtures"("change_xid");
+
+-- CreateIndex
+CREATE INDEX "tombstones_entity_change_xid_idx" ON "tombstones"("entity", "change_xid");
+
+-- CreateFunction
+-- Also stamps the writing transaction (the triggers from add_change_versions stay as they are)
+CREATE OR REPLACE FUNCTION bump_change_version() RETURNS trigger AS $$
+BEGIN
+    NEW."change_version" := nextval('change_version_seq'::regclass);
+    NEW."change_xid" := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,16 @@
+-- AlterTable
+-- Integer sums behind the averages, so score writes can move a summary by deltas
+ALTER TABLE "gameweek_summaries" ADD COLUMN "points_sum" BIGINT NOT NULL DEFAULT 0,
+ADD COLUMN "gross_sum" BIGINT NOT NULL DEFAULT 0;
+
+-- Backfill from the scores
+UPDATE "gameweek_summaries" AS gs
+SET "points_sum" = t.points_sum, "gross_sum" = t.gross_sum
+FROM (
+    SELECT "gameweek_id",
+        SUM("total_points" - "transfer_hits")::bigint AS points_sum,
+        SUM("total_points")::bigint AS gross_sum
+    FROM "user_gameweek_scores"
+    GROUP BY "gameweek_id"
+) t
+WHERE t."gameweek_id" = gs."gameweek_id";
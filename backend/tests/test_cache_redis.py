@@ -0,0 +1,250 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from app import cache
+from app.cache import (
+    CHANNEL,
+    PLAYERS,
+    STATS,
+    apply_remote,
+    bump,
+    cached,
+    start_cache,
+    stop_cache,
+    versions,
+)
+from app.cache_backends import MemoryBackend, cacheable, decode_value
+from app.schemas import PlayerOut, TeamOut
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    # Module-level state is per process; give each test its own
+    monkeypatch.setenv("CACHE_BACKEND", "redis")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(cache, "_versions", {})
+    monkeypatch.setattr(cache, "_backend", MemoryBackend(cache._NAMESPACES))
+    monkeypatch.setattr(cache, "_remote_listeners", [])
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_listener", None)
+    monkeypatch.setattr(cache, "_received", 0)
+
+
+def run(scenario):
+    """Runs `scenario(client)` against a cache started on a fresh fakeredis server."""
+    async def main():
+        client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+        await start_cache(redis_client=client)
+        try:
+            return await scenario(client)
+        finally:
+            await stop_cache()
+    return asyncio.run(main())
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+async def settle():
+    # bump() publishes from a background task
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_redis_backend_round_trip_under_versioned_key():
+    async def scenario(client):
+        assert cache._backend.name == "redis"
+        load = Loader({"id": 7, "name": "Striker"})
+
+        assert await cached(PLAYERS, 7, load) == {"id": 7, "name": "Striker"}
+        assert await cached(PLAYERS, 7, load) == {"id": 7, "name": "Striker"}
+        assert load.calls == 1
+
+        version = versions(PLAYERS)[0]
+        assert await client.exists(f"aces:cache:{PLAYERS}:{version}:7") == 1
+        assert await client.ttl(f"aces:cache:{PLAYERS}:{version}:7") > 0
+
+    run(scenario)
+
+
+def test_bump_makes_old_entries_unreachable():
+    async def scenario(client):
+        load = Loader("v1")
+        await cached(PLAYERS, 7, load)
+        old_version = versions(PLAYERS)[0]
+
+        bump(PLAYERS)
+        await settle()
+        new_version = versions(PLAYERS)[0]
+        assert new_version > old_version
+
+        load.value = "v2"
+        assert await cached(PLAYERS, 7, load) == "v2"
+        assert load.calls == 2
+        # The old entry is not deleted, just never read again (it ages out)
+        assert await client.exists(f"aces:cache:{PLAYERS}:{old_version}:7") == 1
+
+        # The new version is shared for workers that start later
+        assert int(await client.hget(cache._VERSIONS_KEY, PLAYERS)) == new_version
+
+    run(scenario)
+
+
+def test_value_loaded_across_an_invalidation_is_not_stored():
+    async def scenario(client):
+        async def racing_loader():
+            bump(PLAYERS)  # an admin write lands while the old rows are being read
+            return "stale"
+
+        assert await cached(PLAYERS, 7, racing_loader) == "stale"
+        load = Loader("fresh")
+        assert await cached(PLAYERS, 7, load) == "fresh"
+        assert await cached(PLAYERS, 7, load) == "fresh"
+        assert load.calls == 1
+
+    run(scenario)
+
+
+def test_bump_publishes_new_versions():
+    async def scenario(client):
+        pubsub = client.pubsub()
+        await pubsub.subscribe(CHANNEL)
+        await pubsub.get_message(timeout=1.0)  # subscribe confirmation
+
+        bump(STATS)
+        await settle()
+        msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+        payload = json.loads(msg["data"])
+        assert payload == {"origin": cache._WORKER_ID, "versions": {STATS: versions(STATS)[0]}}
+        await pubsub.aclose()
+
+    run(scenario)
+
+
+def test_stop_cache_sends_pending_messages_first():
+    async def main():
+        server = fakeredis.FakeServer()
+        await start_cache(redis_client=fakeredis.aioredis.FakeRedis(server=server))
+        bump(STATS)
+        await stop_cache()  # e.g. a CLI script exiting right after its writes
+        reader = fakeredis.aioredis.FakeRedis(server=server)
+        assert int(await reader.hget(cache._VERSIONS_KEY, STATS)) == versions(STATS)[0]
+
+    asyncio.run(main())
+
+
+def test_start_cache_resumes_from_published_versions():
+    async def main():
+        client = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+        await client.hset(cache._VERSIONS_KEY, mapping={STATS: 123, PLAYERS: 456})
+        await start_cache(redis_client=client)
+        try:
+            assert versions(STATS, PLAYERS) == (123, 456)
+        finally:
+            await stop_cache()
+
+    asyncio.run(main())
+
+
+def test_apply_remote_ignores_own_messages():
+    async def scenario(client):
+        before = versions(STATS)
+        assert apply_remote({"origin": cache._WORKER_ID, "versions": {STATS: before[0] + 10}}) == []
+        assert versions(STATS) == before
+
+    run(scenario)
+
+
+def test_apply_remote_never_moves_backwards():
+    async def scenario(client):
+        moved_batches = []
+        cache.on_remote_invalidate(moved_batches.append)
+        bump(PLAYERS)
+        current = versions(PLAYERS)[0]
+
+        assert apply_remote({"origin": "other", "versions": {PLAYERS: current - 1}}) == []
+        assert apply_remote({"origin": "other", "versions": {PLAYERS: current}}) == []
+        assert versions(PLAYERS) == (current,)
+        assert moved_batches == []
+
+        assert apply_remote({"origin": "other", "versions": {PLAYERS: current + 5, STATS: 1}}) == [PLAYERS, STATS]
+        assert versions(PLAYERS, STATS) == (current + 5, 1)
+        assert moved_batches == [[PLAYERS, STATS]]
+
+    run(scenario)
+
+
+def test_remote_bump_retires_entries():
+    async def scenario(client):
+        load = Loader("v1")
+        await cached(PLAYERS, 7, load)
+
+        # Another worker bumped PLAYERS; delivered through the channel
+        await client.publish(CHANNEL, json.dumps({"origin": "other", "versions": {PLAYERS: versions(PLAYERS)[0] + 1}}))
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            if cache._received:
+                break
+
+        await cached(PLAYERS, 7, load)
+        assert load.calls == 2
+
+    run(scenario)
+
+
+@cacheable
+class Window:
+    def __init__(self, points):
+        self.points = points
+
+
+def test_shared_entries_round_trip_as_json():
+    value = {
+        "players": {7: PlayerOut(
+            id=7, full_name="Striker", position="FWD", price=6.5, team_id=1, status="ACTIVE",
+            team=TeamOut(id=1, name="Aces", short_name="ACE"),
+        )},
+        "price": Decimal("6.50"),
+        "points": {(7, 3): 12},
+        "kickoff": datetime(2026, 10, 17, 15, 0, tzinfo=timezone.utc),
+        "body": b"\x1f\x8b",
+        "window": Window({(7, 3): 12}),
+    }
+
+    async def scenario(client):
+        await cached(PLAYERS, "mixed", Loader(value))
+        version = versions(PLAYERS)[0]
+        json.loads(await client.get(f"aces:cache:{PLAYERS}:{version}:'mixed'"))  # plain JSON, no pickle
+
+        cache._backend._hits[PLAYERS] = 0
+        got = await cached(PLAYERS, "mixed", Loader(None))
+        assert cache._backend._hits[PLAYERS] == 1
+        return got
+
+    got = run(scenario)
+    assert got["players"][7] == value["players"][7]
+    assert got["players"][7].team.name == "Aces"
+    assert got["points"] == {(7, 3): 12}
+    assert got["price"] == Decimal("6.50")
+    assert got["kickoff"] == value["kickoff"]
+    assert got["body"] == b"\x1f\x8b"
+    assert isinstance(got["window"], Window) and got["window"].points == {(7, 3): 12}
+
+
+@pytest.mark.parametrize("cls", ["os:system", "subprocess:Popen", "tests.test_cache_redis:Window"])
+def test_decode_refuses_untrusted_types(cls):
+    for tag in ("model", "enum", "object"):
+        with pytest.raises(ValueError):
+            decode_value({"__t": tag, "cls": cls, "v": {}})
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app import cache
+from app.cache import FIXTURES, cached, invalidate
+from app.cache_backends import MemoryBackend
+from app.utils.dataloader import load, request_scope
+
+
+class Batch:
+    """A batch_fn that records every call; keys map to themselves times ten."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return {k: k * 10 for k in keys if k != 404}
+
+
+def in_request(scenario):
+    async def main():
+        with request_scope():
+            return await scenario()
+    return asyncio.run(main())
+
+
+def test_gathered_loads_share_one_batch():
+    batch = Batch()
+
+    async def scenario():
+        return await asyncio.gather(*(load("things", k, batch) for k in [1, 2, 3, 2, 404]))
+
+    assert in_request(scenario) == [10, 20, 30, 20, None]
+    assert batch.calls == [[1, 2, 3, 404]]
+
+
+def test_memoized_keys_are_not_fetched_again():
+    batch = Batch()
+
+    async def scenario():
+        await asyncio.gather(load("things", 1, batch), load("things", 2, batch))
+        return await asyncio.gather(load("things", 2, batch), load("things", 3, batch))
+
+    assert in_request(scenario) == [20, 30]
+    assert batch.calls == [[1, 2], [3]]
+
+
+def test_failed_batch_is_not_memoized():
+    batch = Batch(fail=True)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await load("things", 1, batch)
+        batch.fail = False
+        return await load("things", 1, batch)
+
+    assert in_request(scenario) == 10
+    assert batch.calls == [[1], [1]]
+
+
+def test_without_memo_loads_are_only_batched():
+    batch = Batch()
+
+    async def scenario():
+        await asyncio.gather(load("things", 1, batch, memoize=False), load("things", 1, batch, memoize=False))
+        return await load("things", 1, batch, memoize=False)
+
+    assert in_request(scenario) == 10
+    assert batch.calls == [[1], [1]]
+
+
+def test_invalidate_mid_request_is_not_undone_by_the_loader(monkeypatch):
+    monkeypatch.setattr(cache, "_versions", {})
+    monkeypatch.setattr(cache, "_backend", MemoryBackend(cache._NAMESPACES))
+    rows = {7: "old fixtures"}
+
+    async def batch(keys):
+        return {k: rows[k] for k in keys}
+
+    def get(gameweek_id):
+        return cached(FIXTURES, ("gw", gameweek_id), lambda: load("fixtures", gameweek_id, batch, memoize=False))
+
+    async def scenario():
+        assert await get(7) == "old fixtures"
+        rows[7] = "new fixtures"  # an admin write in the same request
+        invalidate(FIXTURES)
+        return await get(7)
+
+    assert in_request(scenario) == "new fixtures"
@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+import pytest
+
+from app import schemas
+from app.utils.points_calculator import (
+    POSITION_RULES,
+    calculate_player_points,
+    calculate_points_vectorized,
+    stats_to_columns,
+)
+
+POSITIONS = ("GK", "DEF", "MID", "FWD")
+
+
+def random_stat(rng: random.Random, player_id: int) -> schemas.PlayerStatIn:
+    return schemas.PlayerStatIn(
+        player_id=player_id,
+        played=rng.random() < 0.9,
+        goals_scored=rng.choice((0, 0, 0, 1, 2, 3)),
+        assists=rng.randint(0, 3),
+        clean_sheets=rng.random() < 0.4,
+        goals_conceded=rng.randint(0, 7),
+        own_goals=rng.choice((0, 0, 0, 1, 2)),
+        penalties_missed=rng.choice((0, 0, 1)),
+        penalties_saved=rng.choice((0, 0, 1, 2)),
+        yellow_cards=rng.choice((0, 0, 1)),
+        red_cards=rng.choice((0, 0, 0, 1)),
+        bonus_points=rng.randint(0, 3),
+    )
+
+
+def assert_parity(positions, stats):
+    vectorized = calculate_points_vectorized(positions, stats_to_columns(stats))
+    assert vectorized.dtype == np.int64
+    assert vectorized.tolist() == [calculate_player_points(p, s) for p, s in zip(positions, stats)]
+
+
+def test_rules_cover_every_position():
+    assert set(POSITION_RULES) == set(POSITIONS)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_matches_scalar_on_random_table(seed):
+    rng = random.Random(seed)
+    positions = [rng.choice(POSITIONS) for _ in range(2000)]
+    stats = [random_stat(rng, i) for i in range(len(positions))]
+    assert_parity(positions, stats)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+@pytest.mark.parametrize("clean_sheet", (False, True))
+@pytest.mark.parametrize("goals_conceded", (0, 1, 2, 3, 5))
+@pytest.mark.parametrize("goals_scored", (0, 1, 3))
+def test_position_branches(position, clean_sheet, goals_conceded, goals_scored):
+    # Goal weight, clean sheet bonus and the GK/DEF goals-conceded deduction per position
+    stat = schemas.PlayerStatIn(
+        player_id=1,
+        played=True,
+        goals_scored=goals_scored,
+        clean_sheets=clean_sheet,
+        goals_conceded=goals_conceded,
+    )
+    assert_parity([position], [stat])
+
+
+def test_accepts_dicts_and_missing_columns():
+    rows = [{"goals_scored": 2, "clean_sheets": True}, {"yellow_cards": 1, "red_cards": 1}]
+    stats = [schemas.PlayerStatIn(player_id=i, **r) for i, r in enumerate(rows)]
+    assert calculate_points_vectorized(["DEF", "MID"], stats_to_columns(rows)).tolist() == [
+        calculate_player_points("DEF", stats[0]),
+        calculate_player_points("MID", stats[1]),
+    ]
+    assert calculate_points_vectorized(["FWD"], {"goals_scored": [1]}).tolist() == [4]
+
+
+def test_empty_table():
+    assert calculate_points_vectorized([], stats_to_columns([])).tolist() == []
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+try:
+    from prisma import Prisma  # noqa: F401
+except RuntimeError:  # the client is generated by `prisma generate`
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+from app.repositories.score_repo import ScoreChange
+from app.services import rank_service
+from app.utils.rank_index import RankIndex
+
+
+def competition_ranks(scores):
+    return {uid: 1 + sum(1 for s in scores.values() if s > mine) for uid, mine in scores.items()}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_move_reports_every_rank_that_changed(seed):
+    rng = random.Random(seed)
+    scores = {f"u{i}": rng.randint(0, 120) for i in range(300)}
+    index = RankIndex(scores)
+    before = competition_ranks(scores)
+
+    deltas = {uid: rng.randint(-15, 25) for uid in rng.sample(sorted(scores), 25)}
+    moved = rank_service._move(index, deltas)
+
+    after_scores = {uid: s + deltas.get(uid, 0) for uid, s in scores.items()}
+    after = competition_ranks(after_scores)
+    changed = {uid for uid in after if after[uid] != before[uid]}
+    assert changed <= moved.keys()
+    assert {uid for uid, d in deltas.items() if d} <= moved.keys()
+    assert all(moved[uid] == after[uid] for uid in moved)
+    assert dict(index.items()) == after_scores
+
+
+class RecordingDb:
+    def __init__(self):
+        self.statements = []
+
+    async def execute_raw(self, sql, *args):
+        self.statements.append((sql, args))
+        return 1
+
+
+@pytest.fixture
+def standings(monkeypatch):
+    monkeypatch.setattr(rank_service, "_overall", RankIndex())
+    monkeypatch.setattr(rank_service, "_standings_gameweek", RankIndex())
+    monkeypatch.setattr(rank_service, "bump", lambda *domains: None)
+    rank_service._load_standings([
+        {"user_id": "a", "total_points": 100, "gameweek_id": 7, "gameweek_points": 40},
+        {"user_id": "b", "total_points": 90, "gameweek_id": 7, "gameweek_points": 30},
+        {"user_id": "c", "total_points": 80, "gameweek_id": 7, "gameweek_points": 20},
+        {"user_id": "d", "total_points": 10, "gameweek_id": 7, "gameweek_points": 5},
+    ])
+
+
+def test_apply_standings_changes_writes_only_moved_rows(standings):
+    db = RecordingDb()
+    changes = {
+        "c": ScoreChange(old_gross=20, old_net=20, gross=35, net=35),  # 80 -> 95, passes b
+        "x": ScoreChange(old_gross=None, old_net=None, gross=50, net=50),  # not on the leaderboard
+    }
+    asyncio.run(rank_service.apply_standings_changes(db, 7, changes))
+
+    (sql, (payload, gameweek_id)), = db.statements
+    assert gameweek_id == 7
+    rows = {r["user_id"]: r for r in json.loads(payload)}
+    assert rows == {
+        "c": {"user_id": "c", "delta": 15, "rank": 2, "gameweek_rank": 2},
+        "b": {"user_id": "b", "delta": 0, "rank": 3, "gameweek_rank": 3},
+    }
+    assert rank_service.overall_rank("c") == 2
+    assert rank_service.overall_rank("d") == 4
+
+
+def test_apply_standings_changes_other_gameweek_keeps_gameweek_rank(standings):
+    db = RecordingDb()
+    asyncio.run(rank_service.apply_standings_changes(db, 6, {"d": ScoreChange(0, 0, 95, 95)}))
+
+    rows = {r["user_id"]: r for r in json.loads(db.statements[0][1][0])}
+    assert rows["d"] == {"user_id": "d", "delta": 95, "rank": 1, "gameweek_rank": None}
+    assert set(rows) == {"a", "b", "c", "d"}
+
+
+def test_apply_standings_changes_without_movement_writes_nothing(standings):
+    db = RecordingDb()
+    asyncio.run(rank_service.apply_standings_changes(db, 7, {"a": ScoreChange(40, 40, 40, 40)}))
+    assert db.statements == []
+
+
+class TeamSaveDb(RecordingDb):
+    def __init__(self, has_row, totals=None):
+        super().__init__()
+        self.has_row = has_row
+        self.totals = totals
+
+    async def execute_raw(self, sql, *args):
+        self.statements.append((sql, args))
+        if 'UPDATE "standings" AS s SET "team_name"' in sql:
+            return int(self.has_row)
+        return 1
+
+    async def query_raw(self, sql, *args):
+        self.statements.append((sql, args))
+        return [self.totals] if self.totals else []
+
+
+def test_team_rename_touches_only_that_row(standings):
+    db = TeamSaveDb(has_row=True)
+    asyncio.run(rank_service.sync_manager_standing(db, "b"))
+    assert len(db.statements) == 1
+    assert db.statements[0][1] == ("b",)
+
+
+def test_new_team_is_inserted_and_pushes_down_only_managers_below(standings):
+    db = TeamSaveDb(has_row=False, totals={
+        "user_id": "e", "email": "e@x", "team_name": "E FC",
+        "gameweek_id": 7, "total_points": 85, "gameweek_points": 25,
+    })
+    asyncio.run(rank_service.sync_manager_standing(db, "e"))
+
+    rename, totals, insert, shift = db.statements
+    assert insert[1][:5] == ("e", "E FC", "e@x", 85, 3)
+    assert insert[1][7] == 3  # gameweek rank: 40, 30, 25, 20, 5
+    rows = {r["user_id"]: r for r in json.loads(shift[1][0])}
+    assert rows == {
+        "c": {"user_id": "c", "delta": 0, "rank": 4, "gameweek_rank": 4},
+        "d": {"user_id": "d", "delta": 0, "rank": 5, "gameweek_rank": 5},
+    }
+    assert rank_service.overall_rank("e") == 3
+
+
+def test_ineligible_manager_gets_no_row(standings):
+    db = TeamSaveDb(has_row=False, totals=None)
+    asyncio.run(rank_service.sync_manager_standing(db, "z"))
+    assert len(db.statements) == 2
+    assert "z" not in rank_service._overall
+
+
+def test_other_workers_follow_published_index_updates(standings, monkeypatch):
+    from app import cache
+
+    sent = []
+    monkeypatch.setattr(rank_service, "publish_event", lambda topic, payload: sent.append((topic, payload)))
+    monkeypatch.setattr(rank_service, "_gameweeks", {})
+    monkeypatch.setattr(cache, "_event_listeners", {})
+
+    async def no_summary(db, gameweek_id, changes):
+        pass
+
+    monkeypatch.setattr(rank_service, "apply_gameweek_summary_changes", no_summary)
+    changes = {"c": ScoreChange(20, 20, 35, 35), "d": ScoreChange(5, 5, 65, 65)}
+    asyncio.run(rank_service.record_gameweek_scores(RecordingDb(), 7, changes))
+    asyncio.run(rank_service.apply_standings_changes(RecordingDb(), 7, changes))
+    here = (dict(rank_service._overall.items()), dict(rank_service._standings_gameweek.items()),
+            dict(rank_service._gameweeks[7].items()))
+
+    # Another worker, still on the old scores, receives the messages
+    rank_service._gameweeks.clear()
+    standings_rows = [
+        {"user_id": "a", "total_points": 100, "gameweek_id": 7, "gameweek_points": 40},
+        {"user_id": "b", "total_points": 90, "gameweek_id": 7, "gameweek_points": 30},
+        {"user_id": "c", "total_points": 80, "gameweek_id": 7, "gameweek_points": 20},
+        {"user_id": "d", "total_points": 10, "gameweek_id": 7, "gameweek_points": 5},
+    ]
+    rank_service._load_standings(standings_rows)
+    rank_service.follow_remote_changes(db=None)
+    for topic, payload in sent:
+        cache.apply_remote(json.loads(json.dumps({"origin": "other", "topic": topic, "payload": payload})))
+
+    there = (dict(rank_service._overall.items()), dict(rank_service._standings_gameweek.items()),
+             dict(rank_service._gameweeks[7].items()))
+    assert there == here
+    assert rank_service.overall_rank("c") == 2
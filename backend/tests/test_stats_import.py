@@ -0,0 +1,111 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    from prisma import Prisma  # noqa: F401
+except RuntimeError:  # the client is generated by `prisma generate`
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+from pydantic import ValidationError
+
+from app.services.stats_import_service import PlayerIndex, _validate, iter_rows
+
+ACES = SimpleNamespace(id=1, name="Aces United", short_name="ACE")
+BYES = SimpleNamespace(id=2, name="Bye Rovers", short_name="BYE")
+PLAYERS = [
+    SimpleNamespace(id=10, full_name="Sam Striker", position="FWD", team_id=1, team=ACES),
+    SimpleNamespace(id=11, full_name="Idle Keeper", position="GK", team_id=2, team=BYES),
+]
+
+
+@pytest.fixture
+def index():
+    return PlayerIndex(PLAYERS, {1})
+
+
+def test_iter_rows_csv_numbers_lines_and_drops_empty_cells():
+    stream = io.StringIO("player_id,goals_scored,assists\n10,2,\n11,,1\n")
+    assert list(iter_rows(stream, "csv")) == [
+        (2, {"player_id": "10", "goals_scored": "2"}),
+        (3, {"player_id": "11", "assists": "1"}),
+    ]
+
+
+def test_iter_rows_ndjson_reports_bad_lines_in_place():
+    stream = io.StringIO('{"player_id": 10}\n\nnot json\n[1, 2]\n{"player_id": 11}\n')
+    rows = list(iter_rows(stream, "ndjson"))
+    assert [line for line, _ in rows] == [1, 3, 4, 5]
+    assert rows[0][1] == {"player_id": 10}
+    assert isinstance(rows[1][1], ValueError) and "invalid JSON" in str(rows[1][1])
+    assert isinstance(rows[2][1], ValueError)
+    assert rows[3][1] == {"player_id": 11}
+
+
+def test_resolve_by_id_or_by_name_and_club(index):
+    assert index.resolve({"player_id": "10"}).id == 10
+    assert index.resolve({"player": " sam striker ", "club": "ace"}).id == 10
+    assert index.resolve({"full_name": "Sam Striker", "team": "Aces United"}).id == 10
+
+
+@pytest.mark.parametrize("row, error", [
+    ({"player_id": "ten"}, "invalid player_id"),
+    ({"player_id": 99}, "unknown player_id 99"),
+    ({"player": "Sam Striker"}, "needs player_id, or player and club"),
+    ({"player": "Sam Striker", "club": "BYE"}, "unknown player"),
+    ({"player_id": 11}, "has no fixture in this gameweek"),
+])
+def test_resolve_explains_each_rejected_row(index, row, error):
+    with pytest.raises(ValueError, match=error):
+        index.resolve(row)
+
+
+def test_validate_builds_stat_line(index):
+    player, stat = _validate(index, {"player_id": "10", "goals_scored": "2", "clean_sheets": "true", "points": 99})
+    assert player.id == 10
+    assert (stat.player_id, stat.goals_scored, stat.clean_sheets) == (10, 2, True)
+
+
+def test_validate_rejects_negative_and_malformed_values(index):
+    with pytest.raises(ValueError, match="negative value for assists"):
+        _validate(index, {"player_id": 10, "assists": -1})
+    with pytest.raises(ValidationError) as e:
+        _validate(index, {"player_id": 10, "goals_scored": "two"})
+    assert e.value.errors()[0]["loc"] == ("goals_scored",)
+
+
+def test_validate_reraises_parse_errors(index):
+    with pytest.raises(ValueError, match="invalid JSON"):
+        _validate(index, ValueError("invalid JSON: Expecting value"))
+
+
+def test_dry_run_reports_each_bad_row_by_line(monkeypatch):
+    from app.services import stats_import_service as svc
+
+    async def gameweek(db, gameweek_id):
+        return SimpleNamespace(id=gameweek_id, status="LIVE")
+
+    async def fixtures(db, gameweek_id):
+        return [SimpleNamespace(home_team_id=1, away_team_id=3)]
+
+    async def players(db):
+        return PLAYERS
+
+    monkeypatch.setattr(svc, "get_gameweek_by_id", gameweek)
+    monkeypatch.setattr(svc, "get_fixtures_in_gameweek", fixtures)
+    monkeypatch.setattr(svc, "get_all_players_with_teams", players)
+    monkeypatch.setattr(svc, "MAX_REPORTED_ERRORS", 2)
+    stream = io.StringIO(
+        "player_id,goals_scored\n"
+        "10,1\n"
+        "11,1\n"      # club not playing
+        "10,lots\n"   # not a number
+        "99,1\n"      # counted, not listed
+    )
+    report = asyncio.run(svc.import_gameweek_stats(None, 5, stream, "csv", dry_run=True, chunk_size=2))
+
+    assert (report["rows"], report["valid"], report["written"], report["error_count"]) == (4, 1, 0, 3)
+    assert report["errors"][0] == {"line": 3, "error": "Idle Keeper's club has no fixture in this gameweek"}
+    assert report["errors"][1]["line"] == 4 and report["errors"][1]["error"].startswith("goals_scored: ")
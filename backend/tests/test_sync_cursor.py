@@ -0,0 +1,148 @@
+import asyncio
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    from prisma import Prisma  # noqa: F401
+except RuntimeError:  # the client is generated by `prisma generate`
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+from app.services.sync_service import get_fixture_changes
+
+
+class FakeTable:
+    """Committed rows only, as a READ COMMITTED statement would see them."""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = {}
+
+    async def find_many(self, where, order=None, include=None):
+        since = where["change_xid"]["gte"]
+        entity = where.get("entity")
+        rows = [
+            r for r in self.rows.values()
+            if r.change_xid >= since and (entity is None or r.entity == entity)
+        ]
+        return sorted(rows, key=lambda r: r.change_version)
+
+
+class FakeDb:
+    """
+    Models what the sync triggers do: every write takes the next change_version when
+    it happens and is stamped with its transaction id, but only becomes visible
+    when that transaction commits.
+    """
+
+    def __init__(self):
+        self._xids = count(100)
+        self._versions = count(1)
+        self._pending = {}
+        self.fixture = FakeTable(self)
+        self.tombstone = FakeTable(self)
+        self._tombstone_ids = count(1)
+
+    def begin(self):
+        xid = next(self._xids)
+        self._pending[xid] = []
+        return xid
+
+    def write_fixture(self, xid, fixture_id):
+        row = SimpleNamespace(id=fixture_id, change_version=next(self._versions), change_xid=xid)
+        self._pending[xid].append((self.fixture, fixture_id, row))
+        return row
+
+    def delete_fixture(self, xid, fixture_id):
+        row = SimpleNamespace(entity="fixtures", entity_id=fixture_id, change_version=next(self._versions), change_xid=xid)
+        self._pending[xid].append((self.tombstone, next(self._tombstone_ids), row))
+        self._pending[xid].append((self.fixture, fixture_id, None))
+
+    def commit(self, xid):
+        for table, key, row in self._pending.pop(xid):
+            if row is None:
+                table.rows.pop(key, None)
+            else:
+                table.rows[key] = row
+
+    async def query_raw(self, sql, *args):
+        assert "pg_snapshot_xmin" in sql
+        # Oldest transaction still in flight, else the next id to be assigned
+        horizon = min(self._pending) if self._pending else next(self._xids)
+        return [{"horizon": horizon}]
+
+
+def poll(db, since):
+    out = asyncio.run(get_fixture_changes(db, since))
+    return out["version"], sorted(f.id for f in out["fixtures"]), out["deleted"]
+
+
+def test_write_committed_late_with_lower_version_is_not_skipped():
+    db = FakeDb()
+    slow = db.begin()
+    late = db.write_fixture(slow, 1)
+    fast = db.begin()
+    early = db.write_fixture(fast, 2)
+    db.commit(fast)
+
+    cursor, ids, _ = poll(db, 0)
+    assert ids == [2]
+    # Cursoring on the highest change_version seen would have moved past fixture 1
+    assert late.change_version < early.change_version
+
+    db.commit(slow)
+    cursor, ids, _ = poll(db, cursor)
+    assert 1 in ids
+
+
+def test_older_transaction_writing_after_a_newer_one_is_not_skipped():
+    db = FakeDb()
+    old = db.begin()
+    db.write_fixture(old, 10)
+    new = db.begin()
+    db.write_fixture(new, 20)
+    db.write_fixture(old, 30)  # takes a higher version than fixture 20
+    db.commit(old)
+
+    cursor, ids, _ = poll(db, 0)
+    assert ids == [10, 30]
+
+    db.commit(new)
+    cursor, ids, _ = poll(db, cursor)
+    assert ids == [20]
+
+
+def test_delete_committed_late_is_not_skipped():
+    db = FakeDb()
+    setup = db.begin()
+    db.write_fixture(setup, 1)
+    db.write_fixture(setup, 2)
+    db.commit(setup)
+    cursor, ids, deleted = poll(db, 0)
+    assert (ids, deleted) == ([1, 2], [])
+
+    slow = db.begin()
+    db.delete_fixture(slow, 1)
+    fast = db.begin()
+    db.write_fixture(fast, 2)
+    db.commit(fast)
+    cursor, ids, deleted = poll(db, cursor)
+    assert (ids, deleted) == ([2], [])
+
+    db.commit(slow)
+    cursor, ids, deleted = poll(db, cursor)
+    assert deleted == [1]
+
+
+def test_cursor_settles_when_nothing_is_in_flight():
+    db = FakeDb()
+    for fixture_id in (1, 2, 3):
+        xid = db.begin()
+        db.write_fixture(xid, fixture_id)
+        db.commit(xid)
+
+    cursor, ids, _ = poll(db, 0)
+    assert ids == [1, 2, 3]
+    cursor, ids, deleted = poll(db, cursor)
+    assert (ids, deleted) == ([], [])
@@ -0,0 +1,134 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    from prisma import Prisma  # noqa: F401
+except RuntimeError:  # the client is generated by `prisma generate`
+    pytest.skip("Prisma client not generated", allow_module_level=True)
+
+from app import cache
+from app.cache_backends import MemoryBackend
+from app.services.team_service import get_user_team_full
+from app.utils.dataloader import request_scope
+
+POSITIONS = ("GK", "DEF", "DEF", "MID", "FWD")
+CLUBS = [SimpleNamespace(id=i, name=f"Club {i}", short_name=f"C{i}") for i in range(1, 5)]
+GAMEWEEKS = [
+    SimpleNamespace(id=10 + n, gw_number=n, deadline=datetime(2026, 8, 1) + timedelta(weeks=n), status="LIVE")
+    for n in range(1, 5)
+]
+
+
+class CountingModel:
+    """A Prisma model delegate: every call is counted, reads return canned rows."""
+
+    def __init__(self, db, name, rows=()):
+        self._db = db
+        self._name = name
+        self._rows = list(rows)
+
+    def __getattr__(self, method):
+        async def call(*args, **kwargs):
+            self._db.calls[f"{self._name}.{method}"] += 1
+            if method != "find_many":
+                return None
+            gw_filter = (kwargs.get("where") or {}).get("gameweek_id")
+            if isinstance(gw_filter, dict):
+                return [r for r in self._rows if r.gameweek_id in gw_filter["in"]]
+            return list(self._rows)
+        return call
+
+
+class CountingDb:
+    """Stands in for the Prisma client and counts round trips."""
+
+    def __init__(self, squad_size):
+        self.calls = Counter()
+        self.squad_size = squad_size
+        self.gameweek = CountingModel(self, "gameweek", GAMEWEEKS)
+        self.fixture = CountingModel(self, "fixture", [
+            SimpleNamespace(
+                gameweek_id=gw.id, kickoff=gw.deadline,
+                home_team_id=home.id, away_team_id=away.id, home=home, away=away,
+            )
+            for gw in GAMEWEEKS for home, away in ((CLUBS[0], CLUBS[1]), (CLUBS[2], CLUBS[3]))
+        ])
+        self.gameweekplayerstats = CountingModel(self, "gameweekplayerstats", [
+            SimpleNamespace(player_id=pid, gameweek_id=gw.id, points=pid % 7)
+            for gw in GAMEWEEKS for pid in range(1, squad_size + 1)
+        ])
+
+    def __getattr__(self, name):
+        # Any other model is still counted, so a new per-player query shows up
+        return CountingModel(self, name)
+
+    async def query_raw(self, sql, *args):
+        self.calls["query_raw"] += 1
+        return [self._row(pid) for pid in range(1, self.squad_size + 1)] or [self._row(None)]
+
+    def _row(self, pid):
+        club = CLUBS[(pid or 0) % len(CLUBS)]
+        return {
+            "team_name": "Test XI",
+            "active_chip": None,
+            "player_id": pid,
+            "is_captain": pid == 1,
+            "is_vice_captain": pid == 2,
+            "is_benched": pid is not None and pid > 11,
+            "full_name": f"Player {pid}",
+            "position": POSITIONS[(pid or 0) % len(POSITIONS)],
+            "price": 5.5,
+            "status": "AVAILABLE",
+            "news": None,
+            "chance_of_playing": None,
+            "return_date": None,
+            "club_id": club.id,
+            "club_name": club.name,
+            "club_short_name": club.short_name,
+            "stats": {"points": pid % 7, "goals_scored": pid % 2, "clean_sheets": False} if pid else None,
+        }
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    monkeypatch.setattr(cache, "_versions", {})
+    monkeypatch.setattr(cache, "_backend", MemoryBackend(cache._NAMESPACES))
+
+
+def round_trips(squad_size, warm=False):
+    async def main():
+        # Start cold: nothing shared is cached yet
+        cache._backend = MemoryBackend(cache._NAMESPACES)
+        db = CountingDb(squad_size)
+        if warm:
+            with request_scope():
+                await get_user_team_full(db, "user-1", GAMEWEEKS[-1].id)
+            db.calls.clear()
+        # Each HTTP request runs in its own dataloader scope (DataLoaderMiddleware)
+        with request_scope():
+            team = await get_user_team_full(db, "user-1", GAMEWEEKS[-1].id)
+        assert len(team["starting"]) + len(team["bench"]) == squad_size
+        return db.calls
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("warm", (False, True))
+def test_round_trips_do_not_grow_with_squad_size(warm):
+    counts = {n: round_trips(n, warm) for n in (1, 11, 15, 40)}
+    assert len({frozenset(c.items()) for c in counts.values()}) == 1, counts
+
+
+def test_cold_and_warm_round_trips():
+    # Cold: the team view statement, then gameweeks, fixtures and stats for recent form
+    assert round_trips(15) == Counter({
+        "query_raw": 1,
+        "gameweek.find_many": 1,
+        "fixture.find_many": 1,
+        "gameweekplayerstats.find_many": 1,
+    })
+    # Warm: everything shared is cached, only the per-user statement runs
+    assert round_trips(15, warm=True) == Counter({"query_raw": 1})